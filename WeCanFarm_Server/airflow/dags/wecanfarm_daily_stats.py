@@ -38,32 +38,33 @@ def collect_daily_stats(**context):
         
         logging.info("🔍 일일 통계 수집 시작...")
         
+        # 날짜 조건은 DATE(created_at) 대신 범위 조건으로 작성 (인덱스/월 단위 파티션 프루닝 적용)
         # 1. 어제 신규 가입자 수
         new_users_query = """
         SELECT COUNT(*) as new_users
         FROM users 
-        WHERE DATE(created_at) = %s
+        WHERE created_at >= %s::date AND created_at < %s::date + INTERVAL '1 day'
         """
-        new_users = postgres_hook.get_first(new_users_query, parameters=[execution_date])
+        new_users = postgres_hook.get_first(new_users_query, parameters=[execution_date, execution_date])
         new_users_count = new_users[0] if new_users else 0
         
         # 2. 어제 분석 요청 수
         analysis_requests_query = """
         SELECT COUNT(*) as total_requests
         FROM analysis_requests 
-        WHERE DATE(created_at) = %s
+        WHERE created_at >= %s::date AND created_at < %s::date + INTERVAL '1 day'
         """
-        analysis_requests = postgres_hook.get_first(analysis_requests_query, parameters=[execution_date])
+        analysis_requests = postgres_hook.get_first(analysis_requests_query, parameters=[execution_date, execution_date])
         requests_count = analysis_requests[0] if analysis_requests else 0
         
         # 3. 어제 성공한 분석 수
         successful_analysis_query = """
         SELECT COUNT(*) as successful_requests
         FROM analysis_requests 
-        WHERE DATE(created_at) = %s 
+        WHERE created_at >= %s::date AND created_at < %s::date + INTERVAL '1 day' 
           AND status = 'COMPLETED'
         """
-        successful_analysis = postgres_hook.get_first(successful_analysis_query, parameters=[execution_date])
+        successful_analysis = postgres_hook.get_first(successful_analysis_query, parameters=[execution_date, execution_date])
         successful_count = successful_analysis[0] if successful_analysis else 0
         
         # 4. 성공률 계산
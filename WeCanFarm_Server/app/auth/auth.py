@@ -2,31 +2,28 @@ from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 import os
 
-from ..database.database import get_db
-from ..database.models import User, UserCRUD
+from ..database.models import User
+from ..database.async_crud import AsyncUserCRUD
+from .password_hasher import pwd_context, password_hasher
 
 # 환경 변수
 SECRET_KEY = os.getenv("SECRET_KEY", "WeCanFarm_Auth_Key_Test")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# 패스워드 해싱
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # JWT 토큰 스키마
 security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """비밀번호 검증"""
+    """비밀번호 검증 (동기 - 스크립트용, API에서는 password_hasher 사용)"""
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """비밀번호 해싱"""
+    """비밀번호 해싱 (동기 - 스크립트용, API에서는 password_hasher 사용)"""
     return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -41,12 +38,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """사용자 인증"""
-    user = UserCRUD.get_by_username(db, username)
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """
+    사용자 인증 (bcrypt 검증은 이벤트 루프 밖 전용 스레드에서 실행)
+    - 해싱 대기열이 가득 차면 PasswordHasherBusy
+    - BCRYPT_ROUNDS가 바뀐 뒤 처음 로그인하면 새 비용으로 다시 해싱해 저장
+    """
+    user = await AsyncUserCRUD.get_by_username(db, username)
+    if not user:
+        user = await AsyncUserCRUD.get_by_email(db, username)  # 이메일로도 로그인 가능
+    
     if not user:
-        user = UserCRUD.get_by_email(db, username)  # 이메일로도 로그인 가능
+        return None
     
-    if not user or not verify_password(password, user.password):
+    verified, new_hash = await password_hasher.verify_and_update(password, user.password)
+    if not verified:
         return None
+    if new_hash is not None:
+        await AsyncUserCRUD.update_password_hash(db, user, new_hash)
+        password_hasher.rehashed += 1
     return user
\ No newline at end of file
@@ -0,0 +1,110 @@
+# app/auth/password_hasher.py
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# bcrypt 비용(라운드) - 바꾸면 기존 해시는 다음 로그인 때 새 비용으로 다시 해싱됨
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 해싱 전용 스레드 수 (bcrypt는 해싱 중 GIL을 놓으므로 이벤트 루프/다른 요청을 막지 않음)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 실행 중 + 대기 중인 해싱 작업 상한 (넘으면 즉시 거절 → 503)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+# 거절 응답의 Retry-After (초)
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "2"))
+
+# 패스워드 해싱 - 라운드가 BCRYPT_ROUNDS와 다른 해시는 needs_update 대상
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+
+class PasswordHasherBusy(Exception):
+    """해싱 대기열이 가득 참 (로그인 폭주) - 라우터에서 503으로 변환"""
+
+    def __init__(self, retry_after: int = PASSWORD_HASH_RETRY_AFTER):
+        super().__init__("비밀번호 처리 요청이 많습니다")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    bcrypt 해싱/검증을 전용 스레드 풀에서 실행
+    - 1회 100~300ms의 CPU 작업이 이벤트 루프에서 돌면 그동안 모든 응답(분석 포함)이 멈춤
+    - 동시에 max_pending개를 넘으면 대기열에 쌓지 않고 바로 거절 (대기 중 타임아웃으로 전부 실패하는 것보다 나음)
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0  # 이벤트 루프 스레드에서만 변경
+
+        # 관측용 카운터
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.busy_ms_total = 0.0
+
+    def _submit(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._timed, fn, *args)
+        # 요청이 취소돼도 스레드 작업은 끝까지 돌므로, 실제로 끝났을 때 대기 수를 줄임
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        self._pending -= 1
+        if not future.cancelled() and future.exception() is None:
+            self.completed += 1
+            self.busy_ms_total += future.result()[1]
+
+    @staticmethod
+    def _timed(fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, (time.perf_counter() - started) * 1000
+
+    async def _run(self, fn, *args):
+        result, _ = await self._submit(fn, *args)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(일치 여부, 비용이 바뀌었으면 새 해시 아니면 None)"""
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": BCRYPT_ROUNDS,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_hash_ms": round(self.busy_ms_total / self.completed, 1) if self.completed else None
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# 전역 해셔
+password_hasher = PasswordHasher()
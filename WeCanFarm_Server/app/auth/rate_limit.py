@@ -0,0 +1,168 @@
+# app/auth/rate_limit.py
+import math
+import os
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from ..database.models import UserRole
+
+# 역할별 추론 요청 한도: 분당 평균 요청 수(토큰 충전 속도) / 한 번에 몰아 쓸 수 있는 양(버킷 크기), 분당 0이면 제한 없음
+_DEFAULT_LIMITS = {
+    UserRole.USER: ("20", "10"),
+    UserRole.FARMER: ("60", "20"),
+    UserRole.ADMIN: ("300", "60"),
+}
+RATE_LIMITS_PER_MINUTE = {
+    role: float(os.getenv(f"RATE_LIMIT_{role.value}_PER_MINUTE", per_minute))
+    for role, (per_minute, _) in _DEFAULT_LIMITS.items()
+}
+RATE_LIMITS_BURST = {
+    role: float(os.getenv(f"RATE_LIMIT_{role.value}_BURST", burst))
+    for role, (_, burst) in _DEFAULT_LIMITS.items()
+}
+# 버스트/영상 분석 1회가 차감하는 토큰 수 (키프레임 여러 장을 추론하므로 단일 분석보다 비쌈)
+RATE_LIMIT_BURST_COST = float(os.getenv("RATE_LIMIT_BURST_COST", "5"))
+# 이 시간(초) 동안 요청이 없던 사용자의 버킷은 제거 (다시 오면 가득 찬 버킷으로 시작)
+RATE_LIMIT_IDLE_SECONDS = float(os.getenv("RATE_LIMIT_IDLE_SECONDS", "600"))
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: int               # 버킷 크기
+    remaining: int           # 남은 토큰 (내림)
+    retry_after: float       # 거절 시 필요한 토큰이 찰 때까지 초
+    reset_after: float       # 버킷이 가득 찰 때까지 초
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class TokenBucketLimiter:
+    """
+    user_id별 토큰 버킷 (프로세스 단위)
+    - 버킷 상태는 사용자당 슬롯 1개: array에 토큰 수/마지막 갱신 시각/소유자를 나란히 저장 (사용자 수십만 명도 수십 MB 이하)
+    - 충전은 요청이 올 때 경과 시간만큼 한 번에 계산 (타이머/백그라운드 작업 없음)
+    - 오래 쉬던 버킷은 요청마다 몇 슬롯씩 순서대로 검사해 제거 (전체 순회로 이벤트 루프를 멈추지 않음)
+    - FastAPI 의존성(이벤트 루프 스레드)에서만 호출하므로 락이 필요 없음
+    """
+
+    SWEEP_PER_CALL = 4
+
+    def __init__(self, per_minute: Dict[UserRole, float] = None, burst: Dict[UserRole, float] = None,
+                 idle_seconds: float = RATE_LIMIT_IDLE_SECONDS):
+        per_minute = per_minute or RATE_LIMITS_PER_MINUTE
+        burst = burst or RATE_LIMITS_BURST
+        self.rates = {role: per_minute[role] / 60.0 for role in per_minute}  # 초당 충전량
+        self.capacities = {role: max(1.0, burst[role]) for role in burst}
+        # 버킷이 가득 차기 전에 제거하면 한도가 초기화되므로, 가장 느리게 차는 역할보다 오래 기다림
+        refill_seconds = [self.capacities[role] / rate for role, rate in self.rates.items() if rate > 0]
+        self.idle_seconds = max([idle_seconds] + refill_seconds)
+
+        self._slots: Dict[int, int] = {}   # user_id → 슬롯 번호
+        self._tokens = array("d")
+        self._updated = array("d")
+        self._owners = array("q")          # 슬롯 번호 → user_id (-1이면 빈 슬롯)
+        self._free = []
+        self._sweep_cursor = 0
+
+        # 관측용 카운터
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def acquire(self, user_id: int, role: UserRole, cost: float = 1.0,
+                now: Optional[float] = None) -> Optional[RateLimitDecision]:
+        """토큰 cost개 차감 시도 (역할 한도가 0이면 None - 제한 없음)"""
+        rate = self.rates.get(role, 0.0)
+        if rate <= 0:
+            return None
+        capacity = self.capacities[role]
+        now = time.monotonic() if now is None else now
+
+        self._sweep(now)
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._allocate(user_id, capacity, now)
+
+        # 지연 충전 (역할이 바뀌어 버킷이 작아졌으면 새 크기로 자름)
+        tokens = min(capacity, self._tokens[slot] + (now - self._updated[slot]) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+            self.allowed += 1
+        else:
+            self.limited += 1
+        self._tokens[slot] = tokens
+        self._updated[slot] = now
+
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=int(capacity),
+            remaining=int(tokens),
+            retry_after=0.0 if allowed else (cost - tokens) / rate,
+            reset_after=(capacity - tokens) / rate
+        )
+
+    def _allocate(self, user_id: int, capacity: float, now: float) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._tokens[slot] = capacity
+            self._updated[slot] = now
+            self._owners[slot] = user_id
+        else:
+            slot = len(self._owners)
+            self._tokens.append(capacity)
+            self._updated.append(now)
+            self._owners.append(user_id)
+        self._slots[user_id] = slot
+        return slot
+
+    def _sweep(self, now: float):
+        """다음 몇 개 슬롯만 확인해 오래 쉰 버킷을 제거 (호출 1회당 O(1))"""
+        size = len(self._owners)
+        if not size:
+            return
+        for _ in range(min(self.SWEEP_PER_CALL, size)):
+            slot = self._sweep_cursor % size
+            self._sweep_cursor = slot + 1
+            owner = self._owners[slot]
+            if owner >= 0 and now - self._updated[slot] > self.idle_seconds:
+                del self._slots[owner]
+                self._owners[slot] = -1
+                self._free.append(slot)
+                self.evicted += 1
+
+    def clear(self):
+        self._slots.clear()
+        self._tokens = array("d")
+        self._updated = array("d")
+        self._owners = array("q")
+        self._free = []
+        self._sweep_cursor = 0
+
+    def stats(self) -> dict:
+        return {
+            "limits": {
+                role.value: {"per_minute": round(rate * 60, 2), "burst": self.capacities[role]}
+                for role, rate in self.rates.items()
+            },
+            "active_buckets": len(self._slots),
+            "allocated_slots": len(self._owners),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evicted": self.evicted
+        }
+
+
+# 전역 추론 요청 제한기
+inference_rate_limiter = TokenBucketLimiter()
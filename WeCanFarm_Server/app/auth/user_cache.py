@@ -0,0 +1,188 @@
+# app/auth/user_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from ..database.models import User, UserRole
+
+# 인증 사용자 캐시 설정
+USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))          # 초, 0이면 캐시 사용 안 함
+USER_CACHE_MAX_SIZE = int(os.getenv("AUTH_USER_CACHE_MAX_SIZE", "10000"))  # 최대 사용자 수 (LRU)
+# true면 로그인 토큰에 username/role 클레임을 넣고, 검증된 클레임만으로 사용자 정보 구성 (DB 조회 없음)
+AUTH_TOKEN_CLAIMS = os.getenv("AUTH_TOKEN_CLAIMS", "false").lower() in ("1", "true", "yes")
+# 클레임을 DB 확인 없이 믿는 시간 (초) - 발급 후 이 시간이 지나면 캐시/DB로 다시 확인
+# 다른 워커에서 비활성화/역할 변경된 사용자가 클레임 토큰으로 계속 접근할 수 있는 최대 시간
+AUTH_CLAIMS_TTL = int(os.getenv("AUTH_CLAIMS_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """
+    get_current_user가 반환하는 인증 사용자 (라우터에서 쓰는 필드만)
+    세션에 묶인 ORM 객체가 아니므로 커밋/세션 종료 후 접근해도 추가 SELECT가 없음
+    """
+    id: int
+    username: str
+    role: UserRole
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthUser":
+        return cls(id=user.id, username=user.username, role=user.role, is_active=bool(user.is_active))
+
+    @classmethod
+    def from_claims(cls, user_id: int, payload: dict) -> Optional["AuthUser"]:
+        """
+        토큰 클레임으로 구성 (클레임이 없거나 형식이 다르거나 클레임 유효 시간(cx)이 지났으면 None)
+        활성 사용자에게만 발급하므로 cx 전까지만 is_active=True로 간주
+        """
+        claims_expire_at = payload.get("cx")
+        if not isinstance(claims_expire_at, (int, float)) or claims_expire_at <= time.time():
+            return None
+        try:
+            return cls(id=user_id, username=payload["username"], role=UserRole(payload["role"]), is_active=True)
+        except (KeyError, ValueError, TypeError):
+            return None
+
+
+class UserCache:
+    """
+    user_id → AuthUser 프로세스 단위 TTL + LRU 캐시
+    - 사용자 정보(역할/활성 상태)가 바뀌면 invalidate()로 즉시 제거 (ORM 갱신은 아래 이벤트가 자동 호출)
+    - 다른 워커 프로세스에서 바뀐 내용은 최대 TTL만큼 늦게 반영됨
+      (클레임 토큰은 클레임 유효 시간(AUTH_CLAIMS_TTL)이 지나면 캐시/DB로 다시 확인 → cross_worker_window())
+    """
+
+    def __init__(self, ttl: float = USER_CACHE_TTL, max_size: int = USER_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # user_id → (AuthUser, 저장 시각)
+        self._invalidated_at: Dict[int, float] = {}                # user_id → 마지막 무효화 시각 (time.time())
+        self._lock = threading.Lock()
+
+        # 관측용 카운터 (인증 1회당 DB 조회 수 = db_lookups / (hits + claim_hits + db_lookups))
+        self.hits = 0
+        self.claim_hits = 0
+        self.db_lookups = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int) -> Optional[AuthUser]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, stored_at = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return user
+
+    def put(self, user: AuthUser):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user.id] = (user, time.monotonic())
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """해당 사용자 캐시 제거 + 이 시각 이전에 발급된 클레임 토큰은 DB로 다시 확인"""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._invalidated_at[user_id] = now
+            self.invalidations += 1
+            # 토큰 만료 시간보다 오래된 무효화 기록은 더 이상 의미 없음
+            horizon = now - _token_lifetime_seconds()
+            for stale_id in [uid for uid, at in self._invalidated_at.items() if at < horizon]:
+                del self._invalidated_at[stale_id]
+
+    def claims_trusted(self, user_id: int, issued_at) -> bool:
+        """클레임 토큰이 이 프로세스의 마지막 무효화 이후에 발급되었는지 (다른 워커의 무효화는 cx 만료로 반영)"""
+        invalidated_at = self._invalidated_at.get(user_id)
+        if invalidated_at is None:
+            return True
+        return isinstance(issued_at, (int, float)) and issued_at > invalidated_at
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated_at.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.claim_hits + self.db_lookups
+        return {
+            "ttl": self.ttl,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "token_claims": AUTH_TOKEN_CLAIMS,
+            "claims_ttl": AUTH_CLAIMS_TTL if AUTH_TOKEN_CLAIMS else None,
+            "cross_worker_window": cross_worker_window(),
+            "hits": self.hits,
+            "claim_hits": self.claim_hits,
+            "db_lookups": self.db_lookups,
+            "invalidations": self.invalidations,
+            "db_lookups_per_auth": round(self.db_lookups / lookups, 4) if lookups else None
+        }
+
+
+def token_claims(user: AuthUser) -> dict:
+    """로그인/토큰 갱신 시 넣을 클레임 (AUTH_TOKEN_CLAIMS=false면 sub만)"""
+    claims = {"sub": str(user.id)}
+    if AUTH_TOKEN_CLAIMS:
+        issued_at = int(time.time())
+        claims.update(username=user.username, role=user.role.value, iat=issued_at, cx=issued_at + AUTH_CLAIMS_TTL)
+    return claims
+
+
+def cross_worker_window() -> float:
+    """다른 워커에서 바꾼 역할/활성 상태가 반영되기까지 최대 시간 (초, API 문서/통계용)"""
+    window = USER_CACHE_TTL if USER_CACHE_TTL > 0 else 0
+    if AUTH_TOKEN_CLAIMS:
+        window = max(window, AUTH_CLAIMS_TTL)
+    return window
+
+
+def _token_lifetime_seconds() -> float:
+    from .auth import ACCESS_TOKEN_EXPIRE_MINUTES
+    return ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+# 전역 캐시
+user_cache = UserCache()
+
+
+# ORM으로 사용자 행을 수정/삭제하면 (동기/비동기 세션 모두) 캐시 무효화
+# - flush 시점에 바로 제거하고, 커밋 직후 한 번 더 제거 (커밋 전 다른 요청이 이전 값을 다시 캐시한 경우 대비)
+# - Core UPDATE(session.execute(update(User)...))는 이벤트가 발생하지 않으므로 user_cache.invalidate()를 직접 호출
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    if target.id is None:
+        return
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("auth_user_invalidations", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop("auth_user_invalidations", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session):
+    session.info.pop("auth_user_invalidations", None)
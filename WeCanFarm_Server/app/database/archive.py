@@ -0,0 +1,318 @@
+import argparse
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func
+
+from .database import engine
+from .models import AnalysisRequest, AnalysisResult
+from .partitioning import _month_start, purge_before, apply_retention, partitioned_table_names
+from .replica import replica_router
+
+# 콜드 아카이브 설정 (환경 변수로 조정)
+_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(_SERVER_DIR, "archive"))
+ARCHIVE_OLDER_THAN_MONTHS = int(os.getenv("ARCHIVE_OLDER_THAN_MONTHS", "12"))  # 이번 달 기준 N개월 이전 데이터
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))              # 서버 측 커서에서 한 번에 가져올 요청 수
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+
+_DATASET = "analyses"  # {ARCHIVE_DIR}/analyses/month=YYYY-MM/part-*.parquet
+
+# 감지 1건당 1행 (감지가 없는 요청은 감지 컬럼이 비어 있는 1행)
+_COLUMNS = [
+    ("request_id", "int64"),
+    ("user_id", "int64"),
+    ("analysis_type", "string"),
+    ("status", "string"),
+    ("created_at", "timestamp"),
+    ("processing_time", "int32"),
+    ("result_id", "int64"),
+    ("total_detections", "int32"),
+    ("result_image_url", "string"),
+    ("processing_status", "string"),
+    ("detection_index", "int32"),
+    ("crop_type", "string"),
+    ("disease_status", "string"),
+    ("bbox_x1", "int32"),
+    ("bbox_y1", "int32"),
+    ("bbox_x2", "int32"),
+    ("bbox_y2", "int32"),
+    ("yolo_confidence", "float64"),
+    ("disease_confidence", "float64"),
+]
+
+
+def _require_pyarrow():
+    """pyarrow는 아카이브 기능에서만 사용하므로 지연 import"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("아카이브 기능에는 pyarrow가 필요합니다 (pip install pyarrow)")
+    return pa, pq
+
+
+def archive_schema():
+    pa, _ = _require_pyarrow()
+    types = {
+        "int64": pa.int64(),
+        "int32": pa.int32(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in _COLUMNS])
+
+
+def _analysis_query():
+    return (
+        select(
+            AnalysisRequest.id.label("request_id"),
+            AnalysisRequest.user_id,
+            AnalysisRequest.analysis_type,
+            AnalysisRequest.status,
+            AnalysisRequest.created_at,
+            AnalysisRequest.processing_time,
+            AnalysisResult.id.label("result_id"),
+            AnalysisResult.total_detections,
+            AnalysisResult.result_image_url,
+            AnalysisResult.processing_status,
+            AnalysisResult.detection_data
+        )
+        .outerjoin(AnalysisResult, AnalysisResult.request_id == AnalysisRequest.id)
+    )
+
+
+def _to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)  # SQLite: UTC로 저장된 naive 값
+    return value.astimezone(timezone.utc)
+
+
+def _to_int(value):
+    return None if value is None else int(value)
+
+
+def flatten_analysis(row) -> List[dict]:
+    """요청+결과 1건을 감지 단위 행 리스트로 펼침 (detection_data JSON 기준)"""
+    base = {
+        "request_id": row.request_id,
+        "user_id": row.user_id,
+        "analysis_type": row.analysis_type.value if row.analysis_type else None,
+        "status": row.status.value if row.status else None,
+        "created_at": _to_utc(row.created_at),
+        "processing_time": row.processing_time,
+        "result_id": row.result_id,
+        "total_detections": row.total_detections,
+        "result_image_url": row.result_image_url,
+        "processing_status": row.processing_status,
+    }
+    detections = row.detection_data if isinstance(row.detection_data, list) else []
+    detections = [detection for detection in detections if isinstance(detection, dict)]
+    if not detections:
+        return [dict(base, detection_index=None)]
+
+    rows = []
+    for index, detection in enumerate(detections):
+        bbox = detection.get("bbox")
+        if not (isinstance(bbox, (list, tuple)) and len(bbox) == 4):
+            bbox = (None, None, None, None)
+        rows.append(dict(
+            base,
+            detection_index=index,
+            crop_type=detection.get("crop_type"),
+            disease_status=detection.get("disease_status"),
+            bbox_x1=_to_int(bbox[0]),
+            bbox_y1=_to_int(bbox[1]),
+            bbox_x2=_to_int(bbox[2]),
+            bbox_y2=_to_int(bbox[3]),
+            yolo_confidence=detection.get("yolo_confidence"),
+            disease_confidence=detection.get("disease_confidence", detection.get("confidence"))
+        ))
+    return rows
+
+
+def export_archive(cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE,
+                   archive_dir: str = ARCHIVE_DIR) -> Dict:
+    """
+    created_at < cutoff인 분석을 월별 Parquet 파일로 내보냄
+    - 서버 측 커서(stream_results)로 batch_size건씩 읽어 메모리 사용량을 일정하게 유지
+    - 내보낸 뒤 원본을 삭제하므로 복제본이 아닌 primary에서 읽음 (건수 검증 기준과 일치)
+    - 임시 파일에 쓴 뒤 모두 성공하면 이름을 바꿔 반영 (중간 실패 시 반쪽 파일이 남지 않음)
+    Returns:
+        {"requests": 요청 수, "rows": 기록한 행 수, "files": [파일 경로]}
+    """
+    pa, pq = _require_pyarrow()
+    schema = archive_schema()
+    run_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    writers = {}
+    request_count = 0
+    row_count = 0
+    try:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+                _analysis_query()
+                .where(AnalysisRequest.created_at < cutoff)
+                .order_by(AnalysisRequest.created_at, AnalysisRequest.id)
+            )
+            for chunk in result.partitions():
+                by_month: Dict[str, List[dict]] = {}
+                for row in chunk:
+                    flattened = flatten_analysis(row)
+                    month = flattened[0]["created_at"].strftime("%Y-%m")
+                    by_month.setdefault(month, []).extend(flattened)
+                request_count += len(chunk)
+
+                for month, rows in by_month.items():
+                    if month not in writers:
+                        month_dir = os.path.join(archive_dir, _DATASET, f"month={month}")
+                        os.makedirs(month_dir, exist_ok=True)
+                        path = os.path.join(month_dir, f"part-{run_id}.parquet")
+                        writers[month] = (path, pq.ParquetWriter(path + ".tmp", schema, compression=ARCHIVE_COMPRESSION))
+                    writers[month][1].write_table(pa.Table.from_pylist(rows, schema=schema))
+                    row_count += len(rows)
+                print(f"  📦 요청 {request_count}건 내보냄 (행 {row_count}개)")
+    except Exception:
+        for path, writer in writers.values():
+            writer.close()
+            os.remove(path + ".tmp")
+        raise
+
+    files = []
+    for path, writer in writers.values():
+        writer.close()
+        os.replace(path + ".tmp", path)
+        files.append(path)
+    return {"requests": request_count, "rows": row_count, "files": files}
+
+
+def verify_archive(report: Dict) -> bool:
+    """기록한 파일의 행 수/요청 수가 내보낸 값과 일치하는지 확인"""
+    pa, pq = _require_pyarrow()
+    rows = 0
+    request_ids = set()
+    for path in report["files"]:
+        rows += pq.ParquetFile(path).metadata.num_rows
+        request_ids.update(pq.read_table(path, columns=["request_id"]).column("request_id").to_pylist())
+    return rows == report["rows"] and len(request_ids) == report["requests"]
+
+
+def _count_before(cutoff: datetime) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.count()).select_from(AnalysisRequest).where(AnalysisRequest.created_at < cutoff)
+        ).scalar()
+
+
+def archive_old_analyses(older_than_months: int = ARCHIVE_OLDER_THAN_MONTHS, batch_size: int = ARCHIVE_BATCH_SIZE,
+                         delete: bool = True, archive_dir: str = ARCHIVE_DIR) -> Dict:
+    """
+    오래된 분석을 아카이브로 내보내고, 건수 검증이 통과하면 원본 행 삭제
+    - 파티션 배포(PostgreSQL)는 기준 시각 이전 월 파티션을 통째로 삭제하고, 기본 파티션에 남은 행만 배치 삭제
+    - 삭제 전에 롤업 보존 기준 시각을 기록하므로 롤업을 재구성해도 대시보드 통계가 유지됩니다
+    검증 실패 시 이번에 쓴 파일을 지우고 원본은 그대로 둡니다.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = _month_start(now, -older_than_months)
+    if engine.dialect.name == "sqlite":
+        cutoff = cutoff.replace(tzinfo=None)  # SQLite는 naive UTC 문자열로 비교
+    print(f"🔄 분석 아카이브 시작 (기준: {cutoff:%Y-%m-%d} 이전 → {archive_dir})")
+
+    expected = _count_before(cutoff)
+    report = export_archive(cutoff, batch_size, archive_dir)
+    verified = (
+        report["requests"] == expected
+        and verify_archive(report)
+        and _count_before(cutoff) == expected  # 내보내는 동안 변경이 없었는지
+    )
+    report["verified"] = verified
+
+    if not verified:
+        print(f"❌ 아카이브 검증 실패 (DB {expected}건, 파일 {report['requests']}건) - 원본을 삭제하지 않습니다")
+        for path in report["files"]:
+            os.remove(path)
+        report["files"] = []
+        return report
+
+    print(f"✅ 아카이브 검증 완료: 요청 {report['requests']}건, 행 {report['rows']}개, 파일 {len(report['files'])}개")
+    if delete and report["requests"] > 0:
+        if partitioned_table_names() and older_than_months > 0:
+            # 기준 시각이 월 경계이므로 내보낸 달의 파티션은 DELETE 대신 DROP
+            report["dropped_partitions"] = apply_retention(older_than_months, mode="drop", now=now)
+        purge_before(cutoff)
+        report["deleted"] = expected - _count_before(cutoff)
+    return report
+
+
+def scan_analyses(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  columns: Optional[List[str]] = None, archive_dir: str = ARCHIVE_DIR):
+    """
+    리포트용 조회 - 아카이브(Parquet)와 운영 DB의 분석을 같은 형태로 합쳐 pandas DataFrame 반환
+    - start <= created_at < end (UTC, 생략 가능)
+    - source 컬럼: "archive" 또는 "live"
+    예) scan_analyses(datetime(2024, 1, 1, tzinfo=timezone.utc), columns=["created_at", "crop_type", "disease_status"])
+    """
+    pa, _ = _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    schema = archive_schema()
+    start, end = _to_utc(start), _to_utc(end)
+    tables = []
+
+    # 1. 아카이브 - month 디렉토리와 created_at 통계로 필요한 파일/행 그룹만 읽음
+    dataset_dir = os.path.join(archive_dir, _DATASET)
+    if os.path.isdir(dataset_dir):
+        dataset = ds.dataset(dataset_dir, format="parquet", schema=schema.append(pa.field("month", pa.string())),
+                             partitioning="hive")
+        condition = None
+        if start is not None:
+            condition = (ds.field("month") >= start.strftime("%Y-%m")) & (ds.field("created_at") >= start)
+        if end is not None:
+            upper = (ds.field("month") <= end.strftime("%Y-%m")) & (ds.field("created_at") < end)
+            condition = upper if condition is None else condition & upper
+        archived = dataset.to_table(columns=schema.names, filter=condition)
+        tables.append(archived.append_column("source", pa.array(["archive"] * archived.num_rows, pa.string())))
+
+    # 2. 운영 DB (읽기 복제본이 정상이면 복제본에서 조회)
+    read_engine = replica_router.engine_for_read()
+    query = _analysis_query()
+    if start is not None:
+        query = query.where(AnalysisRequest.created_at >= _db_datetime(start, read_engine))
+    if end is not None:
+        query = query.where(AnalysisRequest.created_at < _db_datetime(end, read_engine))
+    live_rows = []
+    with read_engine.connect() as conn:
+        for row in conn.execution_options(stream_results=True, yield_per=ARCHIVE_BATCH_SIZE).execute(query):
+            live_rows.extend(flatten_analysis(row))
+    live = pa.Table.from_pylist(live_rows, schema=schema)
+    tables.append(live.append_column("source", pa.array(["live"] * live.num_rows, pa.string())))
+
+    frame = pa.concat_tables(tables).to_pandas()
+    # 아카이브 후 삭제가 중간에 멈췄다 재실행된 경우 같은 행이 양쪽에 있을 수 있음
+    frame = frame.drop_duplicates(subset=["request_id", "detection_index"], keep="first")
+    if columns:
+        frame = frame[columns]
+    return frame.reset_index(drop=True)
+
+
+def _db_datetime(value: datetime, bind) -> datetime:
+    return value.replace(tzinfo=None) if bind.dialect.name == "sqlite" else value
+
+
+if __name__ == "__main__":
+    # 실행 (WeCanFarm_Server 디렉토리에서):
+    #   python -m app.database.archive --older-than-months 12
+    #   python -m app.database.archive --older-than-months 12 --keep   # 내보내기만 (원본 유지)
+    parser = argparse.ArgumentParser(description="오래된 분석 기록을 Parquet 아카이브로 이동")
+    parser.add_argument("--older-than-months", type=int, default=ARCHIVE_OLDER_THAN_MONTHS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--keep", action="store_true", help="검증 후에도 원본 행을 삭제하지 않음")
+    args = parser.parse_args()
+
+    archive_old_analyses(args.older_than_months, args.batch_size, not args.keep, args.archive_dir)
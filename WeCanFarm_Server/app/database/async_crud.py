@@ -0,0 +1,358 @@
+import asyncio
+from typing import Any, Optional, Tuple
+from sqlalchemy import select, update, tuple_, type_coerce, String
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from .models import (
+    User, UserRole, AnalysisRequest, AnalysisResult,
+    AnalysisType, RequestStatus, _get_write_behind
+)
+from .detections import insert_detections
+from .rollups import record_completion
+
+# models.py의 CRUD 클래스와 같은 인터페이스의 비동기 버전 (FastAPI 라우터 전용)
+# 관리자/시드 스크립트, Airflow 등 동기 코드는 기존 CRUD 클래스를 그대로 사용합니다.
+
+class AsyncUserCRUD:
+    """사용자 관련 비동기 CRUD 함수들"""
+
+    @staticmethod
+    async def get_by_email(db: AsyncSession, email: str):
+        """이메일로 사용자 조회"""
+        return await db.scalar(select(User).where(User.email == email).limit(1))
+
+    @staticmethod
+    async def get_by_username(db: AsyncSession, username: str):
+        """사용자명으로 사용자 조회"""
+        return await db.scalar(select(User).where(User.username == username).limit(1))
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, user_id: int):
+        """ID로 사용자 조회"""
+        return await db.get(User, user_id)
+
+    @staticmethod
+    async def create(db: AsyncSession, username: str, email: str, password_hash: str,
+                     full_name: str = None, role: UserRole = UserRole.USER):
+        """새 사용자 생성"""
+        db_user = User(
+            username=username,
+            email=email,
+            password=password_hash,
+            full_name=full_name,
+            role=role
+        )
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
+    @staticmethod
+    async def update_access(db: AsyncSession, user_id: int, role: UserRole = None, is_active: bool = None):
+        """역할/활성 상태 변경 (인증 사용자 캐시는 ORM 갱신 이벤트로 무효화)"""
+        user = await db.get(User, user_id)
+        if user:
+            if role is not None:
+                user.role = role
+            if is_active is not None:
+                user.is_active = is_active
+            await db.commit()
+        return user
+
+    @staticmethod
+    async def update_password_hash(db: AsyncSession, user: User, password_hash: str):
+        """비밀번호 해시 교체 (bcrypt 비용 변경 후 재해싱)"""
+        user.password = password_hash
+        await db.commit()
+        return user
+
+class AsyncAnalysisRequestCRUD:
+    """분석 요청 관련 비동기 CRUD 함수들"""
+
+    @staticmethod
+    async def create(db: AsyncSession, user_id: int, image_url: str,
+                     analysis_type: AnalysisType = AnalysisType.PIPELINE):
+        """분석 요청 생성"""
+        db_request = AnalysisRequest(
+            user_id=user_id,
+            image_url=image_url,
+            analysis_type=analysis_type
+        )
+        db.add(db_request)
+        await db.commit()
+        await db.refresh(db_request)
+        return db_request
+
+    @staticmethod
+    async def update_status(db: AsyncSession, request_id: int, status: RequestStatus,
+                            processing_time: int = None):
+        """요청 상태 업데이트"""
+        request = await db.get(AnalysisRequest, request_id)
+        if request:
+            request.status = status
+            if processing_time is not None:
+                request.processing_time = processing_time
+            await db.commit()
+        return request
+
+    @staticmethod
+    async def get_user_history(db: AsyncSession, user_id: int, limit: int = 10):
+        """사용자 분석 이력 조회"""
+        result = await db.scalars(
+            select(AnalysisRequest)
+            .where(AnalysisRequest.user_id == user_id)
+            .order_by(AnalysisRequest.created_at.desc())
+            .limit(limit)
+        )
+        return result.all()
+
+    @staticmethod
+    async def get_user_history_page(db: AsyncSession, user_id: int, limit: int = 20,
+                                    after: Optional[Tuple[Any, int]] = None):
+        """
+        사용자 분석 이력 키셋 페이지 조회 (created_at, id 내림차순)
+        - after: 이전 페이지 마지막 항목의 (정렬 키, 요청 ID)
+        - 결과 요약은 같은 쿼리에서 LEFT JOIN으로 함께 로드 (detection_data는 제외)
+        Returns:
+            [(AnalysisRequest, 정렬 키), ...]
+        """
+        sort_key = history_sort_key(db.bind.dialect.name)
+        query = (
+            select(AnalysisRequest, sort_key)
+            .options(
+                joinedload(AnalysisRequest.result).load_only(
+                    AnalysisResult.total_detections,
+                    AnalysisResult.result_image_url,
+                    AnalysisResult.processing_status
+                )
+            )
+            .where(AnalysisRequest.user_id == user_id)
+            .order_by(AnalysisRequest.created_at.desc(), AnalysisRequest.id.desc())
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(tuple_(sort_key, AnalysisRequest.id) < tuple_(*after))
+        return (await db.execute(query)).all()
+
+class AsyncAnalysisResultCRUD:
+    """분석 결과 관련 비동기 CRUD 함수들"""
+
+    @staticmethod
+    async def create(db: AsyncSession, request_id: int, total_detections: int, result_image_url: str,
+                     detection_data: dict, processing_status: str):
+        """분석 결과 생성"""
+        db_result = AnalysisResult(
+            request_id=request_id,
+            total_detections=total_detections,
+            result_image_url=result_image_url,
+            detection_data=detection_data,
+            processing_status=processing_status,
+            request_created_at=await db.scalar(
+                select(AnalysisRequest.created_at).where(AnalysisRequest.id == request_id)
+            )
+        )
+        db.add(db_result)
+        await db.commit()
+        await db.refresh(db_result)
+        return db_result
+
+    @staticmethod
+    async def get_by_request_id(db: AsyncSession, request_id: int):
+        """요청 ID로 결과 조회"""
+        return await db.scalar(
+            select(AnalysisResult).where(AnalysisResult.request_id == request_id).limit(1)
+        )
+
+class AsyncAnalysisUnitOfWork:
+    """AnalysisUnitOfWork의 비동기 버전 (요청당 1~2회 커밋, write-behind 지원)"""
+
+    @staticmethod
+    async def start(db: AsyncSession, user_id: int, image_url: str,
+                    analysis_type: AnalysisType = AnalysisType.PIPELINE) -> int:
+        """PROCESSING 상태로 요청 생성 - 요청 ID 반환"""
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            # ID 블록 예약은 가끔 동기 DB 조회가 필요하므로 스레드풀에서 실행
+            return await run_in_threadpool(write_behind.begin, user_id, image_url, analysis_type)
+
+        db_request = AnalysisRequest(
+            user_id=user_id,
+            image_url=image_url,
+            analysis_type=analysis_type,
+            status=RequestStatus.PROCESSING
+        )
+        try:
+            db.add(db_request)
+            await db.flush()
+            request_id = db_request.id
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return request_id
+
+    @staticmethod
+    async def complete(db: AsyncSession, request_id: int, total_detections: int, result_image_url: str,
+                       detection_data, processing_status: str, processing_time: int = None):
+        """결과 저장 + COMPLETED 전환을 한 번에 커밋 - 결과 ID 반환 (write-behind 사용 시 None)"""
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            await _finish_write_behind(write_behind, request_id, RequestStatus.COMPLETED, processing_time, {
+                "total_detections": total_detections,
+                "result_image_url": result_image_url,
+                "detection_data": detection_data,
+                "processing_status": processing_status
+            })
+            return None
+
+        db_result = AnalysisResult(
+            request_id=request_id,
+            total_detections=total_detections,
+            result_image_url=result_image_url,
+            detection_data=detection_data,
+            processing_status=processing_status
+        )
+        try:
+            created_at = await _set_status(db, request_id, RequestStatus.COMPLETED, processing_time)
+            db_result.request_created_at = created_at
+            db.add(db_result)
+            await db.flush()
+            result_id = db_result.id
+            await db.run_sync(insert_detections, detection_data, request_id, result_id,
+                              request_created_at=created_at)
+            await db.run_sync(record_completion, RequestStatus.COMPLETED, processing_time,
+                              detection_data, processing_status, created_at)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return result_id
+
+    @staticmethod
+    async def fail(db: AsyncSession, request_id: int, processing_time: int = None):
+        """FAILED 전환 (SELECT 없이 UPDATE 1회)"""
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            await _finish_write_behind(write_behind, request_id, RequestStatus.FAILED, processing_time)
+            return
+
+        try:
+            created_at = await _set_status(db, request_id, RequestStatus.FAILED, processing_time)
+            await db.run_sync(record_completion, RequestStatus.FAILED, processing_time, at=created_at)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    @staticmethod
+    async def cancel(db: AsyncSession, request_id: int, reason: str, processing_time: int = None):
+        """
+        FAILED 전환 + 취소 사유를 결과 행(processing_status)에 남김 (커밋 1회)
+        클라이언트 연결 종료/제한 시간 초과로 남은 단계를 건너뛴 요청용 - 감지 결과는 저장하지 않음
+        """
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            await _finish_write_behind(write_behind, request_id, RequestStatus.FAILED, processing_time, {
+                "total_detections": 0,
+                "result_image_url": None,
+                "detection_data": [],
+                "processing_status": reason
+            })
+            return
+
+        try:
+            created_at = await _set_status(db, request_id, RequestStatus.FAILED, processing_time)
+            db.add(AnalysisResult(
+                request_id=request_id,
+                total_detections=0,
+                detection_data=[],
+                processing_status=reason,
+                request_created_at=created_at
+            ))
+            await db.run_sync(record_completion, RequestStatus.FAILED, processing_time, [], reason, created_at)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    @staticmethod
+    async def record(db: AsyncSession, user_id: int, image_url: str, analysis_type: AnalysisType,
+                     total_detections: int, result_image_url: str, detection_data,
+                     processing_status: str, processing_time: int = None) -> int:
+        """요청 + 결과를 COMPLETED 상태로 한 트랜잭션에 저장 - 요청 ID 반환"""
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            request_id = await run_in_threadpool(write_behind.begin, user_id, image_url, analysis_type)
+            await _finish_write_behind(write_behind, request_id, RequestStatus.COMPLETED, processing_time, {
+                "total_detections": total_detections,
+                "result_image_url": result_image_url.format(request_id=request_id),
+                "detection_data": detection_data,
+                "processing_status": processing_status
+            })
+            return request_id
+
+        db_request = AnalysisRequest(
+            user_id=user_id,
+            image_url=image_url,
+            analysis_type=analysis_type,
+            status=RequestStatus.COMPLETED,
+            processing_time=processing_time
+        )
+        try:
+            db.add(db_request)
+            await db.flush()
+            request_id = db_request.id
+            db_result = AnalysisResult(
+                request_id=request_id,
+                total_detections=total_detections,
+                result_image_url=result_image_url.format(request_id=request_id),
+                detection_data=detection_data,
+                processing_status=processing_status,
+                # created_at은 flush 시 RETURNING으로 이미 채워짐 (추가 조회 없음)
+                request_created_at=db_request.created_at
+            )
+            db.add(db_result)
+            await db.flush()
+            await db.run_sync(insert_detections, detection_data, request_id, db_result.id,
+                              request_created_at=db_request.created_at)
+            await db.run_sync(record_completion, RequestStatus.COMPLETED, processing_time,
+                              detection_data, processing_status, db_request.created_at)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return request_id
+
+async def _set_status(db: AsyncSession, request_id: int, status: RequestStatus, processing_time: int = None):
+    """상태 UPDATE 1회 - 롤업 구간 계산용 created_at을 RETURNING으로 반환"""
+    values = {"status": status}
+    if processing_time is not None:
+        values["processing_time"] = processing_time
+    return (await db.execute(
+        update(AnalysisRequest)
+        .where(AnalysisRequest.id == request_id)
+        .values(**values)
+        .returning(AnalysisRequest.created_at)
+        .execution_options(synchronize_session=False)
+    )).scalar()
+
+async def _finish_write_behind(write_behind, request_id: int, status: RequestStatus,
+                               processing_time: int = None, result_row: dict = None):
+    """write-behind 큐에 넣고, durability=batch면 이벤트 루프를 막지 않고 커밋을 기다림"""
+    future = await run_in_threadpool(
+        write_behind.finish, request_id, status, processing_time, result_row, False
+    )
+    if write_behind.durability == "batch":
+        await asyncio.wrap_future(future)
+
+def history_sort_key(dialect: str):
+    """
+    이력 정렬/커서 비교용 created_at 표현식
+    SQLite는 DATETIME을 문자열로 저장하고 server_default(초 단위)와 Python 값(마이크로초)의 형식이 달라
+    datetime 파라미터와 비교하면 같은 시각이 어긋나므로, 저장된 문자열 그대로 정렬/비교합니다.
+    """
+    if dialect == "sqlite":
+        return type_coerce(AnalysisRequest.created_at, String).label("sort_key")
+    return AnalysisRequest.created_at.label("sort_key")
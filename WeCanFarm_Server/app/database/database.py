@@ -1,10 +1,12 @@
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from dotenv import load_dotenv
 
+from .pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, instrument_engine
+
 # 환경변수 로드 (.env 파일 경로 명시)
 current_file = os.path.abspath(__file__)  # database.py 파일 경로
 database_dir = os.path.dirname(current_file)  # database 디렉토리
@@ -31,15 +33,25 @@ if len(url_parts) == 2:
 else:
     print("🔗 데이터베이스 연결: [URL 확인됨]")
 
-# SQLAlchemy 엔진 생성
+# 커넥션 풀 설정 (용도별로 풀을 분리해 관리자 집계가 분석 저장 커넥션을 뺏지 않도록 함)
+ANALYSIS_POOL_SIZE = int(os.getenv("ANALYSIS_POOL_SIZE", "10"))        # 분석 저장/인증 (비동기 라우터)
+ANALYSIS_MAX_OVERFLOW = int(os.getenv("ANALYSIS_MAX_OVERFLOW", "20"))
+REPORTING_POOL_SIZE = int(os.getenv("REPORTING_POOL_SIZE", "3"))       # 관리자 통계/이력 조회 (복제본이 없을 때)
+REPORTING_MAX_OVERFLOW = int(os.getenv("REPORTING_MAX_OVERFLOW", "2"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))               # 커넥션 대기 최대 시간 (초)
+
+# SQLAlchemy 엔진 생성 (동기 - write-behind, 스크립트, Airflow 등)
 engine = create_engine(
     DATABASE_URL,
-    poolclass=QueuePool,
+    poolclass=InstrumentedQueuePool,
     pool_size=10,  # 연결 풀 크기
     max_overflow=20,  # 추가 연결 허용
+    pool_timeout=POOL_TIMEOUT,
     pool_pre_ping=True,  # 연결 상태 확인
+    pool_logging_name="sync",
     echo=False  # SQL 로그 출력 (개발시 True로 변경)
 )
+instrument_engine(engine, "sync")
 
 # 세션 팩토리
 SessionLocal = sessionmaker(
@@ -48,6 +60,101 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# 비동기 드라이버 URL (ASYNC_DATABASE_URL이 없으면 DATABASE_URL에서 변환)
+def to_async_url(url: str) -> str:
+    """동기 DB URL을 비동기 드라이버 URL로 변환 (PostgreSQL → asyncpg, SQLite → aiosqlite)"""
+    scheme, sep, rest = url.partition("://")
+    driver = scheme.split("+")[0]
+    if driver in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# 비동기 엔진 (FastAPI 라우터용 - 이벤트 루프를 막지 않음)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=ANALYSIS_POOL_SIZE,
+    max_overflow=ANALYSIS_MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_logging_name="analysis",
+    echo=False
+)
+instrument_engine(async_engine, "analysis")
+
+# 관리자/리포트 조회 전용 비동기 엔진 (같은 primary, 별도의 작은 풀)
+reporting_async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=REPORTING_POOL_SIZE,
+    max_overflow=REPORTING_MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_logging_name="reporting",
+    echo=False
+)
+instrument_engine(reporting_async_engine, "reporting")
+
+# 비동기 세션 팩토리 (커밋 후 속성 재조회 방지)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+ReportingSessionLocal = async_sessionmaker(
+    bind=reporting_async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# 읽기 전용 복제본 (선택) - 관리자 통계/이력/리포트 조회를 primary에서 분리
+# 설정하지 않으면 모든 조회가 primary로 갑니다 (replica.py 참고)
+READ_REPLICA_URL = os.getenv("READ_REPLICA_URL")
+ASYNC_READ_REPLICA_URL = os.getenv("ASYNC_READ_REPLICA_URL") or (
+    to_async_url(READ_REPLICA_URL) if READ_REPLICA_URL else None
+)
+
+read_engine = create_engine(
+    READ_REPLICA_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=5,
+    max_overflow=10,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_logging_name="replica_sync",
+    echo=False
+) if READ_REPLICA_URL else None
+
+read_async_engine = create_async_engine(
+    ASYNC_READ_REPLICA_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=5,
+    max_overflow=10,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_logging_name="replica",
+    echo=False
+) if ASYNC_READ_REPLICA_URL else None
+
+if read_engine is not None:
+    instrument_engine(read_engine, "replica_sync")
+if read_async_engine is not None:
+    instrument_engine(read_async_engine, "replica")
+
+ReadSessionLocal = async_sessionmaker(
+    bind=read_async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+) if read_async_engine is not None else None
+
 # Base 클래스 (모든 모델의 부모 클래스)
 Base = declarative_base()
 
@@ -63,6 +170,35 @@ def get_db():
     finally:
         db.close()
 
+# 의존성 주입용 비동기 DB 세션
+async def get_async_db():
+    """FastAPI 의존성 주입용 비동기 DB 세션"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            raise e
+
+# 긴 작업(모델 추론 등) 전에 커넥션 반납
+async def release_connection(db: AsyncSession):
+    """
+    진행 중인 트랜잭션을 끝내 커넥션을 풀에 돌려줌 (세션은 계속 사용 가능 - 다음 쿼리에서 다시 checkout)
+    expire_on_commit=False라 이미 로드한 객체(current_user 등)는 추가 조회 없이 그대로 사용
+    """
+    if db.in_transaction():
+        await db.commit()
+
+# 의존성 주입용 읽기 전용 비동기 DB 세션
+async def get_read_db():
+    """
+    조회 전용 라우터용 비동기 DB 세션
+    복제본이 정상이고 지연이 REPLICA_MAX_LAG_SECONDS 이내면 복제본, 아니면 primary(reporting 풀) 세션
+    """
+    from .replica import replica_router
+    async with replica_router.session() as db:
+        yield db
+
 # 데이터베이스 연결 테스트
 def test_connection():
     """데이터베이스 연결 테스트"""
@@ -83,13 +219,55 @@ def test_connection():
 def create_tables():
     """데이터베이스 테이블 생성"""
     try:
+        # ANALYSIS_PARTITIONING=true(PostgreSQL)면 분석 테이블을 월 단위 파티션 테이블로 먼저 생성
+        from .partitioning import partitioning_enabled, create_partitioned_tables
+        if partitioning_enabled():
+            create_partitioned_tables()
         Base.metadata.create_all(bind=engine)
         print("✅ 데이터베이스 테이블 생성 완료")
+        ensure_columns()
+        ensure_indexes()
         return True
     except Exception as e:
         print(f"❌ 테이블 생성 실패: {e}")
         return False
 
+# 컬럼 보강 (기존 테이블에는 create_all이 새 컬럼을 추가하지 않음)
+def ensure_columns():
+    """모델에 추가된 NULL 허용 컬럼 중 DB에 없는 것만 ALTER TABLE ... ADD COLUMN"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                print(f"✅ 컬럼 추가: {table.name}.{column.name}")
+            except Exception as e:
+                print(f"⚠️ 컬럼 추가 실패 ({table.name}.{column.name}): {e}")
+
+# 인덱스 보강 (기존 테이블에는 create_all이 새 인덱스를 만들지 않음)
+def ensure_indexes():
+    """모델에 정의된 인덱스 중 DB에 없는 것만 생성"""
+    from .partitioning import partitioned_table_names
+    partitioned = partitioned_table_names()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            # 파티션 테이블의 UNIQUE 인덱스는 파티션 키(created_at)를 포함해야 하므로 건너뜀
+            if index.unique and table.name in partitioned:
+                continue
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # 예: 중복 데이터 때문에 UNIQUE 인덱스를 만들 수 없는 경우
+                print(f"⚠️ 인덱스 생성 실패 ({index.name}): {e}")
+
 # 테이블 삭제 (개발용)
 def drop_tables():
     """모든 테이블 삭제 (주의: 데이터 손실)"""
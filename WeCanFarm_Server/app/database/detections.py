@@ -0,0 +1,163 @@
+import argparse
+import os
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, insert, exists
+
+from .database import engine
+from .models import Crop, Disease, AnalysisRequest, AnalysisResult, Detection
+
+# 분석 결과의 한국어 질병 상태 → diseases.name (model_manager의 korean_labels 역매핑)
+DISEASE_NAME_BY_STATUS = {
+    "정상": "normal_0",
+    "고추점무늬병": "BacterialSpot_4",
+    "고추마일드모틀바이러스": "PMMoV_3"
+}
+
+STATUS_BY_DISEASE_NAME = {name: status for status, name in DISEASE_NAME_BY_STATUS.items()}
+
+BACKFILL_BATCH_SIZE = int(os.getenv("DETECTION_BACKFILL_BATCH_SIZE", "500"))
+
+
+class DetectionCatalog:
+    """작물/질병 이름 → ID 캐시 (감지 행 변환 시 매번 조회하지 않도록 최초 1회만 로드)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._crop_ids: Optional[Dict[str, int]] = None
+        self._disease_ids: Dict[str, int] = {}
+
+    def load(self, conn):
+        """Connection 또는 Session으로 작물/질병 테이블을 읽어 캐시"""
+        with self._lock:
+            if self._crop_ids:  # 아직 시드 데이터가 없으면 다음 호출에서 다시 조회
+                return
+            disease_ids = {name: disease_id for disease_id, name in conn.execute(select(Disease.id, Disease.name))}
+            self._disease_ids = disease_ids
+            self._crop_ids = {name: crop_id for crop_id, name in conn.execute(select(Crop.id, Crop.name))}
+
+    def crop_names(self) -> List[str]:
+        """작물 이름 목록 (ID 순)"""
+        crop_ids = self._crop_ids or {}
+        return sorted(crop_ids, key=crop_ids.get)
+
+    def disease_names(self) -> List[str]:
+        """질병 이름 목록 (ID 순)"""
+        return sorted(self._disease_ids, key=self._disease_ids.get)
+
+    def invalidate(self):
+        """작물/질병 데이터가 바뀌었을 때 다음 호출에서 다시 로드"""
+        with self._lock:
+            self._crop_ids = None
+            self._disease_ids = {}
+
+    def rows(self, detection_data, request_id: int, result_id: int, created_at=None,
+             request_created_at=None) -> List[dict]:
+        """
+        detection_data(JSON 리스트)를 detections 테이블 행 리스트로 변환 (load() 이후 호출)
+        - request_created_at: 요청의 created_at (파티션 키, 생략하면 created_at과 같은 값)
+        """
+        if not isinstance(detection_data, list):
+            return []
+
+        crop_ids = self._crop_ids or {}
+        rows = []
+        for detection in detection_data:
+            if not isinstance(detection, dict):
+                continue
+            bbox = detection.get("bbox")
+            if not (isinstance(bbox, (list, tuple)) and len(bbox) == 4):
+                bbox = (None, None, None, None)
+            disease_name = DISEASE_NAME_BY_STATUS.get(detection.get("disease_status"))
+
+            row = {
+                "request_id": request_id,
+                "result_id": result_id,
+                "crop_id": crop_ids.get(detection.get("crop_type")),
+                "disease_id": self._disease_ids.get(disease_name),
+                "bbox_x1": _to_int(bbox[0]),
+                "bbox_y1": _to_int(bbox[1]),
+                "bbox_x2": _to_int(bbox[2]),
+                "bbox_y2": _to_int(bbox[3]),
+                "yolo_confidence": detection.get("yolo_confidence"),
+                # 단일 분석은 질병 분류 신뢰도만 "confidence"로 저장되어 있음
+                "disease_confidence": detection.get("disease_confidence", detection.get("confidence"))
+            }
+            if created_at is not None:
+                row["created_at"] = created_at
+            if request_created_at is not None or created_at is not None:
+                row["request_created_at"] = request_created_at if request_created_at is not None else created_at
+            rows.append(row)
+        return rows
+
+
+def _to_int(value):
+    return None if value is None else int(value)
+
+
+def insert_detections(conn, detection_data, request_id: int, result_id: int, created_at=None,
+                      request_created_at=None) -> int:
+    """감지 결과를 다건 INSERT 1회로 저장 (결과 행과 같은 트랜잭션에서 호출) - 저장한 행 수 반환"""
+    detection_catalog.load(conn)
+    rows = detection_catalog.rows(detection_data, request_id, result_id, created_at, request_created_at)
+    if rows:
+        conn.execute(insert(Detection.__table__), rows)
+    return len(rows)
+
+
+def backfill_detections(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    기존 analysis_results.detection_data를 detections 테이블로 이전
+    - 결과 ID 순으로 batch_size건씩 읽어 배치마다 커밋 (긴 트랜잭션/메모리 사용 방지)
+    - 이미 감지 행이 있는 결과는 건너뛰므로 중단 후 재실행해도 안전
+    """
+    print(f"🔄 detections 백필 시작 (배치 크기: {batch_size})")
+    last_id = 0
+    total_results = 0
+    total_rows = 0
+
+    while True:
+        with engine.begin() as conn:
+            detection_catalog.load(conn)
+            batch = conn.execute(
+                select(
+                    AnalysisResult.id,
+                    AnalysisResult.request_id,
+                    AnalysisResult.detection_data,
+                    AnalysisRequest.created_at
+                )
+                .join(AnalysisRequest, AnalysisRequest.id == AnalysisResult.request_id)
+                .where(AnalysisResult.id > last_id)
+                .where(~exists().where(Detection.result_id == AnalysisResult.id))
+                .order_by(AnalysisResult.id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                break
+
+            rows = []
+            for result_id, request_id, detection_data, created_at in batch:
+                rows.extend(detection_catalog.rows(detection_data, request_id, result_id, created_at))
+            if rows:
+                conn.execute(insert(Detection.__table__), rows)
+
+        last_id = batch[-1].id
+        total_results += len(batch)
+        total_rows += len(rows)
+        print(f"  ✅ 결과 {total_results}건 처리, 감지 {total_rows}건 저장 (마지막 결과 ID: {last_id})")
+
+    print(f"✅ detections 백필 완료: 결과 {total_results}건 → 감지 {total_rows}건")
+    return total_rows
+
+
+# 전역 카탈로그 인스턴스
+detection_catalog = DetectionCatalog()
+
+
+if __name__ == "__main__":
+    # 실행: python -m app.database.detections --batch-size 500 (WeCanFarm_Server 디렉토리에서)
+    parser = argparse.ArgumentParser(description="detection_data JSON → detections 테이블 백필")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    args = parser.parse_args()
+    backfill_detections(args.batch_size)
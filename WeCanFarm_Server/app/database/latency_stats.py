@@ -0,0 +1,207 @@
+# app/database/latency_stats.py
+"""
+관리자 대시보드용 처리 시간/처리량 지표
+- 처리 시간 p50/p90/p99 (분석 유형별, 일별): PostgreSQL은 percentile_cont로 DB에서 정확히 계산,
+  SQLite는 id 간격 표본(최대 ADMIN_LATENCY_SAMPLE_SIZE건)을 가져와 같은 방식(선형 보간)으로 계산
+- 최근 24시간 분당 요청 수: 분 단위 GROUP BY 1회 (빈 분은 0으로 채움)
+- 실패율 추이: 통계 롤업의 시간/일 단위 상태별 요청 수에서 계산 (원본 조회 없음)
+"""
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import AnalysisRequest, RequestStatus
+from .rollups import to_utc_naive, HOUR, DAY
+
+# 처리 시간 백분위를 계산할 기간 (일, 오늘 포함)
+ADMIN_LATENCY_DAYS = int(os.getenv("ADMIN_LATENCY_DAYS", "7"))
+# SQLite 표본 크기 상한 (PostgreSQL은 전체 행으로 계산)
+ADMIN_LATENCY_SAMPLE_SIZE = int(os.getenv("ADMIN_LATENCY_SAMPLE_SIZE", "20000"))
+
+PERCENTILES = (0.5, 0.9, 0.99)
+THROUGHPUT_MINUTES = 24 * 60
+
+
+def _percentile(values: List[int], q: float) -> float:
+    """정렬된 values의 q 백분위 (percentile_cont와 같은 선형 보간)"""
+    position = (len(values) - 1) * q
+    lower, upper = math.floor(position), math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _summary(count: int, percentiles: Iterable[Optional[float]]) -> Dict[str, object]:
+    p50, p90, p99 = (round(value) if value is not None else None for value in percentiles)
+    return {"count": count, "p50_ms": p50, "p90_ms": p90, "p99_ms": p99}
+
+
+def _utc_trunc(unit: str, column):
+    """PostgreSQL date_trunc(unit, UTC 시각) - 인자를 리터럴로 (바인드 파라미터면 SELECT와 GROUP BY가 다른 식으로 취급됨)"""
+    return func.date_trunc(literal_column(f"'{unit}'"), func.timezone(literal_column("'UTC'"), column))
+
+
+def _db_datetime(value: datetime, dialect: str) -> datetime:
+    return value.replace(tzinfo=None) if dialect == "sqlite" else value
+
+
+async def latency_percentiles(db: AsyncSession, now: Optional[datetime] = None,
+                              days: int = ADMIN_LATENCY_DAYS) -> Dict[str, object]:
+    """최근 days일 처리 시간 백분위 (분석 유형별 + UTC 일별)"""
+    dialect = db.bind.dialect.name
+    today = to_utc_naive(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    since = today - timedelta(days=days - 1)
+    window = (
+        AnalysisRequest.created_at >= _db_datetime(since.replace(tzinfo=timezone.utc), dialect),
+        AnalysisRequest.processing_time.isnot(None),
+    )
+
+    if dialect == "postgresql":
+        by_type, by_day, sample_step = await _percentiles_sql(db, window)
+    else:
+        by_type, by_day, sample_step = await _percentiles_sampled(db, window)
+
+    # 요청이 없던 날도 빈 행으로 표시 (그래프 x축이 끊기지 않도록)
+    days_list = [since + timedelta(days=offset) for offset in range(days)]
+    return {
+        "days": days,
+        "sampled": sample_step > 1,
+        "sample_step": sample_step,
+        "by_type": by_type,
+        "by_day": [
+            {"date": day.strftime("%Y-%m-%d"), **by_day.get(day, _summary(0, (None, None, None)))}
+            for day in days_list
+        ],
+    }
+
+
+async def _percentiles_sql(db: AsyncSession, window) -> Tuple[dict, dict, int]:
+    """PostgreSQL: percentile_cont ... WITHIN GROUP으로 정확한 백분위"""
+    percentiles = [
+        func.percentile_cont(q).within_group(AnalysisRequest.processing_time.asc()) for q in PERCENTILES
+    ]
+    type_rows = (await db.execute(
+        select(AnalysisRequest.analysis_type, func.count(), *percentiles)
+        .where(*window)
+        .group_by(AnalysisRequest.analysis_type)
+    )).all()
+
+    day = _utc_trunc("day", AnalysisRequest.created_at).label("day")
+    day_rows = (await db.execute(
+        select(day, func.count(), *percentiles).where(*window).group_by(day)
+    )).all()
+
+    by_type = {
+        analysis_type.value: _summary(count, values)
+        for analysis_type, count, *values in type_rows if analysis_type is not None
+    }
+    by_day = {to_utc_naive(bucket): _summary(count, values) for bucket, count, *values in day_rows}
+    return by_type, by_day, 1
+
+
+async def _percentiles_sampled(db: AsyncSession, window) -> Tuple[dict, dict, int]:
+    """
+    SQLite: 백분위 함수가 없으므로 id가 step의 배수인 행만 가져와 계산
+    (id는 시간 순으로 증가하므로 기간 전체에 고르게 퍼진 표본)
+    """
+    total = (await db.execute(select(func.count()).select_from(AnalysisRequest).where(*window))).scalar() or 0
+    step = max(1, math.ceil(total / max(1, ADMIN_LATENCY_SAMPLE_SIZE)))
+    query = select(AnalysisRequest.analysis_type, AnalysisRequest.created_at, AnalysisRequest.processing_time)
+    query = query.where(*window)
+    if step > 1:
+        query = query.where(AnalysisRequest.id % step == 0)
+
+    types: Dict[str, List[int]] = {}
+    days: Dict[datetime, List[int]] = {}
+    for analysis_type, created_at, processing_time in (await db.execute(query)).all():
+        if analysis_type is not None:
+            types.setdefault(analysis_type.value, []).append(processing_time)
+        bucket = to_utc_naive(created_at).replace(hour=0, minute=0, second=0, microsecond=0)
+        days.setdefault(bucket, []).append(processing_time)
+
+    def summarize(values: List[int]) -> Dict[str, object]:
+        values.sort()
+        return _summary(len(values), (_percentile(values, q) for q in PERCENTILES))
+
+    return ({name: summarize(values) for name, values in types.items()},
+            {bucket: summarize(values) for bucket, values in days.items()}, step)
+
+
+async def requests_per_minute(db: AsyncSession, now: Optional[datetime] = None,
+                              minutes: int = THROUGHPUT_MINUTES) -> Dict[str, object]:
+    """최근 minutes분(기본 24시간) 분당 요청 수와 실패 수 - 빈 분은 0"""
+    dialect = db.bind.dialect.name
+    end = to_utc_naive(now).replace(second=0, microsecond=0)
+    start = end - timedelta(minutes=minutes - 1)
+
+    if dialect == "postgresql":
+        minute = _utc_trunc("minute", AnalysisRequest.created_at)
+    else:
+        minute = func.strftime("%Y-%m-%d %H:%M", AnalysisRequest.created_at)
+    minute = minute.label("minute")
+    rows = (await db.execute(
+        select(minute, func.count(), func.count().filter(AnalysisRequest.status == RequestStatus.FAILED))
+        .where(AnalysisRequest.created_at >= _db_datetime(start.replace(tzinfo=timezone.utc), dialect))
+        .group_by(minute)
+    )).all()
+
+    requests, failed = [0] * minutes, [0] * minutes
+    for bucket, count, failures in rows:
+        if isinstance(bucket, str):
+            bucket = datetime.strptime(bucket, "%Y-%m-%d %H:%M")
+        index = int((to_utc_naive(bucket) - start).total_seconds() // 60)
+        if 0 <= index < minutes:
+            requests[index] += count
+            failed[index] += failures
+
+    total = sum(requests)
+    return {
+        "start": start.strftime("%Y-%m-%d %H:%M"),
+        "step_seconds": 60,
+        "requests": requests,
+        "failed": failed,
+        "total": total,
+        "avg_per_minute": round(total / minutes, 2),
+        "peak_per_minute": max(requests, default=0),
+    }
+
+
+def failure_rate_series(rollup_rows, now: Optional[datetime] = None, hours: int = 24,
+                        days: int = 30) -> Dict[str, List[dict]]:
+    """
+    롤업 (granularity, bucket_start, dimension=상태, count) 행에서 시간/일별 실패율
+    - 실패율 = FAILED / (COMPLETED + FAILED), 완료된 요청이 없는 구간은 None
+    """
+    now = to_utc_naive(now)
+    hour_end = now.replace(minute=0, second=0, microsecond=0)
+    day_end = hour_end.replace(hour=0)
+    buckets = {
+        HOUR: [hour_end - timedelta(hours=offset) for offset in range(hours - 1, -1, -1)],
+        DAY: [day_end - timedelta(days=offset) for offset in range(days - 1, -1, -1)],
+    }
+    counts: Dict[Tuple[str, datetime], List[int]] = {}
+    for granularity, bucket_start, dimension, count in rollup_rows:
+        if granularity not in buckets:
+            continue
+        entry = counts.setdefault((granularity, bucket_start), [0, 0])  # [완료, 실패]
+        if dimension == RequestStatus.COMPLETED.value:
+            entry[0] += count
+        elif dimension == RequestStatus.FAILED.value:
+            entry[1] += count
+
+    def series(granularity: str, fmt: str) -> List[dict]:
+        points = []
+        for bucket in buckets[granularity]:
+            completed, failed = counts.get((granularity, bucket), (0, 0))
+            finished = completed + failed
+            points.append({
+                "bucket": bucket.strftime(fmt),
+                "finished": finished,
+                "failed": failed,
+                "failure_rate": round(failed / finished * 100, 1) if finished else None,
+            })
+        return points
+
+    return {"hourly": series(HOUR, "%Y-%m-%d %H:00"), "daily": series(DAY, "%Y-%m-%d")}
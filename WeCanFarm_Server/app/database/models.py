@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, Enum, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, Enum, ForeignKey, JSON, Float, Index, update
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 import enum
 
+# BIGINT 기본키 (SQLite는 INTEGER PRIMARY KEY만 자동 증가하므로 로컬/테스트용으로 변환)
+BigIntegerPK = BigInteger().with_variant(Integer, "sqlite")
+
 # Enum 클래스 정의
 class UserRole(enum.Enum):
     USER = "USER"
@@ -24,7 +27,7 @@ class RequestStatus(enum.Enum):
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(100), unique=True, nullable=False, index=True)
     password = Column(String(255), nullable=False)  # 해시된 비밀번호
@@ -72,7 +75,7 @@ class Disease(Base):
 class AnalysisRequest(Base):
     __tablename__ = "analysis_requests"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     image_url = Column(String(500), nullable=False)
     analysis_type = Column(Enum(AnalysisType), default=AnalysisType.PIPELINE)
@@ -84,6 +87,14 @@ class AnalysisRequest(Base):
     user = relationship("User", back_populates="analysis_requests")
     result = relationship("AnalysisResult", back_populates="request", uselist=False, cascade="all, delete-orphan")
     
+    # 사용자별 이력 키셋 페이지네이션 (user_id, created_at, id) - PostgreSQL은 요약 컬럼까지 포함(커버링)
+    __table_args__ = (
+        Index(
+            "ix_analysis_requests_user_created", "user_id", "created_at", "id",
+            postgresql_include=["status", "analysis_type", "processing_time"]
+        ),
+    )
+    
     def __repr__(self):
         return f"<AnalysisRequest(id={self.id}, user_id={self.user_id}, status='{self.status.value}')>"
 
@@ -91,20 +102,67 @@ class AnalysisRequest(Base):
 class AnalysisResult(Base):
     __tablename__ = "analysis_results"
     
-    id = Column(BigInteger, primary_key=True, index=True)
-    request_id = Column(BigInteger, ForeignKey("analysis_requests.id", ondelete="CASCADE"), nullable=False)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
+    request_id = Column(BigInteger, ForeignKey("analysis_requests.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
     total_detections = Column(Integer, default=0)
     result_image_url = Column(String(500))
     detection_data = Column(JSON)  # PostgreSQL JSON 필드 - 모든 감지 결과 저장
     processing_status = Column(String(100))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 요청의 created_at - 파티션 배포에서는 파티션 키이자 요청 외래키의 일부 (요청과 같은 월 파티션에 저장)
+    request_created_at = Column(DateTime(timezone=True))
     
     # 관계 설정
     request = relationship("AnalysisRequest", back_populates="result")
+    detections = relationship("Detection", back_populates="result", passive_deletes=True)
     
     def __repr__(self):
         return f"<AnalysisResult(id={self.id}, request_id={self.request_id}, total_detections={self.total_detections})>"
 
+# 감지 결과 모델 (detection_data JSON을 감지 1건당 1행으로 정규화)
+class Detection(Base):
+    __tablename__ = "detections"
+    
+    id = Column(BigIntegerPK, primary_key=True)
+    request_id = Column(BigInteger, ForeignKey("analysis_requests.id", ondelete="CASCADE"), nullable=False, index=True)
+    result_id = Column(BigInteger, ForeignKey("analysis_results.id", ondelete="CASCADE"), nullable=False, index=True)
+    crop_id = Column(Integer, ForeignKey("crops.id"))        # 알 수 없는 작물이면 NULL
+    disease_id = Column(Integer, ForeignKey("diseases.id"))  # 알 수 없음/추론 실패면 NULL
+    bbox_x1 = Column(Integer)  # 단일 분석은 bbox 없음
+    bbox_y1 = Column(Integer)
+    bbox_x2 = Column(Integer)
+    bbox_y2 = Column(Integer)
+    yolo_confidence = Column(Float)
+    disease_confidence = Column(Float)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    request_created_at = Column(DateTime(timezone=True))  # 요청의 created_at (AnalysisResult와 같음)
+    
+    # 관계 설정
+    result = relationship("AnalysisResult", back_populates="detections")
+    
+    # 작물/질병별 기간 집계용 인덱스
+    __table_args__ = (
+        Index("ix_detections_crop_created", "crop_id", "created_at"),
+        Index("ix_detections_disease_created", "disease_id", "created_at"),
+        Index("ix_detections_created_at", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<Detection(id={self.id}, result_id={self.result_id}, crop_id={self.crop_id}, disease_id={self.disease_id})>"
+
+# 통계 롤업 모델 (대시보드가 원본 테이블 대신 읽는 시간 구간별 누적 카운트)
+class StatsRollup(Base):
+    __tablename__ = "stats_rollups"
+    
+    granularity = Column(String(8), primary_key=True)   # hour, day, all(전체 누적)
+    bucket_start = Column(DateTime, primary_key=True)   # 구간 시작 시각 (UTC, naive)
+    metric = Column(String(32), primary_key=True)       # requests, detections_crop, detections_disease, processing_ms
+    dimension = Column(String(100), primary_key=True)   # 상태값, 작물명, 질병 상태, 처리 시간 구간 상한
+    count = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<StatsRollup({self.granularity} {self.bucket_start} {self.metric}/{self.dimension}={self.count})>"
+
 # 모델 헬퍼 함수들
 class UserCRUD:
     """사용자 관련 CRUD 함수들"""
@@ -139,6 +197,18 @@ class UserCRUD:
         db.refresh(db_user)
         return db_user
     
+    @staticmethod
+    def update_access(db, user_id: int, role: UserRole = None, is_active: bool = None):
+        """역할/활성 상태 변경 (인증 사용자 캐시는 ORM 갱신 이벤트로 무효화)"""
+        user = db.query(User).filter(User.id == user_id).first()
+        if user:
+            if role is not None:
+                user.role = role
+            if is_active is not None:
+                user.is_active = is_active
+            db.commit()
+        return user
+    
     @staticmethod
     def update_last_login(db, user_id: int):
         """마지막 로그인 시간 업데이트"""
@@ -238,7 +308,8 @@ class AnalysisResultCRUD:
             total_detections=total_detections,
             result_image_url=result_image_url,
             detection_data=detection_data,
-            processing_status=processing_status
+            processing_status=processing_status,
+            request_created_at=db.query(AnalysisRequest.created_at).filter(AnalysisRequest.id == request_id).scalar()
         )
         db.add(db_result)
         db.commit()
@@ -248,4 +319,171 @@ class AnalysisResultCRUD:
     @staticmethod
     def get_by_request_id(db, request_id: int):
         """요청 ID로 결과 조회"""
-        return db.query(AnalysisResult).filter(AnalysisResult.request_id == request_id).first()
\ No newline at end of file
+        return db.query(AnalysisResult).filter(AnalysisResult.request_id == request_id).first()
+
+class AnalysisUnitOfWork:
+    """분석 요청/결과를 최소 커밋으로 저장 (재조회 없이 요청당 1~2회 커밋)
+    
+    - record(): 요청 + 결과를 최종 상태로 한 트랜잭션에 저장
+    - start() → complete()/fail(): PROCESSING 표시가 필요할 때 커밋 2회
+    감지 결과는 결과 행과 같은 트랜잭션에서 detections 테이블에 다건 INSERT로 함께 저장하고,
+    최종 상태가 되는 시점에 통계 롤업(stats_rollups)도 같은 트랜잭션에서 갱신합니다.
+    ANALYSIS_WRITE_BEHIND=true면 (PostgreSQL 전용) DB에 바로 쓰지 않고 write-behind 큐로 모아 다건 INSERT합니다
+    (요청 ID는 미리 예약한 블록에서 발급, PROCESSING 중간 상태는 기록하지 않음).
+    관리자/시드 스크립트는 기존 CRUD 클래스를 그대로 사용합니다.
+    """
+    
+    @staticmethod
+    def start(db, user_id: int, image_url: str, analysis_type: AnalysisType = AnalysisType.PIPELINE) -> int:
+        """PROCESSING 상태로 요청 생성 - 요청 ID 반환"""
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            return write_behind.begin(user_id, image_url, analysis_type)
+        
+        db_request = AnalysisRequest(
+            user_id=user_id,
+            image_url=image_url,
+            analysis_type=analysis_type,
+            status=RequestStatus.PROCESSING
+        )
+        try:
+            db.add(db_request)
+            db.flush()
+            request_id = db_request.id  # 커밋 후 접근하면 만료된 속성 재조회가 발생
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return request_id
+    
+    @staticmethod
+    def complete(db, request_id: int, total_detections: int, result_image_url: str,
+                 detection_data, processing_status: str, processing_time: int = None) -> int:
+        """결과 저장 + COMPLETED 전환을 한 번에 커밋 - 결과 ID 반환 (write-behind 사용 시 None)"""
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            write_behind.finish(request_id, RequestStatus.COMPLETED, processing_time, {
+                "total_detections": total_detections,
+                "result_image_url": result_image_url,
+                "detection_data": detection_data,
+                "processing_status": processing_status
+            }, wait=True)
+            return None
+        
+        db_result = AnalysisResult(
+            request_id=request_id,
+            total_detections=total_detections,
+            result_image_url=result_image_url,
+            detection_data=detection_data,
+            processing_status=processing_status
+        )
+        try:
+            created_at = AnalysisUnitOfWork._set_status(db, request_id, RequestStatus.COMPLETED, processing_time)
+            db_result.request_created_at = created_at
+            db.add(db_result)
+            db.flush()
+            result_id = db_result.id
+            _insert_detections(db, detection_data, request_id, result_id, created_at)
+            _record_rollups(db, RequestStatus.COMPLETED, processing_time, detection_data, processing_status,
+                            created_at)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return result_id
+    
+    @staticmethod
+    def fail(db, request_id: int, processing_time: int = None):
+        """FAILED 전환 (SELECT 없이 UPDATE 1회)"""
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            write_behind.finish(request_id, RequestStatus.FAILED, processing_time, wait=True)
+            return
+        
+        try:
+            created_at = AnalysisUnitOfWork._set_status(db, request_id, RequestStatus.FAILED, processing_time)
+            _record_rollups(db, RequestStatus.FAILED, processing_time, at=created_at)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    
+    @staticmethod
+    def record(db, user_id: int, image_url: str, analysis_type: AnalysisType,
+               total_detections: int, result_image_url: str, detection_data,
+               processing_status: str, processing_time: int = None) -> int:
+        """요청 + 결과를 COMPLETED 상태로 한 트랜잭션에 저장 - 요청 ID 반환
+        
+        result_image_url의 "{request_id}"는 발급된 요청 ID로 치환됩니다.
+        """
+        write_behind = _get_write_behind()
+        if write_behind is not None:
+            request_id = write_behind.begin(user_id, image_url, analysis_type)
+            write_behind.finish(request_id, RequestStatus.COMPLETED, processing_time, {
+                "total_detections": total_detections,
+                "result_image_url": result_image_url.format(request_id=request_id),
+                "detection_data": detection_data,
+                "processing_status": processing_status
+            }, wait=True)
+            return request_id
+        
+        db_request = AnalysisRequest(
+            user_id=user_id,
+            image_url=image_url,
+            analysis_type=analysis_type,
+            status=RequestStatus.COMPLETED,
+            processing_time=processing_time
+        )
+        try:
+            db.add(db_request)
+            db.flush()
+            request_id = db_request.id
+            db_result = AnalysisResult(
+                request_id=request_id,
+                total_detections=total_detections,
+                result_image_url=result_image_url.format(request_id=request_id),
+                detection_data=detection_data,
+                processing_status=processing_status,
+                # created_at은 flush 시 RETURNING으로 이미 채워짐 (추가 조회 없음)
+                request_created_at=db_request.created_at
+            )
+            db.add(db_result)
+            db.flush()
+            _insert_detections(db, detection_data, request_id, db_result.id, db_request.created_at)
+            _record_rollups(db, RequestStatus.COMPLETED, processing_time, detection_data, processing_status,
+                            db_request.created_at)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return request_id
+    
+    @staticmethod
+    def _set_status(db, request_id: int, status: RequestStatus, processing_time: int = None):
+        """상태 UPDATE 1회 - 롤업 구간 계산용 created_at을 RETURNING으로 반환"""
+        values = {AnalysisRequest.status: status}
+        if processing_time is not None:
+            values[AnalysisRequest.processing_time] = processing_time
+        return db.execute(
+            update(AnalysisRequest)
+            .where(AnalysisRequest.id == request_id)
+            .values(values)
+            .returning(AnalysisRequest.created_at)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+
+def _get_write_behind():
+    """write-behind가 켜져 있으면 전역 인스턴스 반환 (순환 import 방지를 위해 지연 import)"""
+    from .write_behind import write_behind
+    return write_behind if write_behind.enabled else None
+
+def _insert_detections(db, detection_data, request_id: int, result_id: int, request_created_at=None):
+    """결과 행과 같은 트랜잭션에 감지 행 저장 (순환 import 방지를 위해 지연 import)"""
+    from .detections import insert_detections
+    insert_detections(db, detection_data, request_id, result_id, request_created_at=request_created_at)
+
+def _record_rollups(db, status: RequestStatus, processing_time: int = None,
+                    detection_data=None, processing_status: str = None, at=None):
+    """같은 트랜잭션에서 통계 롤업 갱신 (순환 import 방지를 위해 지연 import)"""
+    from .rollups import record_completion
+    record_completion(db, status, processing_time, detection_data, processing_status, at)
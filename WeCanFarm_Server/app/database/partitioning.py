@@ -0,0 +1,292 @@
+import argparse
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Set
+
+from sqlalchemy import text, select, delete
+
+from .database import engine, Base
+from .models import AnalysisRequest, AnalysisResult, Detection
+from .rollups import record_purge_watermark
+
+# 월 단위 파티셔닝/보존 설정 (환경 변수로 조정)
+# PostgreSQL 전용, 테이블을 처음 만들 때만 적용 (기존 일반 테이블은 변환하지 않음)
+ANALYSIS_PARTITIONING = os.getenv("ANALYSIS_PARTITIONING", "false").lower() in ("1", "true", "yes")
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))       # 이번 달 이후 미리 만들 파티션 수
+ANALYSIS_RETENTION_MONTHS = int(os.getenv("ANALYSIS_RETENTION_MONTHS", "0"))     # 0이면 보존 기간 제한 없음
+PARTITION_RETENTION_MODE = os.getenv("PARTITION_RETENTION_MODE", "detach").lower()  # detach: 분리만, drop: 삭제
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))                    # 일반 테이블 삭제 1회당 요청 수
+PURGE_SLEEP_MS = int(os.getenv("PURGE_SLEEP_MS", "100"))                         # 배치 사이 대기 (다른 트랜잭션 양보)
+
+# 자식 → 부모 순서 (보존 정책 적용 순서)
+PARTITIONED_TABLES = ("detections", "analysis_results", "analysis_requests")
+
+# 파티션 키가 기본키/UNIQUE에 포함되어야 하므로 모델 정의(models.py)와 같은 컬럼으로 직접 DDL을 작성합니다.
+# 결과/감지 행은 자기 created_at이 아니라 요청의 created_at(request_created_at)으로 파티셔닝해
+# 한 요청의 요청/결과/감지 행이 항상 같은 월 파티션에 들어가고, 보존 정책도 같은 달 단위로 함께 적용됩니다.
+# 외래키는 (request_id, request_created_at) → analysis_requests (id, created_at) 복합키로 연결합니다
+# (사용자/요청 삭제 시 결과/감지까지 CASCADE). ORM 매핑/관계는 그대로 사용합니다.
+_PARTITIONED_DDL = {
+    "analysis_requests": """
+        CREATE TABLE IF NOT EXISTS analysis_requests (
+            id BIGSERIAL NOT NULL,
+            user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            image_url VARCHAR(500) NOT NULL,
+            analysis_type analysistype,
+            status requeststatus,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            processing_time INTEGER,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """,
+    "analysis_results": """
+        CREATE TABLE IF NOT EXISTS analysis_results (
+            id BIGSERIAL NOT NULL,
+            request_id BIGINT NOT NULL,
+            total_detections INTEGER,
+            result_image_url VARCHAR(500),
+            detection_data JSON,
+            processing_status VARCHAR(100),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            request_created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            PRIMARY KEY (id, request_created_at),
+            UNIQUE (request_id, request_created_at),
+            FOREIGN KEY (request_id, request_created_at)
+                REFERENCES analysis_requests (id, created_at) ON DELETE CASCADE
+        ) PARTITION BY RANGE (request_created_at)
+    """,
+    "detections": """
+        CREATE TABLE IF NOT EXISTS detections (
+            id BIGSERIAL NOT NULL,
+            request_id BIGINT NOT NULL,
+            result_id BIGINT NOT NULL,
+            crop_id INTEGER REFERENCES crops (id),
+            disease_id INTEGER REFERENCES diseases (id),
+            bbox_x1 INTEGER,
+            bbox_y1 INTEGER,
+            bbox_x2 INTEGER,
+            bbox_y2 INTEGER,
+            yolo_confidence FLOAT,
+            disease_confidence FLOAT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            request_created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            PRIMARY KEY (id, request_created_at),
+            FOREIGN KEY (request_id, request_created_at)
+                REFERENCES analysis_requests (id, created_at) ON DELETE CASCADE,
+            FOREIGN KEY (result_id, request_created_at)
+                REFERENCES analysis_results (id, request_created_at) ON DELETE CASCADE
+        ) PARTITION BY RANGE (request_created_at)
+    """
+}
+
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def partitioning_enabled() -> bool:
+    return ANALYSIS_PARTITIONING and engine.dialect.name == "postgresql"
+
+
+def _month_start(value: datetime, offset: int = 0) -> datetime:
+    """value가 속한 달의 1일 (offset만큼 앞/뒤 달)"""
+    month_index = value.year * 12 + (value.month - 1) + offset
+    return datetime(month_index // 12, month_index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def create_partitioned_tables():
+    """
+    분석 테이블을 요청 created_at 월 단위 RANGE 파티션 테이블로 생성 (이미 있으면 건너뜀)
+    create_tables()에서 Base.metadata.create_all() 전에 호출됩니다.
+    """
+    with engine.begin() as conn:
+        # 참조 대상(users, crops, diseases 등)과 ENUM 타입을 먼저 생성
+        others = [table for table in Base.metadata.sorted_tables if table.name not in PARTITIONED_TABLES]
+        Base.metadata.create_all(bind=conn, tables=others)
+        AnalysisRequest.__table__.c.analysis_type.type.create(bind=conn, checkfirst=True)
+        AnalysisRequest.__table__.c.status.type.create(bind=conn, checkfirst=True)
+
+        for table in reversed(PARTITIONED_TABLES):
+            conn.execute(text(_PARTITIONED_DDL[table]))
+            # 범위 밖(과거 데이터 이관 등) 행을 받는 기본 파티션
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+    print("✅ 월 단위 파티션 테이블 생성 완료")
+    ensure_partitions()
+
+
+def partitioned_table_names() -> Set[str]:
+    """DB에서 실제로 파티션 테이블인 분석 테이블 이름"""
+    if engine.dialect.name != "postgresql":
+        return set()
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT relname FROM pg_class WHERE relkind = 'p'")).scalars().all()
+    return set(rows) & set(PARTITIONED_TABLES)
+
+
+def ensure_partitions(months_ahead: int = PARTITION_PREMAKE_MONTHS, now: Optional[datetime] = None) -> List[str]:
+    """이번 달부터 months_ahead개월 뒤까지의 파티션을 미리 생성 - 새로 만든 파티션 이름 반환"""
+    tables = partitioned_table_names()
+    if not tables:
+        return []
+
+    now = now or datetime.now(timezone.utc)
+    created = []
+    with engine.begin() as conn:
+        existing = set(conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+        )).scalars().all())
+        for offset in range(0, months_ahead + 1):
+            start = _month_start(now, offset)
+            end = _month_start(now, offset + 1)
+            for table in PARTITIONED_TABLES:
+                name = partition_name(table, start)
+                if table not in tables or name in existing:
+                    continue
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+                created.append(name)
+
+    for name in created:
+        print(f"  ✅ 파티션 생성: {name}")
+    return created
+
+
+def apply_retention(retention_months: int = ANALYSIS_RETENTION_MONTHS, mode: str = PARTITION_RETENTION_MODE,
+                    now: Optional[datetime] = None) -> List[str]:
+    """
+    보존 기간이 지난 월 파티션을 분리(detach) 또는 삭제(drop) - 처리한 파티션 이름 반환
+    이번 달 기준 retention_months개월 이전에 끝난 파티션이 대상이며, 기본 파티션은 건드리지 않습니다.
+    첫 파티션을 처리하기 전에 롤업 보존 기준 시각을 기록합니다 (재구성 시 분리한 달의 통계 유지).
+    """
+    if retention_months <= 0:
+        return []
+    if mode not in ("detach", "drop"):
+        raise ValueError("PARTITION_RETENTION_MODE는 detach 또는 drop이어야 합니다")
+
+    tables = partitioned_table_names()
+    cutoff = _month_start(now or datetime.now(timezone.utc), -retention_months)
+    handled = []
+    for table in PARTITIONED_TABLES:
+        if table not in tables:
+            continue
+        with engine.connect() as conn:
+            children = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :parent"
+            ), {"parent": table}).scalars().all()
+
+        for child in sorted(children):
+            match = _PARTITION_NAME.match(child)
+            if not match or match.group("table") != table:
+                continue
+            month = datetime(int(match.group("year")), int(match.group("month")), 1, tzinfo=timezone.utc)
+            if _month_start(month, 1) > cutoff:
+                continue
+            if not handled:
+                record_purge_watermark(cutoff)
+            # 파티션마다 별도 트랜잭션 (부모 테이블 잠금 시간 최소화)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {child}"))
+                if mode == "drop":
+                    conn.execute(text(f"DROP TABLE {child}"))
+                else:
+                    _drop_partition_foreign_keys(conn, child)
+            handled.append(child)
+            print(f"  🗑️ 파티션 {'삭제' if mode == 'drop' else '분리'}: {child}")
+    return handled
+
+
+def _drop_partition_foreign_keys(conn, detached: str):
+    """
+    분리한 결과/감지 파티션에 복사되어 남은 분석 테이블 외래키 제거
+    (같은 달 요청 파티션도 분리되므로, 남겨 두면 부모 테이블에 없는 행을 가리키는 제약이 됨)
+    """
+    names = conn.execute(text(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = CAST(:detached AS regclass) AND contype = 'f' "
+        "AND confrelid IN (SELECT oid FROM pg_class WHERE relname = ANY(:parents))"
+    ), {"detached": detached, "parents": list(PARTITIONED_TABLES)}).scalars().all()
+    for name in names:
+        conn.execute(text(f'ALTER TABLE {detached} DROP CONSTRAINT "{name}"'))
+
+
+def purge_old_rows(retention_months: int = ANALYSIS_RETENTION_MONTHS, batch_size: int = PURGE_BATCH_SIZE,
+                   sleep_ms: int = PURGE_SLEEP_MS, now: Optional[datetime] = None) -> int:
+    """
+    파티션을 쓰지 않는 배포용 - 보존 기간이 지난 요청/결과/감지 행을 작은 배치로 삭제
+    배치마다 커밋하고 잠시 쉬어 긴 잠금/대량 WAL을 피합니다. 삭제한 요청 수 반환.
+    """
+    if retention_months <= 0:
+        return 0
+    cutoff = _month_start(now or datetime.now(timezone.utc), -retention_months)
+    return purge_before(cutoff, batch_size, sleep_ms)
+
+
+def purge_before(cutoff: datetime, batch_size: int = PURGE_BATCH_SIZE, sleep_ms: int = PURGE_SLEEP_MS) -> int:
+    """
+    created_at < cutoff인 요청과 그 결과/감지 행을 배치 단위로 삭제 - 삭제한 요청 수 반환
+    삭제 전에 롤업 보존 기준 시각을 기록합니다 (재구성 시 삭제한 기간의 통계 유지, 중간에 멈춰도 안전).
+    """
+    record_purge_watermark(cutoff)
+    if engine.dialect.name == "sqlite":
+        # SQLite는 created_at을 UTC 문자열로 저장 (tz 정보 없음)
+        cutoff = cutoff.astimezone(timezone.utc).replace(tzinfo=None) if cutoff.tzinfo else cutoff
+    print(f"🔄 기준 시각 이전 데이터 삭제 시작 (기준: {cutoff:%Y-%m-%d} 이전, 배치 {batch_size}건)")
+
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            request_ids = conn.execute(
+                select(AnalysisRequest.id)
+                .where(AnalysisRequest.created_at < cutoff)
+                .order_by(AnalysisRequest.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not request_ids:
+                break
+            # 외래키 ON DELETE CASCADE에 기대지 않고 자식부터 명시적으로 삭제 (SQLite 등)
+            conn.execute(delete(Detection).where(Detection.request_id.in_(request_ids)))
+            conn.execute(delete(AnalysisResult).where(AnalysisResult.request_id.in_(request_ids)))
+            conn.execute(delete(AnalysisRequest).where(AnalysisRequest.id.in_(request_ids)))
+
+        total += len(request_ids)
+        print(f"  ✅ 요청 {total}건 삭제")
+        if sleep_ms > 0:
+            time.sleep(sleep_ms / 1000)
+
+    print(f"✅ 기준 시각 이전 데이터 삭제 완료: 요청 {total}건")
+    return total
+
+
+def run_maintenance(retention_months: int = ANALYSIS_RETENTION_MONTHS):
+    """파티션 배포면 미리 생성 + 보존 정책, 아니면 배치 삭제"""
+    if partitioned_table_names():
+        ensure_partitions()
+        apply_retention(retention_months)
+    else:
+        purge_old_rows(retention_months)
+
+
+if __name__ == "__main__":
+    # 실행 (WeCanFarm_Server 디렉토리에서, cron 등으로 매일 실행 권장):
+    #   python -m app.database.partitioning --maintain --retention-months 12
+    parser = argparse.ArgumentParser(description="분석 테이블 파티션/보존 관리")
+    parser.add_argument("--maintain", action="store_true", help="파티션 미리 생성 + 보존 정책 적용 (일반 테이블은 배치 삭제)")
+    parser.add_argument("--premake", action="store_true", help="파티션 미리 생성만 실행")
+    parser.add_argument("--retention-months", type=int, default=ANALYSIS_RETENTION_MONTHS)
+    args = parser.parse_args()
+
+    if args.maintain:
+        run_maintenance(args.retention_months)
+    elif args.premake:
+        ensure_partitions()
+    else:
+        parser.print_help()
@@ -0,0 +1,203 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# 커넥션을 오래 잡고 있으면 경고 (밀리초, 0이면 경고 안 함)
+POOL_HOLD_WARN_MS = int(os.getenv("POOL_HOLD_WARN_MS", "2000"))
+
+# 현재 요청의 엔드포인트 (main.py 미들웨어에서 설정, 요청 밖에서는 "background")
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="background")
+
+# _do_get 대기 시간을 checkout 이벤트로 넘기는 record_info 키
+# (비동기 엔진은 모든 checkout이 이벤트 루프 스레드에서 돌고 pre_ping이 그 사이에 await 하므로
+#  스레드 로컬이 아니라 해당 체크아웃이 독점하는 커넥션 레코드에 실어 보냄)
+_WAIT_KEY = "pool_wait_ms"
+
+
+class EndpointStats:
+    """엔드포인트별 커넥션 사용량"""
+
+    def __init__(self, endpoint: str):
+        self._endpoint = endpoint
+        self.checkouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.hold_ms_total = 0.0
+        self.hold_ms_max = 0.0
+        self.queries = 0
+
+    def to_dict(self) -> dict:
+        requests = request_counts.get(self._endpoint, 0)
+        return {
+            "checkouts": self.checkouts,
+            "queries": self.queries,
+            "queries_per_request": round(self.queries / requests, 2) if requests else None,
+            "avg_wait_ms": round(self.wait_ms_total / self.checkouts, 2) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.wait_ms_max, 2),
+            "avg_hold_ms": round(self.hold_ms_total / self.checkouts, 2) if self.checkouts else 0.0,
+            "max_hold_ms": round(self.hold_ms_max, 2)
+        }
+
+
+class PoolStats:
+    """
+    풀 1개의 계측값
+    - 대기(wait): 커넥션을 요청해서 받을 때까지 걸린 시간 (풀 고갈 시 증가)
+    - 점유(hold): checkout ~ checkin 사이 시간 (세션이 커넥션을 잡고 있던 시간)
+    """
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.timeouts = 0  # 풀 고갈로 pool_timeout 초과 (sqlalchemy.exc.TimeoutError)
+        self.connect_errors = 0  # 그 밖의 실패 (DB 접속 실패 등)
+        self.long_holds = 0
+        self.by_endpoint: Dict[str, EndpointStats] = {}
+        self._held: Dict[int, tuple] = {}  # id(connection_record) → (checkout 시각, 엔드포인트)
+        self._lock = threading.Lock()
+
+    def on_checkout(self, connection_record):
+        wait_ms = connection_record.record_info.pop(_WAIT_KEY, 0.0)
+        endpoint = current_endpoint.get()
+        with self._lock:
+            self._held[id(connection_record)] = (time.perf_counter(), endpoint)
+            stats = self._endpoint_stats(endpoint)
+            stats.checkouts += 1
+            stats.wait_ms_total += wait_ms
+            stats.wait_ms_max = max(stats.wait_ms_max, wait_ms)
+
+    def on_get_failed(self, error: Exception):
+        with self._lock:
+            if isinstance(error, PoolTimeoutError):
+                self.timeouts += 1
+            else:
+                self.connect_errors += 1
+
+    def on_query(self):
+        with self._lock:
+            self._endpoint_stats(current_endpoint.get()).queries += 1
+
+    def _endpoint_stats(self, endpoint: str) -> EndpointStats:
+        stats = self.by_endpoint.get(endpoint)
+        if stats is None:
+            stats = self.by_endpoint[endpoint] = EndpointStats(endpoint)
+        return stats
+
+    def on_checkin(self, connection_record):
+        with self._lock:
+            held = self._held.pop(id(connection_record), None)
+            if held is None:
+                return
+            checked_out_at, endpoint = held
+            hold_ms = (time.perf_counter() - checked_out_at) * 1000
+            stats = self._endpoint_stats(endpoint)
+            stats.hold_ms_total += hold_ms
+            stats.hold_ms_max = max(stats.hold_ms_max, hold_ms)
+            if POOL_HOLD_WARN_MS and hold_ms > POOL_HOLD_WARN_MS:
+                self.long_holds += 1
+                long_hold = True
+            else:
+                long_hold = False
+        if long_hold:
+            logger.warning("⚠️ [%s 풀] 커넥션 %.0fms 점유 - %s", self.name, hold_ms, endpoint)
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        now = time.perf_counter()
+        with self._lock:
+            holders = sorted(
+                ({"endpoint": endpoint, "held_ms": round((now - checked_out_at) * 1000, 1)}
+                 for checked_out_at, endpoint in self._held.values()),
+                key=lambda holder: holder["held_ms"], reverse=True
+            )
+            by_endpoint = {endpoint: stats.to_dict() for endpoint, stats in self.by_endpoint.items()}
+        return {
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else len(holders),
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "timeouts": self.timeouts,
+            "connect_errors": self.connect_errors,
+            "long_holds": self.long_holds,
+            "holders": holders,
+            "by_endpoint": by_endpoint
+        }
+
+    def reset(self):
+        with self._lock:
+            self.timeouts = 0
+            self.connect_errors = 0
+            self.long_holds = 0
+            self.by_endpoint.clear()
+            request_counts.clear()
+
+
+# 풀 이름 → 계측값 (pool_logging_name으로 연결)
+pool_stats: Dict[str, PoolStats] = {}
+
+# 엔드포인트 → 처리한 요청 수 (요청당 쿼리 수 계산용, main.py 미들웨어에서 증가)
+request_counts: Dict[str, int] = {}
+
+
+def record_request(endpoint: str):
+    request_counts[endpoint] = request_counts.get(endpoint, 0) + 1
+
+
+class _WaitTimingMixin:
+    """커넥션을 받기까지의 대기 시간 측정 (SQLAlchemy에는 checkout 이전 이벤트가 없음)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except Exception as error:
+            stats = pool_stats.get(self.logging_name)
+            if stats is not None:
+                stats.on_get_failed(error)
+            raise
+        record.record_info[_WAIT_KEY] = (time.perf_counter() - started) * 1000
+        return record
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    """동기 엔진용 계측 풀"""
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """비동기 엔진용 계측 풀"""
+
+
+def instrument_engine(engine, name: str) -> PoolStats:
+    """엔진 풀에 checkout/checkin 이벤트를 연결 (비동기 엔진은 sync_engine에 연결)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    stats = PoolStats(name, sync_engine)
+    pool_stats[name] = stats
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.on_checkout(connection_record)
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats.on_checkin(connection_record)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _on_query(conn, cursor, statement, parameters, context, executemany):
+        stats.on_query()
+
+    return stats
+
+
+def pool_snapshot(name: Optional[str] = None) -> dict:
+    """관리자 API용 - 전체(또는 지정한) 풀 계측값"""
+    if name is not None:
+        return {name: pool_stats[name].snapshot()} if name in pool_stats else {}
+    return {pool_name: stats.snapshot() for pool_name, stats in pool_stats.items()}
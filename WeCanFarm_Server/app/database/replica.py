@@ -0,0 +1,190 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError, InterfaceError
+
+from .database import engine, read_engine, read_async_engine, ReportingSessionLocal, ReadSessionLocal
+
+# 복제본 라우팅 설정 (초)
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))  # 이보다 지연되면 primary로 조회
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))     # 정상일 때 지연 재확인 주기
+REPLICA_RETRY_AFTER = float(os.getenv("REPLICA_RETRY_AFTER", "30"))          # 장애/지연 판정 후 다시 확인하기까지 대기
+REPLICA_CHECK_TIMEOUT = float(os.getenv("REPLICA_CHECK_TIMEOUT", "1"))       # 지연 확인 쿼리 제한 시간
+
+# PostgreSQL 스트리밍 복제본의 재생 지연 (초)
+# WAL을 모두 재생한 상태면 0 (primary에 쓰기가 없을 때 replay_timestamp가 오래돼 보이는 문제 방지)
+_PG_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# 복제 개념이 없는 DB(SQLite 등 테스트용 대체 DB)는 연결 가능 여부만 확인
+_PING_SQL = text("SELECT 0")
+
+_CONNECTION_ERRORS = (OperationalError, InterfaceError)
+
+T = TypeVar("T")
+
+
+def _lag_sql(dialect_name: str):
+    return _PG_LAG_SQL if dialect_name == "postgresql" else _PING_SQL
+
+
+def _is_connection_error(error: Exception) -> bool:
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, _CONNECTION_ERRORS)
+
+
+class ReplicaRouter:
+    """
+    조회 트래픽을 읽기 전용 복제본으로 보내고, 복제본이 없거나 장애/지연 시 primary(reporting 풀)로 되돌림
+    - 지연 확인은 REPLICA_CHECK_INTERVAL마다 1번만 실행 (확인 중인 동안 다른 요청은 직전 판정 사용)
+    - 장애 판정 후에는 REPLICA_RETRY_AFTER 동안 primary만 사용
+    """
+
+    def __init__(self, async_engine=None, sync_engine=None, read_sessionmaker=None,
+                 max_lag: float = REPLICA_MAX_LAG_SECONDS, check_interval: float = REPLICA_CHECK_INTERVAL,
+                 retry_after: float = REPLICA_RETRY_AFTER, check_timeout: float = REPLICA_CHECK_TIMEOUT):
+        self.async_engine = async_engine
+        self.sync_engine = sync_engine
+        self.read_sessionmaker = read_sessionmaker
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self.check_timeout = check_timeout
+
+        self._healthy: Optional[bool] = None  # None: 아직 확인 전
+        self._checked_at: Optional[float] = None
+        self._lag: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._check_lock = threading.Lock()
+
+        # 관측용 카운터
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.async_engine is not None or self.sync_engine is not None
+
+    def _check_due(self) -> bool:
+        if self._checked_at is None:
+            return True
+        wait = self.check_interval if self._healthy else self.retry_after
+        return time.monotonic() - self._checked_at >= wait
+
+    def _record(self, lag: Optional[float], error: Optional[Exception]):
+        healthy = error is None and lag is not None and lag <= self.max_lag
+        if healthy != self._healthy:
+            if healthy:
+                print(f"✅ 읽기 복제본 사용 (지연 {lag:.1f}초)")
+            elif error is not None:
+                print(f"⚠️ 읽기 복제본 연결 실패 - primary로 조회합니다: {error}")
+            else:
+                print(f"⚠️ 읽기 복제본 지연 {lag:.1f}초 > {self.max_lag:.0f}초 - primary로 조회합니다")
+        self._healthy = healthy
+        self._lag = lag
+        self._last_error = str(error) if error is not None else None
+        self._checked_at = time.monotonic()
+
+    def mark_unavailable(self, error: Exception):
+        """조회 중 연결 오류가 나면 다음 확인 시점까지 primary 사용"""
+        self._record(None, error)
+
+    async def use_replica(self) -> bool:
+        if self.async_engine is None:
+            return False
+        if self._check_due() and self._check_lock.acquire(blocking=False):
+            try:
+                lag = await asyncio.wait_for(self._measure_lag_async(), self.check_timeout)
+                self._record(lag, None)
+            except Exception as e:
+                self._record(None, e)
+            finally:
+                self._check_lock.release()
+        return bool(self._healthy)
+
+    def use_replica_sync(self) -> bool:
+        if self.sync_engine is None:
+            return False
+        if self._check_due() and self._check_lock.acquire(blocking=False):
+            try:
+                self._record(self._measure_lag_sync(), None)
+            except Exception as e:
+                self._record(None, e)
+            finally:
+                self._check_lock.release()
+        return bool(self._healthy)
+
+    async def _measure_lag_async(self) -> float:
+        async with self.async_engine.connect() as conn:
+            return float((await conn.execute(_lag_sql(self.async_engine.dialect.name))).scalar() or 0)
+
+    def _measure_lag_sync(self) -> float:
+        with self.sync_engine.connect() as conn:
+            return float(conn.execute(_lag_sql(self.sync_engine.dialect.name)).scalar() or 0)
+
+    @asynccontextmanager
+    async def session(self):
+        """복제본(가능하면) 또는 primary 비동기 세션"""
+        async with self._open(await self.use_replica()) as db:
+            yield db
+
+    async def run(self, fn: Callable[..., Awaitable[T]]) -> T:
+        """
+        fn(db)를 복제본에서 실행하고, 복제본 연결 오류면 primary에서 한 번 더 실행
+        (요청 단위 의존성과 달리 재시도 가능한 백그라운드 조회용 - 예: 관리자 통계 캐시 갱신)
+        """
+        if await self.use_replica():
+            try:
+                async with self._open(True) as db:
+                    return await fn(db)
+            except Exception as e:
+                if not _is_connection_error(e):
+                    raise
+        async with self._open(False) as db:
+            return await fn(db)
+
+    @asynccontextmanager
+    async def _open(self, on_replica: bool):
+        factory = self.read_sessionmaker if on_replica else ReportingSessionLocal
+        if on_replica:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+        async with factory() as db:
+            try:
+                yield db
+            except Exception as e:
+                await db.rollback()
+                if on_replica and _is_connection_error(e):
+                    self.mark_unavailable(e)
+                raise
+
+    def engine_for_read(self):
+        """동기 조회(리포트/내보내기)용 엔진 - 복제본이 정상이면 복제본, 아니면 primary"""
+        return self.sync_engine if self.use_replica_sync() else engine
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "healthy": self._healthy,
+            "lag_seconds": self._lag,
+            "max_lag_seconds": self.max_lag,
+            "last_error": self._last_error,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads
+        }
+
+
+# 전역 라우터 (READ_REPLICA_URL이 없으면 항상 primary)
+replica_router = ReplicaRouter(read_async_engine, read_engine, ReadSessionLocal)
@@ -0,0 +1,263 @@
+import argparse
+import os
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, delete, text, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .database import engine
+from .models import AnalysisRequest, AnalysisResult, StatsRollup, RequestStatus
+
+# 롤업 구분값
+HOUR = "hour"
+DAY = "day"
+ALL = "all"
+ALL_BUCKET = datetime(1970, 1, 1)  # 전체 누적 행의 bucket_start
+# 원본 삭제 기준 시각 (아카이브/보존 정책이 기록, bucket_start = 이 시각 이전 원본은 삭제되었을 수 있음)
+# 대시보드는 granularity로 구간을 골라 읽으므로 이 행은 집계에 섞이지 않음
+WATERMARK = "purged"
+_WATERMARK_METRIC = "watermark"
+
+# 지표 이름
+REQUESTS = "requests"                      # 최종 상태별 요청 수
+DETECTIONS_CROP = "detections_crop"        # 작물별 감지 수 (성공한 결과만)
+DETECTIONS_DISEASE = "detections_disease"  # 질병 상태별 감지 수 (성공한 결과만)
+PROCESSING_MS = "processing_ms"            # 처리 시간 히스토그램 (구간 상한, 밀리초)
+
+# 처리 시간 히스토그램 구간 상한 (밀리초), 마지막 구간은 "inf"
+PROCESSING_MS_BUCKETS = [
+    int(edge) for edge in os.getenv("ROLLUP_PROCESSING_MS_BUCKETS", "250,500,1000,2500,5000,10000,30000").split(",")
+]
+
+REBUILD_BATCH_SIZE = int(os.getenv("ROLLUP_REBUILD_BATCH_SIZE", "1000"))
+_UPSERT_CHUNK = 1000  # UPSERT executemany 1회당 최대 행 수
+
+
+def to_utc_naive(value: Optional[datetime]) -> datetime:
+    """롤업 구간 계산용 UTC naive 시각 (tz 없는 값은 UTC로 간주)"""
+    if value is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def processing_bucket(processing_time: int) -> str:
+    for edge in PROCESSING_MS_BUCKETS:
+        if processing_time <= edge:
+            return str(edge)
+    return "inf"
+
+
+def collect_deltas(deltas: Counter, status, processing_time: Optional[int] = None,
+                   detection_data=None, processing_status: Optional[str] = None, at: Optional[datetime] = None):
+    """최종 상태가 된 요청 1건의 증가분을 deltas에 누적 (시간/일/전체 구간 모두)"""
+    at = to_utc_naive(at)
+    buckets = (
+        (HOUR, at.replace(minute=0, second=0, microsecond=0)),
+        (DAY, at.replace(hour=0, minute=0, second=0, microsecond=0)),
+        (ALL, ALL_BUCKET)
+    )
+    status = status.value if isinstance(status, RequestStatus) else str(status)
+
+    increments = Counter({(REQUESTS, status): 1})
+    if processing_time is not None:
+        increments[(PROCESSING_MS, processing_bucket(processing_time))] += 1
+    if processing_status == "성공" and isinstance(detection_data, list):
+        for detection in detection_data:
+            if not isinstance(detection, dict):
+                continue
+            increments[(DETECTIONS_CROP, str(detection.get("crop_type", "")))] += 1
+            increments[(DETECTIONS_DISEASE, str(detection.get("disease_status", "")))] += 1
+
+    for granularity, bucket_start in buckets:
+        for (metric, dimension), count in increments.items():
+            deltas[(granularity, bucket_start, metric, dimension)] += count
+
+
+def apply_deltas(conn, deltas: Counter):
+    """
+    누적된 증가분을 UPSERT로 반영 (Connection 또는 Session, 호출자 트랜잭션 안에서)
+    - 문장 1개 + 파라미터 목록(executemany)으로 실행해 컴파일 결과를 캐시 재사용
+      (행 수만큼 VALUES를 붙이면 대량 적재/재구성 시 SQL 컴파일 비용이 대부분을 차지)
+    """
+    if not deltas:
+        return
+    # 동시에 같은 행을 갱신하는 트랜잭션끼리 교착되지 않도록 키 순서대로 정렬
+    rows = [
+        {"granularity": granularity, "bucket_start": bucket_start, "metric": metric,
+         "dimension": dimension, "count": count}
+        for (granularity, bucket_start, metric, dimension), count in sorted(deltas.items())
+    ]
+    dialect = conn.get_bind().dialect.name if hasattr(conn, "get_bind") else conn.dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+
+    table = StatsRollup.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.granularity, table.c.bucket_start, table.c.metric, table.c.dimension],
+        set_={"count": table.c.count + statement.excluded.count}
+    )
+    for start in range(0, len(rows), _UPSERT_CHUNK):
+        conn.execute(statement, rows[start:start + _UPSERT_CHUNK])
+
+
+def record_completion(conn, status, processing_time: Optional[int] = None, detection_data=None,
+                      processing_status: Optional[str] = None, at: Optional[datetime] = None):
+    """
+    요청 1건이 COMPLETED/FAILED가 될 때 같은 트랜잭션에서 롤업 갱신
+    - at에는 요청의 created_at을 넘김 (재구성/write-behind와 같은 구간 기준, 완료 시각이 아님)
+    """
+    deltas = Counter()
+    collect_deltas(deltas, status, processing_time, detection_data, processing_status, at)
+    apply_deltas(conn, deltas)
+
+
+def purge_watermark(conn) -> Optional[datetime]:
+    """기록된 원본 삭제 기준 시각 (UTC naive, 없으면 None)"""
+    return conn.execute(
+        select(func.max(StatsRollup.bucket_start)).where(StatsRollup.granularity == WATERMARK)
+    ).scalar()
+
+
+def record_purge_watermark(cutoff: datetime) -> datetime:
+    """
+    원본 행을 지우기 전에 호출 - cutoff 이전 원본은 재구성 시 다시 스캔하지 않고 기존 롤업을 보존
+    (기존 기준 시각보다 늦을 때만 갱신, 적용된 기준 시각 반환)
+    """
+    cutoff = to_utc_naive(cutoff)
+    with engine.begin() as conn:
+        current = purge_watermark(conn)
+        if current is not None and to_utc_naive(current) >= cutoff:
+            return to_utc_naive(current)
+        conn.execute(delete(StatsRollup).where(StatsRollup.granularity == WATERMARK))
+        conn.execute(StatsRollup.__table__.insert().values(
+            granularity=WATERMARK, bucket_start=cutoff, metric=_WATERMARK_METRIC, dimension="", count=0
+        ))
+    print(f"  📌 롤업 보존 기준 시각 기록: {cutoff:%Y-%m-%d %H:%M} 이전 원본 삭제")
+    return cutoff
+
+
+def _preserved_before(baseline: Counter, watermark: datetime) -> Counter:
+    """
+    기준 시각 이전 구간의 기존 롤업 (삭제된 원본으로는 다시 만들 수 없음)
+    - 시간/일 구간은 그대로, 전체 누적은 보존한 일 구간의 합 (기준 시각은 월 경계라 구간이 걸치지 않음)
+    """
+    preserved = Counter()
+    for (granularity, bucket_start, metric, dimension), count in baseline.items():
+        if granularity in (HOUR, DAY) and bucket_start < watermark:
+            preserved[(granularity, bucket_start, metric, dimension)] += count
+            if granularity == DAY:
+                preserved[(ALL, ALL_BUCKET, metric, dimension)] += count
+    return preserved
+
+
+def _read_rollups(conn) -> Counter:
+    rows = conn.execute(select(
+        StatsRollup.granularity, StatsRollup.bucket_start, StatsRollup.metric,
+        StatsRollup.dimension, StatsRollup.count
+    ).where(StatsRollup.granularity != WATERMARK)).all()
+    return Counter({
+        (granularity, to_utc_naive(bucket_start), metric, dimension): count
+        for granularity, bucket_start, metric, dimension, count in rows
+    })
+
+
+def _scan_requests(conn, deltas: Counter, batch_size: int, since: Optional[datetime] = None) -> int:
+    """완료/실패 요청(since 이후 생성분만)을 ID 순으로 batch_size건씩 읽어 deltas에 누적 - 집계한 요청 수 반환"""
+    last_id = 0
+    total_requests = 0
+    while True:
+        query = (
+            select(
+                AnalysisRequest.id,
+                AnalysisRequest.status,
+                AnalysisRequest.processing_time,
+                AnalysisRequest.created_at,
+                AnalysisResult.detection_data,
+                AnalysisResult.processing_status
+            )
+            .outerjoin(AnalysisResult, AnalysisResult.request_id == AnalysisRequest.id)
+            .where(AnalysisRequest.id > last_id)
+            .where(AnalysisRequest.status.in_([RequestStatus.COMPLETED, RequestStatus.FAILED]))
+            .order_by(AnalysisRequest.id)
+            .limit(batch_size)
+        )
+        if since is not None:
+            query = query.where(AnalysisRequest.created_at >= _db_datetime(since, conn))
+        batch = conn.execute(query).all()
+        if not batch:
+            return total_requests
+
+        for row in batch:
+            collect_deltas(deltas, row.status, row.processing_time, row.detection_data,
+                           row.processing_status, row.created_at)
+        last_id = batch[-1].id
+        total_requests += len(batch)
+        print(f"  ✅ 요청 {total_requests}건 집계 (마지막 요청 ID: {last_id})")
+
+
+def _db_datetime(value: datetime, conn) -> datetime:
+    """롤업의 UTC naive 시각을 created_at 비교값으로 (SQLite는 naive UTC 문자열, 그 외는 tz 포함)"""
+    return value if conn.dialect.name == "sqlite" else value.replace(tzinfo=timezone.utc)
+
+
+def rebuild_rollups(batch_size: int = REBUILD_BATCH_SIZE) -> int:
+    """
+    원본 데이터(analysis_requests + analysis_results)로 롤업 테이블 재구성 (정합성 복구용)
+    - 아카이브/보존 정책으로 원본을 지운 뒤라면(purge_watermark) 기준 시각 이후 원본만 다시 집계하고,
+      그 이전 시간/일 구간은 기존 값을 보존 (전체 누적 = 보존한 일 구간 합 + 기준 시각 이후 스캔)
+    1) 스냅샷 트랜잭션 1개에서 현재 롤업과 원본을 읽음 (롤업 테이블 잠금 없음 - 완료 처리는 계속 진행)
+       완료 처리는 요청 상태와 롤업을 같은 트랜잭션에서 바꾸므로, 스냅샷에 보이는 완료는 원본과 롤업 양쪽에,
+       이후의 완료는 양쪽 모두에 없음
+    2) 교체 트랜잭션에서만 잠금: 스캔 중 완료 처리가 롤업에 더한 증가분(현재 - 스냅샷)을 더해 교체
+    - PostgreSQL 스캔은 REPEATABLE READ 읽기 전용, SQLite는 WAL 모드여야 스캔 중 쓰기가 대기하지 않음
+    """
+    print(f"🔄 통계 롤업 재구성 시작 (배치 크기: {batch_size})")
+    deltas = Counter()
+    postgres = engine.dialect.name == "postgresql"
+
+    snapshot = engine.connect()
+    if postgres:
+        snapshot = snapshot.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+    with snapshot as conn:
+        if not postgres:
+            # pysqlite는 SELECT에서 트랜잭션을 시작하지 않으므로 직접 BEGIN (읽기 스냅샷 고정)
+            conn.exec_driver_sql("BEGIN")
+        baseline = _read_rollups(conn)
+        watermark = purge_watermark(conn)
+        if watermark is not None:
+            watermark = to_utc_naive(watermark)
+            print(f"  📌 {watermark:%Y-%m-%d %H:%M} 이전 구간은 기존 롤업 보존 (원본 삭제됨)")
+            deltas.update(_preserved_before(baseline, watermark))
+        total_requests = _scan_requests(conn, deltas, batch_size, since=watermark)
+        conn.rollback()
+
+    with engine.begin() as conn:
+        if postgres:
+            conn.execute(text("LOCK TABLE stats_rollups IN EXCLUSIVE MODE"))
+        else:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        caught_up = _read_rollups(conn) - baseline
+        deltas.update(caught_up)
+        conn.execute(delete(StatsRollup).where(StatsRollup.granularity != WATERMARK))
+        apply_deltas(conn, deltas)
+
+    print(f"✅ 통계 롤업 재구성 완료: 요청 {total_requests}건 (+ 스캔 중 반영된 롤업 {len(caught_up)}행) "
+          f"→ 롤업 {len(deltas)}행")
+    return len(deltas)
+
+
+if __name__ == "__main__":
+    # 실행: python -m app.database.rollups --rebuild (WeCanFarm_Server 디렉토리에서)
+    parser = argparse.ArgumentParser(description="통계 롤업 테이블 관리")
+    parser.add_argument("--rebuild", action="store_true", help="원본 데이터로 롤업 테이블 재구성")
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_rollups(args.batch_size)
+    else:
+        parser.print_help()
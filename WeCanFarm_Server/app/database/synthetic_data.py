@@ -0,0 +1,292 @@
+import argparse
+import csv
+import enum
+import io
+import json
+import math
+import random
+import time
+from collections import Counter
+from itertools import accumulate
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import select, func, insert, text
+
+from .database import engine
+from .models import (
+    User, AnalysisRequest, AnalysisResult, Detection,
+    UserRole, AnalysisType, RequestStatus
+)
+from .detections import detection_catalog, DISEASE_NAME_BY_STATUS
+from .rollups import collect_deltas, apply_deltas
+
+# 부하/규모 테스트용 합성 데이터 생성기 (운영 DB에서 실행하지 마세요)
+#   실행 (WeCanFarm_Server 디렉토리에서):
+#     python -m app.database.synthetic_data --users 20000 --requests 1000000
+
+DEFAULT_BATCH_SIZE = 10000
+SYNTHETIC_PASSWORD = "$2b$12$synthetic.synthetic.synthetic.synthetic.synthetic.sy"  # 로그인 불가한 더미 해시
+
+# 분포 (실제 서비스 이용 패턴을 대략 반영)
+_ROLE_WEIGHTS = ((UserRole.USER, 85), (UserRole.FARMER, 14), (UserRole.ADMIN, 1))
+_STATUS_WEIGHTS = (
+    (RequestStatus.COMPLETED, 920), (RequestStatus.FAILED, 60),
+    (RequestStatus.PROCESSING, 15), (RequestStatus.PENDING, 5)
+)
+_CROP_WEIGHTS = (("pepper", 70), ("tomato", 20), ("cucumber", 10))
+_DISEASE_WEIGHTS = tuple(zip(DISEASE_NAME_BY_STATUS, (60, 25, 15)))  # 정상 / 고추점무늬병 / 고추마일드모틀바이러스
+_DETECTION_COUNT_WEIGHTS = ((0, 8), (1, 45), (2, 25), (3, 12), (4, 6), (5, 4))
+# 시간대별 요청 비중 (UTC 기준, 한국 낮 시간대에 몰림)
+_HOUR_WEIGHTS = [6, 8, 9, 9, 9, 8, 7, 6, 5, 4, 3, 2, 1, 1, 1, 1, 1, 1, 1, 2, 2, 3, 4, 5]
+
+_HOURS = (list(range(24)), list(accumulate(_HOUR_WEIGHTS)))
+
+_COPY_NULL = "\\N"
+
+
+def _unzip(weights):
+    """(값, 가중치) 목록 → (값 목록, 누적 가중치) - random.choices에 매번 누적합을 계산시키지 않도록"""
+    values, counts = zip(*weights)
+    return list(values), list(accumulate(counts))
+
+
+def _next_id(conn, column) -> int:
+    return (conn.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+class SyntheticDataGenerator:
+    """
+    사용자/분석 요청/결과/감지/롤업 행을 배치 단위로 대량 적재
+    - PostgreSQL은 COPY, 그 외(SQLite)는 executemany 다건 INSERT
+    - 기존 데이터 뒤에 이어서 추가하므로 여러 번 실행해 데이터 규모를 단계적으로 늘릴 수 있음
+    - 롤업(stats_rollups)도 같은 트랜잭션에서 갱신해 관리자 통계가 원본과 일치
+    """
+
+    def __init__(self, seed: int = 42, days: int = 365, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.random = random.Random(seed)
+        self.days = days
+        self.batch_size = batch_size
+        self.now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        self.use_copy = engine.dialect.name == "postgresql"
+
+    # ---------- 값 생성 ----------
+
+    def _choice(self, weights):
+        values, cum_weights = weights
+        return self.random.choices(values, cum_weights=cum_weights)[0]
+
+    def _timestamp(self) -> datetime:
+        day = self.now - timedelta(days=self.random.randrange(self.days))
+        hour = self._choice(_HOURS)
+        moment = day.replace(hour=hour, minute=0, second=0) + timedelta(seconds=self.random.randrange(3600))
+        return min(moment, self.now)
+
+    def _processing_time(self) -> int:
+        # 대부분 0.5~3초, 가끔 긴 꼬리 (로그 정규 분포)
+        return max(50, int(self.random.lognormvariate(math.log(1200), 0.6)))
+
+    def _detections(self, crops, diseases, counts) -> List[dict]:
+        detections = []
+        for _ in range(self._choice(counts)):
+            x1, y1 = self.random.randrange(0, 1600), self.random.randrange(0, 1200)
+            width, height = self.random.randrange(60, 400), self.random.randrange(60, 400)
+            detections.append({
+                "bbox": [x1, y1, x1 + width, y1 + height],
+                "crop_type": self._choice(crops),
+                "disease_status": self._choice(diseases),
+                "disease_confidence": round(self.random.uniform(0.55, 0.99), 4),
+                "yolo_confidence": round(self.random.uniform(0.4, 0.98), 4)
+            })
+        return detections
+
+    # ---------- 적재 ----------
+
+    def _insert(self, conn, table, rows: List[dict]):
+        if not rows:
+            return
+        if self.use_copy:
+            self._copy(conn, table, rows)
+        else:
+            conn.execute(insert(table), rows)
+
+    @staticmethod
+    def _copy_value(value):
+        if value is None:
+            return _COPY_NULL
+        if isinstance(value, enum.Enum):
+            return value.name
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        if isinstance(value, datetime):
+            return value.isoformat(sep=" ") + "+00"  # 생성값은 naive UTC
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        return value
+
+    def _copy(self, conn, table, rows: List[dict]):
+        """PostgreSQL COPY FROM STDIN (CSV) - 다건 INSERT보다 수 배 빠름"""
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([self._copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+        cursor = conn.connection.cursor()  # DBAPI(psycopg2) 커서
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{_COPY_NULL}')",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def _sync_sequences(self, conn):
+        """명시적 ID로 적재했으므로 PostgreSQL 시퀀스를 최대 ID 뒤로 이동"""
+        if not self.use_copy:
+            return
+        for table in (User.__table__, AnalysisRequest.__table__, AnalysisResult.__table__, Detection.__table__):
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+            ))
+
+    def generate_users(self, count: int) -> List[int]:
+        """사용자 count명 추가 - 추가된 사용자 ID 반환"""
+        roles = _unzip(_ROLE_WEIGHTS)
+        with engine.begin() as conn:
+            first_id = _next_id(conn, User.id)
+        user_ids = list(range(first_id, first_id + count))
+
+        for start in range(0, count, self.batch_size):
+            rows = []
+            for user_id in user_ids[start:start + self.batch_size]:
+                rows.append({
+                    "id": user_id,
+                    "username": f"synth_user_{user_id}",
+                    "email": f"synth_user_{user_id}@synthetic.wecanfarm.local",
+                    "password": SYNTHETIC_PASSWORD,
+                    "full_name": f"합성 사용자 {user_id}",
+                    "created_at": self._timestamp(),
+                    "is_active": self.random.random() > 0.03,
+                    "role": self._choice(roles)
+                })
+            with engine.begin() as conn:
+                self._insert(conn, User.__table__, rows)
+                self._sync_sequences(conn)
+            print(f"  👥 사용자 {min(start + self.batch_size, count)}/{count}명 적재")
+        return user_ids
+
+    def generate_requests(self, count: int, user_ids: List[int]) -> Dict[str, int]:
+        """
+        분석 요청 count건(+결과/감지/롤업) 추가
+        - 사용자별 요청 수는 긴 꼬리 분포 (소수의 헤비 유저가 많은 요청을 보냄)
+        """
+        statuses = _unzip(_STATUS_WEIGHTS)
+        crops = _unzip(_CROP_WEIGHTS)
+        diseases = _unzip(_DISEASE_WEIGHTS)
+        detection_counts = _unzip(_DETECTION_COUNT_WEIGHTS)
+        user_weights = [self.random.paretovariate(1.2) for _ in user_ids]
+
+        with engine.begin() as conn:
+            detection_catalog.load(conn)
+            if not detection_catalog.crop_names():
+                raise RuntimeError("작물/질병 기본 데이터가 없습니다 (python -m app.database.init_db 먼저 실행)")
+            request_id = _next_id(conn, AnalysisRequest.id)
+            result_id = _next_id(conn, AnalysisResult.id)
+
+        totals = Counter()
+        for start in range(0, count, self.batch_size):
+            batch_count = min(self.batch_size, count - start)
+            owners = self.random.choices(user_ids, user_weights, k=batch_count)
+            requests, results, detections = [], [], []
+            deltas = Counter()
+
+            for user_id in owners:
+                status = self._choice(statuses)
+                created_at = self._timestamp()
+                analysis_type = AnalysisType.PIPELINE if self.random.random() < 0.85 else AnalysisType.SINGLE
+                finished = status in (RequestStatus.COMPLETED, RequestStatus.FAILED)
+                processing_time = self._processing_time() if finished else None
+                requests.append({
+                    "id": request_id,
+                    "user_id": user_id,
+                    "image_url": f"user_{user_id}_image_{int(created_at.timestamp())}.jpg",
+                    "analysis_type": analysis_type,
+                    "status": status,
+                    "created_at": created_at,
+                    "processing_time": processing_time
+                })
+
+                detection_data = None
+                if status == RequestStatus.COMPLETED:
+                    detection_data = self._detections(crops, diseases, detection_counts)
+                    results.append({
+                        "id": result_id,
+                        "request_id": request_id,
+                        "total_detections": len(detection_data),
+                        "result_image_url": f"user_{user_id}_result_{request_id}.jpg",
+                        "detection_data": detection_data,
+                        "processing_status": "성공",
+                        "created_at": created_at,
+                        "request_created_at": created_at
+                    })
+                    detections.extend(detection_catalog.rows(detection_data, request_id, result_id, created_at))
+                    result_id += 1
+                if finished:
+                    collect_deltas(deltas, status, processing_time, detection_data,
+                                   "성공" if detection_data is not None else None, created_at)
+                request_id += 1
+
+            with engine.begin() as conn:
+                self._insert(conn, AnalysisRequest.__table__, requests)
+                self._insert(conn, AnalysisResult.__table__, results)
+                self._insert(conn, Detection.__table__, detections)
+                apply_deltas(conn, deltas)
+                self._sync_sequences(conn)
+
+            totals["requests"] += len(requests)
+            totals["results"] += len(results)
+            totals["detections"] += len(detections)
+            print(f"  📈 요청 {totals['requests']}/{count}건 적재 (결과 {totals['results']}, 감지 {totals['detections']})")
+        return dict(totals)
+
+
+def generate(users: int, requests: int, days: int = 365, batch_size: int = DEFAULT_BATCH_SIZE,
+             seed: int = 42) -> Dict[str, int]:
+    """
+    합성 데이터 적재 - 새 사용자 users명 + 분석 요청 requests건
+    (요청은 기존 합성 사용자를 포함한 전체 합성 사용자에게 분배)
+    """
+    started = time.perf_counter()
+    generator = SyntheticDataGenerator(seed=seed, days=days, batch_size=batch_size)
+    print(f"🔄 합성 데이터 생성 시작 (사용자 {users}명, 요청 {requests}건, 최근 {days}일, "
+          f"{'COPY' if generator.use_copy else 'INSERT'} 배치 {batch_size})")
+
+    if users > 0:
+        generator.generate_users(users)
+    # 요청은 이전 실행에서 만든 합성 사용자까지 포함해 분배
+    with engine.connect() as conn:
+        user_ids = list(conn.execute(
+            select(User.id).where(User.username.like("synth_user_%")).order_by(User.id)
+        ).scalars())
+    if requests > 0 and not user_ids:
+        raise RuntimeError("요청을 추가할 합성 사용자가 없습니다 (--users 지정)")
+
+    totals = generator.generate_requests(requests, user_ids) if requests > 0 else {}
+    totals["users"] = users
+    elapsed = time.perf_counter() - started
+    print(f"✅ 합성 데이터 생성 완료 ({elapsed:.1f}초): {totals}")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="규모 테스트용 합성 데이터 대량 적재")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365, help="created_at을 분포시킬 기간 (일)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.users, args.requests, args.days, args.batch_size, args.seed)
@@ -0,0 +1,421 @@
+import argparse
+import enum
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from .database import engine
+from .models import AnalysisRequest, AnalysisResult, Detection, AnalysisType, RequestStatus
+from .detections import detection_catalog
+from .rollups import collect_deltas, apply_deltas
+
+# 쓰기 지연(write-behind) 설정 (환경 변수로 조정)
+WRITE_BEHIND_ENABLED = os.getenv("ANALYSIS_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200"))      # N건마다 flush
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "200"))          # 또는 T밀리초마다 flush
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "5000"))       # 큐 최대 길이
+WRITE_BEHIND_BACKPRESSURE_MS = int(os.getenv("WRITE_BEHIND_BACKPRESSURE_MS", "500"))
+WRITE_BEHIND_ID_BLOCK = int(os.getenv("WRITE_BEHIND_ID_BLOCK", "100"))          # 한 번에 예약할 요청 ID 수
+# async: 큐에 넣고 바로 반환 (프로세스 비정상 종료 시 미반영분 유실 가능)
+# batch: 자신이 포함된 배치가 커밋될 때까지 대기 (그룹 커밋)
+WRITE_BEHIND_DURABILITY = os.getenv("WRITE_BEHIND_DURABILITY", "async").lower()
+# 일시적 오류(연결 끊김, 잠금 대기 초과 등) 재시도 횟수와 첫 대기 시간 (재시도마다 2배)
+WRITE_BEHIND_RETRIES = int(os.getenv("WRITE_BEHIND_RETRIES", "3"))
+WRITE_BEHIND_RETRY_BACKOFF_MS = int(os.getenv("WRITE_BEHIND_RETRY_BACKOFF_MS", "100"))
+# 재시도/분할 후에도 저장하지 못한 행을 보관하는 파일 (JSON Lines, --replay로 다시 저장)
+_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WRITE_BEHIND_DEAD_LETTER_PATH = os.getenv(
+    "WRITE_BEHIND_DEAD_LETTER_PATH", os.path.join(_SERVER_DIR, "dead_letter", "write_behind.jsonl")
+)
+
+_STOP = object()
+
+
+class RequestIdAllocator:
+    """analysis_requests ID 블록 사전 예약 (flush 전에 요청 ID를 응답하기 위함)
+
+    PostgreSQL 시퀀스에서 블록 단위로 nextval을 받으므로 여러 워커/스크립트가 안전하게 공유합니다.
+    시퀀스가 없는 DB(SQLite 등)에서는 다른 writer와 ID가 겹치므로 지원하지 않습니다.
+    """
+
+    def __init__(self, block_size: int = WRITE_BEHIND_ID_BLOCK):
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._ids: List[int] = []
+
+    def next_id(self) -> int:
+        with self._lock:
+            if not self._ids:
+                self._ids = self._reserve_block()
+            return self._ids.pop(0)
+
+    def _reserve_block(self) -> List[int]:
+        if engine.dialect.name != "postgresql":
+            raise RuntimeError("write-behind 요청 ID 예약은 PostgreSQL 시퀀스가 필요합니다")
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT nextval(pg_get_serial_sequence('analysis_requests', 'id')) "
+                     "FROM generate_series(1, :n)"),
+                {"n": self.block_size}
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+class AnalysisWriteBehind:
+    """분석 요청/결과 행을 모아 다건 INSERT로 저장하는 백그라운드 큐
+
+    - 배치 크기(N) 또는 flush 주기(T) 중 먼저 도달하는 조건으로 flush
+    - 큐가 가득 차면 생산자를 잠시 대기시키고(backpressure), 그래도 안 되면 동기 저장으로 전환
+    - 저장 실패: 일시적 오류는 백오프 재시도, 그 외에는 배치를 반씩 나눠 문제 행만 격리하고
+      끝까지 실패한 행은 dead-letter 파일에 남김 (python -m app.database.write_behind --replay)
+    - stop(drain=True)로 종료 시 남은 행을 모두 저장
+    - PostgreSQL 전용 (시퀀스로 요청 ID 예약). PROCESSING 중인 요청은 finish() 전까지 메모리에만 있으므로
+      프로세스가 비정상 종료되면 처리 중이던 요청은 기록되지 않음
+    """
+
+    def __init__(self, batch_size: int = WRITE_BEHIND_BATCH_SIZE, flush_ms: int = WRITE_BEHIND_FLUSH_MS,
+                 max_queue: int = WRITE_BEHIND_MAX_QUEUE, durability: str = WRITE_BEHIND_DURABILITY,
+                 enabled: bool = WRITE_BEHIND_ENABLED, dead_letter_path: str = WRITE_BEHIND_DEAD_LETTER_PATH):
+        if durability not in ("async", "batch"):
+            raise ValueError("WRITE_BEHIND_DURABILITY는 async 또는 batch여야 합니다")
+        if enabled and engine.dialect.name != "postgresql":
+            print(f"⚠️ write-behind는 PostgreSQL에서만 사용할 수 있습니다 ({engine.dialect.name}) - 바로 저장으로 동작")
+            enabled = False
+
+        self.enabled = enabled
+        self.dead_letter_path = dead_letter_path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(1, flush_ms) / 1000
+        self.durability = durability
+        self.ids = RequestIdAllocator()
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, max_queue))
+        self._pending: Dict[int, dict] = {}     # start() 이후 완료/실패를 기다리는 요청
+        self._pending_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # 관측용 카운터
+        self.flushed_rows = 0
+        self.flush_count = 0
+        self.sync_fallbacks = 0
+        self.retries = 0
+        self.dead_lettered = 0
+        self._dead_letter_lock = threading.Lock()
+
+    # ----- 요청 수명주기 (AnalysisUnitOfWork에서 호출) -----
+
+    def begin(self, user_id: int, image_url: str, analysis_type) -> int:
+        """요청 ID 예약 후 최종 상태가 정해질 때까지 메모리에 보관"""
+        request_id = self.ids.next_id()
+        with self._pending_lock:
+            self._pending[request_id] = {
+                "id": request_id,
+                "user_id": user_id,
+                "image_url": image_url,
+                "analysis_type": analysis_type,
+                "created_at": datetime.now(timezone.utc)
+            }
+        return request_id
+
+    def finish(self, request_id: int, status, processing_time: Optional[int] = None,
+               result_row: Optional[dict] = None, wait: bool = True) -> Future:
+        """begin()한 요청을 최종 상태로 큐에 넣음"""
+        with self._pending_lock:
+            request_row = self._pending.pop(request_id, None)
+        if request_row is None:
+            raise KeyError(f"시작되지 않은 요청 ID: {request_id}")
+        request_row.update(status=status, processing_time=processing_time)
+        return self.submit(request_row, result_row, wait)
+
+    def submit(self, request_row: dict, result_row: Optional[dict] = None, wait: bool = True) -> Future:
+        """요청(+결과) 행을 큐에 넣음
+
+        durability=batch이고 wait=True면 커밋까지 대기합니다.
+        비동기 호출자는 wait=False로 받은 Future를 asyncio.wrap_future()로 await합니다.
+        """
+        self._ensure_started()
+        if result_row is not None:
+            result_row = dict(result_row, request_id=request_row["id"])
+            result_row.setdefault("created_at", request_row.get("created_at"))
+            result_row.setdefault("request_created_at", request_row.get("created_at"))
+
+        future: Future = Future()
+        item = (request_row, result_row, future)
+        try:
+            self._queue.put(item, timeout=WRITE_BEHIND_BACKPRESSURE_MS / 1000)
+        except queue.Full:
+            # 큐가 가득 참 → 호출자 스레드에서 직접 저장 (자연스러운 backpressure)
+            # 호출자가 Future를 기다리지 않더라도(wait=False) 저장 실패는 여기서 호출자에게 전달
+            self.sync_fallbacks += 1
+            self._write_batch([item])
+            future.result()
+
+        if wait and self.durability == "batch":
+            future.result()
+        return future
+
+    # ----- 수명주기 관리 -----
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="analysis-write-behind", daemon=True)
+                self._thread.start()
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 30.0):
+        """flush 스레드 종료 (drain=True면 남은 행을 모두 저장)"""
+        if self._thread is None:
+            return
+        if not drain:
+            self._discard_queue()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "durability": self.durability,
+            "queue_depth": self.queue_depth(),
+            "pending_requests": len(self._pending),
+            "flushed_rows": self.flushed_rows,
+            "flush_count": self.flush_count,
+            "sync_fallbacks": self.sync_fallbacks,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+            "dead_letter_path": self.dead_letter_path
+        }
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+    def _run(self):
+        while True:
+            batch, stop = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+            if stop:
+                return
+
+    def _collect_batch(self) -> Tuple[list, bool]:
+        """배치 크기에 도달하거나 flush 주기가 지날 때까지 큐에서 수집"""
+        batch = []
+        first = self._queue.get()
+        if first is _STOP:
+            return batch, True
+        batch.append(first)
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # 종료 신호 이후 남은 항목까지 모두 저장
+                batch.extend(self._drain_nowait())
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _drain_nowait(self) -> list:
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not _STOP:
+                items.append(item)
+
+    def _discard_queue(self):
+        """drain 없이 종료 - 저장하지 않은 행은 버리지 않고 dead-letter 파일에 남김"""
+        for request_row, result_row, future in self._drain_nowait():
+            error = RuntimeError("write-behind 큐가 drain 없이 종료되었습니다")
+            self._dead_letter(request_row, result_row, error)
+            future.set_exception(error)
+
+    def _write_batch(self, batch: list):
+        """
+        배치 저장 후 각 Future에 결과 전달
+        1) 일시적 오류는 WRITE_BEHIND_RETRIES회까지 백오프 후 배치 전체 재시도
+        2) 그래도 실패하면 반씩 나눠 저장 (정상 행은 저장되고 문제 행만 남음)
+        3) 1건까지 나눠도 실패한 행은 dead-letter 파일에 기록하고 Future에 예외 전달
+        """
+        error = self._write_with_retry(batch)
+        if error is None:
+            for _, _, future in batch:
+                future.set_result(True)
+            return
+
+        if len(batch) > 1:
+            print(f"⚠️ write-behind 배치 저장 실패 ({len(batch)}건) - 나눠서 재시도: {_first_line(error)}")
+            middle = len(batch) // 2
+            self._write_batch(batch[:middle])
+            self._write_batch(batch[middle:])
+            return
+
+        request_row, result_row, future = batch[0]
+        self._dead_letter(request_row, result_row, error)
+        future.set_exception(error)
+
+    def _write_with_retry(self, batch: list) -> Optional[Exception]:
+        """저장 성공 시 None, 실패 시 마지막 예외 (연결/잠금 같은 일시적 오류만 재시도)"""
+        delay = WRITE_BEHIND_RETRY_BACKOFF_MS / 1000
+        for attempt in range(WRITE_BEHIND_RETRIES + 1):
+            try:
+                self._write_rows(batch)
+                return None
+            except Exception as e:
+                transient = isinstance(e, OperationalError) or (
+                    isinstance(e, DBAPIError) and e.connection_invalidated
+                )
+                if not transient or attempt == WRITE_BEHIND_RETRIES:
+                    return e
+                self.retries += 1
+                time.sleep(delay)
+                delay *= 2
+
+    def _write_rows(self, batch: list):
+        """요청/결과/감지 행을 각각 다건 INSERT 1회로 저장 + 롤업 갱신 (트랜잭션 1개)"""
+        request_rows = [request_row for request_row, _, _ in batch]
+        result_rows = [result_row for _, result_row, _ in batch if result_row is not None]
+        detection_rows = []
+        with engine.begin() as conn:
+            conn.execute(insert(AnalysisRequest.__table__), request_rows)
+            if result_rows:
+                # 감지 행에 넣을 결과 ID를 RETURNING으로 받음 (입력 순서 보장)
+                result_table = AnalysisResult.__table__
+                result_ids = conn.execute(
+                    insert(result_table).returning(result_table.c.id, sort_by_parameter_order=True),
+                    result_rows
+                ).scalars().all()
+
+                detection_catalog.load(conn)
+                for result_row, result_id in zip(result_rows, result_ids):
+                    detection_rows.extend(detection_catalog.rows(
+                        result_row.get("detection_data"), result_row["request_id"],
+                        result_id, result_row.get("created_at"), result_row.get("request_created_at")
+                    ))
+                if detection_rows:
+                    conn.execute(insert(Detection.__table__), detection_rows)
+
+            # 배치 전체의 통계 롤업 증가분을 UPSERT 1회로 반영
+            deltas = Counter()
+            for request_row, result_row, _ in batch:
+                result_row = result_row or {}
+                collect_deltas(deltas, request_row["status"], request_row.get("processing_time"),
+                               result_row.get("detection_data"), result_row.get("processing_status"),
+                               request_row.get("created_at"))
+            apply_deltas(conn, deltas)
+
+        self.flushed_rows += len(request_rows) + len(result_rows) + len(detection_rows)
+        self.flush_count += 1
+
+    # ----- 저장 실패 행 보관/재처리 -----
+
+    def _dead_letter(self, request_row: dict, result_row: Optional[dict], error: Exception):
+        entry = {
+            "failed_at": datetime.now(timezone.utc).isoformat(),
+            "error": f"{type(error).__name__}: {error}",
+            "request": _encode_row(request_row),
+            "result": _encode_row(result_row) if result_row is not None else None
+        }
+        with self._dead_letter_lock:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or ".", exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self.dead_lettered += 1
+        print(f"❌ write-behind 저장 실패 - 요청 {request_row.get('id')}를 {self.dead_letter_path}에 보관: "
+              f"{_first_line(error)}")
+
+    def replay_dead_letters(self) -> Tuple[int, int]:
+        """dead-letter 파일의 행을 1건씩 다시 저장 - (저장 수, 남은 수) 반환, 실패한 행만 파일에 남김"""
+        if not os.path.exists(self.dead_letter_path):
+            return 0, 0
+        with self._dead_letter_lock:
+            replaying = self.dead_letter_path + ".replaying"
+            os.replace(self.dead_letter_path, replaying)
+
+        saved = remaining = 0
+        with open(replaying, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                request_row = _decode_row(entry["request"])
+                result_row = _decode_row(entry["result"]) if entry.get("result") is not None else None
+                error = self._write_with_retry([(request_row, result_row, None)])
+                if error is None:
+                    saved += 1
+                else:
+                    self._dead_letter(request_row, result_row, error)
+                    remaining += 1
+        os.remove(replaying)
+        return saved, remaining
+
+
+def _first_line(error: Exception) -> str:
+    """로그용 예외 요약 (SQLAlchemy 예외 메시지에 붙는 SQL/파라미터 제외)"""
+    return f"{type(error).__name__}: {str(error).splitlines()[0] if str(error) else ''}"
+
+
+_DATETIME_FIELDS = ("created_at", "request_created_at")
+_ENUM_FIELDS = {"analysis_type": AnalysisType, "status": RequestStatus}
+
+
+def _encode_row(row: dict) -> dict:
+    encoded = {}
+    for key, value in row.items():
+        if isinstance(value, enum.Enum):
+            value = value.name
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        encoded[key] = value
+    return encoded
+
+
+def _decode_row(row: dict) -> dict:
+    decoded = dict(row)
+    for key in _DATETIME_FIELDS:
+        if isinstance(decoded.get(key), str):
+            decoded[key] = datetime.fromisoformat(decoded[key])
+    for key, enum_type in _ENUM_FIELDS.items():
+        if isinstance(decoded.get(key), str):
+            decoded[key] = enum_type[decoded[key]]
+    return decoded
+
+
+# 전역 write-behind 인스턴스 (ANALYSIS_WRITE_BEHIND=true일 때만 사용)
+write_behind = AnalysisWriteBehind()
+
+
+if __name__ == "__main__":
+    # 실행: python -m app.database.write_behind --replay (WeCanFarm_Server 디렉토리에서)
+    parser = argparse.ArgumentParser(description="write-behind 저장 실패 행 재처리")
+    parser.add_argument("--replay", action="store_true", help="dead-letter 파일의 행을 다시 저장")
+    parser.add_argument("--path", default=WRITE_BEHIND_DEAD_LETTER_PATH, help="dead-letter 파일 경로")
+    args = parser.parse_args()
+
+    if args.replay:
+        saved, remaining = AnalysisWriteBehind(enabled=False, dead_letter_path=args.path).replay_dead_letters()
+        print(f"✅ dead-letter 재처리: 저장 {saved}건, 남은 행 {remaining}건")
+    else:
+        parser.print_help()
@@ -1,8 +1,17 @@
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
-from .routers import analyze, admin, auth
+from .routers import analyze, admin, auth, history
+from .database.write_behind import write_behind
+from .auth.password_hasher import password_hasher
+from .database.partitioning import ensure_partitions
+from .database.pool_metrics import current_endpoint, record_request
+from .utils.logging_config import setup_logging, shutdown_logging
+
+# app.* 로거: 요청 스레드는 큐에 넣기만 하고 출력은 백그라운드 스레드 (LOG_LEVEL, LOG_LEVELS, LOG_FORMAT)
+setup_logging()
 
 # FastAPI 앱 생성
 app = FastAPI(
@@ -22,11 +31,59 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 커넥션 풀 계측용 - 요청 중에 checkout된 커넥션/실행한 쿼리를 엔드포인트별로 집계
+# (@app.middleware("http")는 receive를 감싸 request.is_disconnected()가 연결 종료를 못 보므로 순수 ASGI 미들웨어로 작성)
+class TagPoolEndpoint:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        endpoint = f"{scope['method']} {scope['path']}"
+        record_request(endpoint)
+        token = current_endpoint.set(endpoint)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_endpoint.reset(token)
+
+app.add_middleware(TagPoolEndpoint)
+
 # API 라우터 등록
 app.include_router(analyze.router, prefix="/api", tags=["analyze"])
+app.include_router(history.router, prefix="/api", tags=["history"])
 app.include_router(auth.router, prefix="/api")  # tags 제거 (auth.py에서 이미 설정)
 app.include_router(admin.router, tags=["admin"])  # prefix 제거
 
+# 분석 기록 write-behind 큐 (ANALYSIS_WRITE_BEHIND=true일 때만 동작)
+@app.on_event("startup")
+async def start_write_behind():
+    if write_behind.enabled:
+        write_behind.start()
+
+# 월 단위 파티션 미리 생성 (파티션 테이블로 만든 PostgreSQL 배포에서만 동작)
+@app.on_event("startup")
+async def premake_partitions():
+    try:
+        await run_in_threadpool(ensure_partitions)
+    except Exception as e:
+        print(f"⚠️ 파티션 미리 생성 실패: {e}")
+
+@app.on_event("shutdown")
+async def drain_write_behind():
+    """종료 전 큐에 남은 분석 기록을 모두 저장"""
+    write_behind.stop(drain=True)
+
+@app.on_event("shutdown")
+async def stop_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def flush_logs():
+    """큐에 남은 로그 출력 (다른 종료 훅의 로그까지 나가도록 마지막에 등록)"""
+    shutdown_logging()
+
 # 메인 페이지 - 관리자 대시보드로 리다이렉트
 @app.get("/", tags=["redirect"])
 async def root():
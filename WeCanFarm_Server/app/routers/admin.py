@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, and_, or_
 from datetime import datetime, timedelta
 from typing import Dict, Any
 import os
+from starlette.concurrency import run_in_threadpool
 
-from ..database.database import get_db
-from ..database.models import User, AnalysisRequest, AnalysisResult, Crop, Disease, UserRole
+from ..database.replica import replica_router
+from ..database.pool_metrics import pool_snapshot
+from ..auth.user_cache import user_cache
+from ..services.inference_scheduler import inference_scheduler
+from ..services.request_guard import cancellation_stats
+from ..services.profiler import run_profile, ProfilerBusy, PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS
+from ..auth.user_cache import AuthUser
+from .auth import get_admin_user
+from ..database.models import User, UserRole, RequestStatus, StatsRollup
+from ..database.detections import detection_catalog, STATUS_BY_DISEASE_NAME
+from ..database.rollups import to_utc_naive, ALL, DAY, HOUR, REQUESTS, DETECTIONS_CROP, DETECTIONS_DISEASE
+from ..database.latency_stats import latency_percentiles, requests_per_minute, failure_rate_series
+from ..services.stats_cache import StatsCache, CachedStats, etag_matches
 
 router = APIRouter()
 
@@ -18,137 +30,225 @@ TEMPLATE_DIR = os.path.abspath(os.path.join(BASE_DIR, "../templates"))
 templates = Jinja2Templates(directory=TEMPLATE_DIR)
 
 @router.get("/admin/dashboard", response_class=HTMLResponse)
-async def admin_dashboard_page(request: Request, db: Session = Depends(get_db)):
+async def admin_dashboard_page(request: Request):
     """관리자 대시보드 메인 페이지"""
     try:
-        # 통계 데이터 수집
-        stats = get_dashboard_stats(db)
+        # 통계 데이터 수집 (캐시)
+        cached = await dashboard_stats_cache.get()
+        if etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=_cache_headers(cached))
         
         return templates.TemplateResponse("admin_dashboard.html", {
             "request": request,
-            "stats": stats
-        })
+            "stats": cached.value,
+            "stats_etag": cached.etag
+        }, headers=_cache_headers(cached))
     except Exception as e:
         # admin_dashboard.html만 남기고 error.html은 제거했으므로 JSON 응답
-        return {
+        return JSONResponse({
             "error": f"대시보드 로딩 실패: {str(e)}",
             "status": "error"
-        }
+        })
 
 @router.get("/admin/dashboard/api")
-async def get_dashboard_stats_api(db: Session = Depends(get_db)):
-    """대시보드 통계 데이터 API (AJAX용)"""
+async def get_dashboard_stats_api(request: Request):
+    """대시보드 통계 데이터 API (AJAX용, If-None-Match 지원)"""
     try:
-        stats = get_dashboard_stats(db)
-        return {"success": True, "data": stats}
+        cached = await dashboard_stats_cache.get()
     except Exception as e:
         return {"success": False, "error": str(e)}
+    return _cached_json_response(request, cached, {"success": True, "data": cached.value})
 
 @router.get("/admin/stats")
-async def get_admin_stats(db: Session = Depends(get_db)):
-    """관리자 통계 API (안드로이드 앱용)"""
+async def get_admin_stats(request: Request):
+    """관리자 통계 API (안드로이드 앱용, If-None-Match 지원)"""
     try:
-        stats = get_dashboard_stats(db)
-        return {
-            "success": True,
-            "data": stats,
-            "message": "통계 조회 성공"
-        }
+        cached = await dashboard_stats_cache.get()
     except Exception as e:
         return {
             "success": False,
             "error": str(e),
             "message": "통계 조회 실패"
         }
+    return _cached_json_response(request, cached, {
+        "success": True,
+        "data": cached.value,
+        "message": "통계 조회 성공"
+    })
+
+@router.get("/admin/db/pools")
+async def get_pool_stats(admin: AuthUser = Depends(get_admin_user)):
+    """
+    DB 커넥션 풀 계측값 - 관리자 전용 (풀별 checkout 대기/점유 시간, 엔드포인트별 사용량, 현재 점유 중인 엔드포인트)
+    - analysis: 분석 저장/인증, reporting: 관리자 통계/이력 (복제본이 없을 때), sync: write-behind/스크립트
+    - auth_user_cache: 인증 사용자 캐시 적중률 (db_lookups_per_auth = 인증 1회당 DB 조회 수)
+    """
+    return {"success": True, "data": {
+        "pools": pool_snapshot(),
+        "replica": replica_router.status(),
+        "auth_user_cache": user_cache.stats()
+    }}
+
+@router.get("/admin/inference/queue")
+async def get_inference_queue_stats(admin: AuthUser = Depends(get_admin_user)):
+    """
+    추론 스케줄러 상태 - 관리자 전용 (역할별 대기 수, 대기 시간, 기아 방지로 먼저 실행된 수)
+    - cancellations: 파이프라인별 단계 평균 소요 시간, 연결 종료/제한 시간 초과로 건너뛴 건수와 아낀 시간 추정
+    - INFERENCE_WEIGHT_*: 역할별 가중치, INFERENCE_MAX_WAIT_MS: 기아 방지 기준
+    """
+    return {"success": True, "data": {
+        **inference_scheduler.stats(),
+        "cancellations": cancellation_stats.snapshot()
+    }}
+
+@router.get("/admin/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=PROFILER_MAX_SECONDS),
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed|summary)$"),
+    interval_ms: float = Query(PROFILER_INTERVAL_MS, ge=1, le=1000),
+    memory: bool = False,
+    include_idle: bool = False,
+    top: int = Query(20, ge=1, le=200),
+    admin: AuthUser = Depends(get_admin_user)
+):
+    """
+    이 요청을 받은 워커 프로세스를 seconds 동안 샘플링 프로파일링 (관리자 전용, 워커당 한 번에 1개)
+    - speedscope: https://www.speedscope.app 에 그대로 올리는 JSON / collapsed: flamegraph.pl 입력 / summary: 함수별 상위 목록
+    - memory=true: tracemalloc으로 이미지 파이프라인(routers/services/utils)의 할당 위치 상위 top개 포함 (speedscope/summary)
+    - include_idle=true: 대기 중인 스레드(스레드 풀 유휴 워커, 이벤트 루프 select)도 포함
+    """
+    if memory and format == "collapsed":
+        raise HTTPException(status_code=400, detail="memory는 speedscope/summary 형식에서만 지원합니다")
+    try:
+        profile = await run_profile(seconds, interval_ms=interval_ms, include_idle=include_idle,
+                                    memory=memory, memory_top=top)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="이 워커에서 이미 프로파일링 중입니다")
 
-def get_dashboard_stats(db: Session) -> Dict[str, Any]:
-    """대시보드 통계 데이터 수집 (기존과 동일)"""
+    # 스택이 많으면 변환에 수십 ms가 걸릴 수 있으므로 스레드 풀에서
+    headers = {"X-Profile-Pid": str(profile.pid)}
+    if format == "collapsed":
+        return Response(await run_in_threadpool(profile.collapsed), media_type="text/plain; charset=utf-8",
+                        headers=headers)
+    if format == "summary":
+        return {"success": True, "data": await run_in_threadpool(profile.summary, top)}
+    headers["Content-Disposition"] = f'attachment; filename="wecanfarm-{profile.pid}.speedscope.json"'
+    return JSONResponse(await run_in_threadpool(profile.speedscope), headers=headers)
+
+def _cache_headers(cached: CachedStats) -> Dict[str, str]:
+    # no-cache: 브라우저가 저장은 하되 매번 ETag로 재검증
+    return {"ETag": cached.etag, "Age": str(cached.age()), "Cache-Control": "private, no-cache"}
+
+def _cached_json_response(request: Request, cached: CachedStats, content: Dict[str, Any]) -> Response:
+    """내용이 같으면(If-None-Match 일치) 본문 없이 304 응답"""
+    headers = _cache_headers(cached)
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content, headers=headers)
+
+async def _load_dashboard_stats() -> Dict[str, Any]:
+    """캐시 갱신용 - 요청 세션과 무관하게 자체 세션으로 조회 (읽기 복제본 우선, 백그라운드 갱신 지원)"""
+    return await replica_router.run(get_dashboard_stats)
+
+# 관리자 통계 캐시 (ADMIN_STATS_CACHE_TTL / ADMIN_STATS_CACHE_MAX_STALE)
+dashboard_stats_cache = StatsCache(_load_dashboard_stats)
+
+async def get_dashboard_stats(db: AsyncSession) -> Dict[str, Any]:
+    """
+    대시보드 통계 데이터 수집 (사용자 집계 1회 + 통계 롤업 조회 1회 + 처리 시간/처리량 조회)
+    - 처리 시간 백분위와 분당 요청 수는 analysis_requests에서 created_at 범위로 조회 (latency_stats 참고)
+    """
     
-    # 현재 시간 기준
+    # 현재 시간 기준 (분석 통계는 UTC 일 단위 롤업 구간 기준)
     now = datetime.now()
     last_30_days = now - timedelta(days=30)
-    today = now.date()
+    utc_now = to_utc_naive(None)
+    today = utc_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    rollup_30d_start = today - timedelta(days=29)
+    rollup_24h_start = utc_now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
     
-    # 1. 사용자 통계
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    new_users_30d = db.query(User).filter(User.created_at >= last_30_days).count()
+    # 1. 사용자 통계 - users 테이블을 한 번만 스캔하는 조건부 집계
+    users = (await db.execute(select(
+        func.count().label("total_users"),
+        func.count().filter(User.is_active == True).label("active_users"),
+        func.count().filter(User.created_at >= last_30_days).label("new_users_30d"),
+        *[func.count().filter(User.role == role).label(role.value) for role in UserRole]
+    ))).one()
     
-    # 사용자 유형별 통계
-    user_types = db.query(
-        User.role, 
-        func.count(User.id).label('count')
-    ).group_by(User.role).all()
+    # 사용자 유형별 통계 (등록된 사용자가 있는 유형만)
+    user_type_stats = {
+        role.value: users._mapping[role.value]
+        for role in UserRole if users._mapping[role.value] > 0
+    }
     
-    user_type_stats = {}
-    for role, count in user_types:
-        user_type_stats[role.value] = count
+    # 2~4. 분석/작물/질병 통계 - 원본 대신 전체 누적 + 최근 30일 일별 롤업만 조회
+    rollup_rows = (await db.execute(
+        select(StatsRollup.granularity, StatsRollup.bucket_start, StatsRollup.metric,
+               StatsRollup.dimension, StatsRollup.count)
+        .where(
+            or_(
+                StatsRollup.granularity == ALL,
+                and_(StatsRollup.granularity == DAY, StatsRollup.bucket_start >= rollup_30d_start,
+                     StatsRollup.metric == REQUESTS),
+                and_(StatsRollup.granularity == HOUR, StatsRollup.bucket_start >= rollup_24h_start,
+                     StatsRollup.metric == REQUESTS)
+            )
+        )
+    )).all()
     
-    # 2. 분석 통계
-    total_analyses = db.query(AnalysisRequest).count()
-    analyses_30d = db.query(AnalysisRequest).filter(
-        AnalysisRequest.created_at >= last_30_days
-    ).count()
+    # 작물/질병 버킷은 crops/diseases 테이블 기준 (캐시된 카탈로그, 최초 1회만 조회)
+    await db.run_sync(detection_catalog.load)
+    crop_analysis_stats = {name: 0 for name in detection_catalog.crop_names()}
+    disease_stats = {
+        STATUS_BY_DISEASE_NAME.get(name, name): 0 for name in detection_catalog.disease_names()
+    }
     
-    # 오늘 분석 수
-    today_analyses = db.query(AnalysisRequest).filter(
-        func.date(AnalysisRequest.created_at) == today
-    ).count()
-    
-    # 분석 통계를 위한 완료된 결과 조회
-    completed_results = db.query(AnalysisResult).filter(
-        AnalysisResult.processing_status == "성공"
-    ).all()
-    
-    # 3. 작물별 분석량 - 실제 DB 데이터에서 계산
-    crop_analysis_stats = {"pepper": 0, "tomato": 0, "cucumber": 0}
-    
-    # 완료된 분석 결과에서 작물별 감지 횟수 계산
-    for result in completed_results:
-        if result.detection_data and isinstance(result.detection_data, list):
-            for detection in result.detection_data:
-                crop_type = detection.get('crop_type', '')
-                if crop_type in crop_analysis_stats:
-                    crop_analysis_stats[crop_type] += 1
-    
-    # 4. 질병 감지율 - 실제 DB 데이터에서 계산
+    total_analyses = 0
+    completed_requests = 0
+    analyses_30d = 0
+    today_analyses = 0
     total_detections = 0
     normal_detections = 0
-    disease_detections = 0
-    disease_stats = {"정상": 0, "고추점무늬병": 0, "고추마일드모틀바이러스": 0}
-    
-    for result in completed_results:
-        if result.detection_data and isinstance(result.detection_data, list):
-            for detection in result.detection_data:
-                total_detections += 1
-                disease_status = detection.get('disease_status', '')
-                
-                if disease_status == '정상':
-                    normal_detections += 1
-                    disease_stats["정상"] += 1
-                elif disease_status == '고추점무늬병':
-                    disease_detections += 1
-                    disease_stats["고추점무늬병"] += 1
-                elif disease_status == '고추마일드모틀바이러스':
-                    disease_detections += 1
-                    disease_stats["고추마일드모틀바이러스"] += 1
-                else:
-                    # 기타 질병도 질병으로 분류
-                    disease_detections += 1
+    for granularity, bucket_start, metric, dimension, count in rollup_rows:
+        if granularity == HOUR:
+            continue  # 실패율 추이에서만 사용
+        if granularity == DAY:
+            analyses_30d += count
+            if bucket_start == today:
+                today_analyses += count
+        elif metric == REQUESTS:
+            total_analyses += count
+            if dimension == RequestStatus.COMPLETED.value:
+                completed_requests += count
+        elif metric == DETECTIONS_CROP:
+            if dimension in crop_analysis_stats:
+                crop_analysis_stats[dimension] += count
+        elif metric == DETECTIONS_DISEASE:
+            total_detections += count
+            if dimension in disease_stats:
+                disease_stats[dimension] += count
+            if dimension == "정상":
+                normal_detections += count
+    # 정상이 아닌 감지는 (기타 질병 포함) 모두 질병으로 분류
+    disease_detections = total_detections - normal_detections
     
     # 5. 성공률 계산
-    total_requests = db.query(AnalysisRequest).count()
-    completed_requests = db.query(AnalysisRequest).filter(
-        AnalysisRequest.status == "COMPLETED"
-    ).count()
+    success_rate = (completed_requests / total_analyses * 100) if total_analyses > 0 else 0
     
-    success_rate = (completed_requests / total_requests * 100) if total_requests > 0 else 0
+    # 6. 처리 시간 백분위 / 분당 요청 수 / 실패율 추이 (실패율은 위에서 읽은 롤업 재사용)
+    latency = await latency_percentiles(db, utc_now)
+    throughput = await requests_per_minute(db, utc_now)
+    failure_rate = failure_rate_series(
+        [(granularity, bucket_start, dimension, count)
+         for granularity, bucket_start, metric, dimension, count in rollup_rows if granularity != ALL],
+        utc_now
+    )
     
     return {
         "user_stats": {
-            "total_users": total_users,
-            "active_users": active_users,
-            "new_users_30d": new_users_30d,
+            "total_users": users.total_users,
+            "active_users": users.active_users,
+            "new_users_30d": users.new_users_30d,
             "user_types": user_type_stats
         },
         "analysis_stats": {
@@ -164,5 +264,8 @@ def get_dashboard_stats(db: Session) -> Dict[str, Any]:
             "normal_rate": round((normal_detections / total_detections * 100) if total_detections > 0 else 0, 1),
             "disease_rate": round((disease_detections / total_detections * 100) if total_detections > 0 else 0, 1)
         },
+        "latency_stats": latency,
+        "throughput": throughput,
+        "failure_rate": failure_rate,
         "last_updated": now.strftime("%Y-%m-%d %H:%M:%S")
-    }
\ No newline at end of file
+    }
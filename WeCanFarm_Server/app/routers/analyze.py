@@ -1,208 +1,440 @@
 from fastapi import APIRouter, HTTPException, Request, Depends
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
+import logging
+import os
 import time
-from datetime import datetime
 
 from ..schemas.request_response import (
     AnalyzeRequest, 
     AnalyzeResponse, 
     SingleAnalyzeResponse,
-    DetectionResult
+    BurstAnalyzeRequest,
+    BurstAnalyzeResponse
 )
-from ..utils.image_handler import decode_base64_to_image, image_to_base64
-from ..services.pipeline import process_image_pipeline, process_single_crop_analysis
-from ..database.database import get_db
-from ..database.models import (
-    AnalysisRequest as DBAnalysisRequest, 
-    AnalysisResult as DBAnalysisResult,
-    AnalysisType, 
-    RequestStatus,
-    AnalysisRequestCRUD,
-    AnalysisResultCRUD,
-    User
+from ..utils.image_handler import decode_base64_to_image, decode_base64_to_video_frames, image_to_base64
+from ..services.pipeline import (
+    process_image_pipeline,
+    process_single_crop_analysis,
+    detect_objects,
+    classify_detections,
+    process_frame_burst
 )
+from ..utils.image_handler import validate_image
+from ..database.database import get_async_db, AsyncSessionLocal, release_connection
+from ..database.models import AnalysisType
+from ..database.async_crud import AsyncAnalysisUnitOfWork
 # JWT 인증 import (routers/auth.py에서 가져오기)
-from .auth import get_current_user
+from .auth import rate_limited_user
+from ..auth.user_cache import AuthUser
+from ..auth.rate_limit import RATE_LIMIT_BURST_COST
+from ..services.inference_scheduler import inference_scheduler
+from ..services.request_guard import RequestGuard, AnalysisCancelled
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 버스트/영상 분석 1회당 최대 프레임 수
+BURST_MAX_FRAMES = int(os.getenv("BURST_MAX_FRAMES", "120"))
+
+# 엔드포인트별 단계 (RequestGuard가 각 단계 시작 전에 연결 종료/제한 시간 확인)
+ANALYZE_STAGES = ("queue", "yolo", "resnet", "encode", "save")
+STREAM_STAGES = ("queue", "yolo", "resnet", "save")
+BURST_STAGES = ("queue", "yolo", "resnet", "save")
+SINGLE_STAGES = ("queue", "resnet", "save")
+
+async def _cancel_analysis(db: AsyncSession, request_id: int, cancelled: AnalysisCancelled,
+                           start_time: float) -> HTTPException:
+    """취소된 요청을 FAILED(사유 포함)로 기록하고 응답할 예외 반환"""
+    logger.warning("⚠️ [CANCEL] 분석 요청 %s - %s", request_id, cancelled,
+                   extra={"request_id": request_id, "reason": cancelled.reason, "stage": cancelled.stage})
+    try:
+        await AsyncAnalysisUnitOfWork.cancel(
+            db, request_id, cancelled.processing_status, int((time.time() - start_time) * 1000)
+        )
+    except Exception as e:
+        logger.error("❌ [CANCEL] 취소 기록 실패: %s", e, extra={"request_id": request_id})
+    return HTTPException(status_code=cancelled.status_code, detail=str(cancelled))
+
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_image(
     req: AnalyzeRequest,
     request: Request,  # Request 추가 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthUser = Depends(rate_limited_user())
 ):
-    
-    print("🔍 [AUTH DEBUG] === 인증 디버깅 시작 ===")
-    print(f"🔍 [AUTH DEBUG] Authorization 헤더: {request.headers.get('authorization', 'NONE')}")
-    print(f"🔍 [AUTH DEBUG] 현재 사용자: {current_user.username if current_user else 'NONE'}")
-    print(f"🔍 [AUTH DEBUG] 사용자 ID: {current_user.id if current_user else 'NONE'}")
-    print("🔍 [AUTH DEBUG] === 디버깅 끝 ===")
-    
     """
     이미지 분석 API (전체 파이프라인) - JWT 인증 버전
     - YOLO 객체 감지 → ResNet 질병 분류 → 결과 시각화 → DB 저장
     """
     start_time = time.time()
+    guard = RequestGuard.from_request(request, "analyze", ANALYZE_STAGES)
     
     try:
-        print("=" * 50)
-        print(f"🔍 [DEBUG] 새로운 analyze 요청 - 사용자: {current_user.username} (ID: {current_user.id})")
+        logger.debug("🔍 새로운 analyze 요청 - user_id=%s", current_user.id)
         
         # 1. 이미지 디코딩
         try:
             image = decode_base64_to_image(req.image_base64)
-            print(f"✅ [DEBUG] 이미지 변환 성공 - 크기: {image.size}")
+            logger.debug("✅ 이미지 변환 성공 - 크기: %s", image.size)
         except Exception as e:
-            print(f"❌ [DEBUG] 이미지 디코딩 실패: {e}")
+            logger.info("❌ 이미지 디코딩 실패: %s", e)
             raise HTTPException(status_code=400, detail=f"이미지 디코딩 실패: {str(e)}")
 
-        # 2. DB에 분석 요청 저장 (실제 사용자 ID 사용)
+        # 2. DB에 분석 요청 저장 (PROCESSING 상태로 바로 생성, 커밋 1회)
         try:
             temp_image_url = f"user_{current_user.id}_image_{int(time.time())}.jpg"
             
-            db_request = AnalysisRequestCRUD.create(
-                db=db,
+            request_id = await AsyncAnalysisUnitOfWork.start(
+                db,
                 user_id=current_user.id,
                 image_url=temp_image_url,
                 analysis_type=AnalysisType.PIPELINE
             )
-            print(f"✅ [DEBUG] DB 요청 저장 완료 - Request ID: {db_request.id}, User: {current_user.username}")
+            logger.debug("✅ DB 요청 저장 완료 - request_id=%s", request_id)
             
         except Exception as e:
-            print(f"❌ [DEBUG] DB 요청 저장 실패: {e}")
+            logger.error("❌ DB 요청 저장 실패: %s", e)
             raise HTTPException(status_code=500, detail=f"분석 요청 저장 실패: {str(e)}")
 
-        # 3. 요청 상태를 PROCESSING으로 변경
-        try:
-            AnalysisRequestCRUD.update_status(db, db_request.id, RequestStatus.PROCESSING)
-            print("📊 [DEBUG] 상태 변경: PENDING → PROCESSING")
-        except Exception as e:
-            print(f"⚠️ [DEBUG] 상태 업데이트 실패: {e}")
-
-        # 4. 파이프라인 실행
+        # 3. 파이프라인 실행 (추론 동안 DB 커넥션은 풀에 반납, 역할별 우선순위에 따라 추론 슬롯 대기)
+        #    대기 중/단계 사이에 클라이언트가 떠났거나 제한 시간이 지나면 남은 단계와 결과 저장을 건너뜀
+        await release_connection(db)
         try:
-            result = process_image_pipeline(image)
-            print(f"✅ [DEBUG] 파이프라인 실행 완료: {result['processing_status']}")
+            async with guard.watching():
+                async with inference_scheduler.slot(current_user, guard=guard):
+                    result = await run_in_threadpool(process_image_pipeline, image, guard.check)
+                guard.check("save")
+            logger.debug("✅ 파이프라인 실행 완료: %s", result["processing_status"])
+        except AnalysisCancelled as e:
+            raise await _cancel_analysis(db, request_id, e, start_time)
         except Exception as e:
-            AnalysisRequestCRUD.update_status(db, db_request.id, RequestStatus.FAILED)
-            print(f"❌ [DEBUG] 파이프라인 실행 실패: {e}")
+            await AsyncAnalysisUnitOfWork.fail(db, request_id)
+            logger.error("❌ 파이프라인 실행 실패: %s", e, extra={"request_id": request_id})
             raise HTTPException(status_code=500, detail=f"파이프라인 실행 실패: {str(e)}")
 
-        # 5. 처리 시간 계산
+        # 4. 처리 시간 계산
         processing_time_ms = int((time.time() - start_time) * 1000)
         
-        # 6. 처리 결과에 따라 DB 업데이트
+        # 5. 처리 결과에 따라 DB 업데이트 (결과 저장 + 상태 변경을 커밋 1회로)
         if result["processing_status"] == "성공":
             try:
-                db_result = AnalysisResultCRUD.create(
-                    db=db,
-                    request_id=db_request.id,
+                result_id = await AsyncAnalysisUnitOfWork.complete(
+                    db,
+                    request_id=request_id,
                     total_detections=result["total_detections"],
-                    result_image_url=f"user_{current_user.id}_result_{db_request.id}.jpg",
+                    result_image_url=f"user_{current_user.id}_result_{request_id}.jpg",
                     detection_data=result["detections"],
-                    processing_status=result["processing_status"]
+                    processing_status=result["processing_status"],
+                    processing_time=processing_time_ms
                 )
                 
-                AnalysisRequestCRUD.update_status(
-                    db, db_request.id, RequestStatus.COMPLETED, processing_time_ms
-                )
-                
-                print(f"✅ [DEBUG] DB 결과 저장 완료 - Result ID: {db_result.id}")
-                print(f"⏱️ [DEBUG] 처리 시간: {processing_time_ms}ms")
+                logger.info("✅ analyze 완료 - request_id=%s, result_id=%s, 객체 %d개, %dms",
+                            request_id, result_id, result["total_detections"], processing_time_ms,
+                            extra={"request_id": request_id, "user_id": current_user.id,
+                                   "processing_time_ms": processing_time_ms})
                 
             except Exception as e:
-                print(f"❌ [DEBUG] 결과 저장 실패: {e}")
-                AnalysisRequestCRUD.update_status(db, db_request.id, RequestStatus.FAILED)
+                logger.error("❌ 결과 저장 실패: %s", e, extra={"request_id": request_id})
+                await AsyncAnalysisUnitOfWork.fail(db, request_id)
         else:
-            AnalysisRequestCRUD.update_status(
-                db, db_request.id, RequestStatus.FAILED, processing_time_ms
-            )
-            print(f"❌ [DEBUG] 파이프라인 처리 실패: {result['processing_status']}")
+            await AsyncAnalysisUnitOfWork.fail(db, request_id, processing_time_ms)
+            logger.warning("❌ 파이프라인 처리 실패: %s", result["processing_status"], extra={"request_id": request_id})
+        guard.finish()
 
-        # 7. API 응답 생성
+        # 6. API 응답 생성
         try:
             response = AnalyzeResponse(
                 image_base64=result["image_base64"],
                 detections=result["detections"],
                 total_detections=result["total_detections"]
             )
-            print(f"✅ [DEBUG] API 응답 생성 성공 - 사용자: {current_user.username}")
-            print("=" * 50)
             return response
             
         except Exception as e:
-            print(f"❌ [DEBUG] 응답 생성 실패: {e}")
+            logger.error("❌ 응답 생성 실패: %s", e, extra={"request_id": request_id})
             raise HTTPException(status_code=500, detail=f"응답 생성 실패: {str(e)}")
 
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"❌ [DEBUG] 예상치 못한 오류: {e}")
-        if 'db_request' in locals():
+        logger.exception("❌ 예상치 못한 오류: %s", e)
+        if 'request_id' in locals():
             try:
-                AnalysisRequestCRUD.update_status(db, db_request.id, RequestStatus.FAILED)
+                await AsyncAnalysisUnitOfWork.fail(db, request_id)
             except:
                 pass
         raise HTTPException(status_code=500, detail=f"서버 내부 오류: {str(e)}")
 
+@router.post("/analyze/stream")
+async def analyze_image_stream(
+    req: AnalyzeRequest,
+    request: Request,
+    include_image: bool = False,
+    current_user: AuthUser = Depends(rate_limited_user())
+):
+    """
+    이미지 분석 API (스트리밍 버전) - NDJSON으로 단계별 결과 전송
+    - detections: YOLO 감지 직후
+    - classification: ResNet 질병 분류 후
+    - saved: DB 저장 후 (request_id 포함)
+    - complete: 처리 시간 등 요약 (include_image=true면 결과 이미지 포함)
+    - error: 처리 중 오류
+    클라이언트 연결이 끊기면 다음 단계로 넘어가지 않고 중단합니다.
+    """
+    start_time = time.time()
+    
+    # 디코딩 실패는 스트림 시작 전에 400으로 응답
+    try:
+        image = decode_base64_to_image(req.image_base64)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"이미지 디코딩 실패: {str(e)}")
+    
+    if not validate_image(image):
+        raise HTTPException(status_code=400, detail="이미지 유효성 검사 실패")
+    
+    user_id = current_user.id
+    guard = RequestGuard.from_request(request, "stream", STREAM_STAGES)
+    
+    async def event_stream():
+        # 1. YOLO 감지
+        # 단계마다 추론 슬롯을 따로 잡음 (느린 클라이언트에게 보내는 동안 슬롯을 붙잡지 않도록)
+        try:
+            async with inference_scheduler.slot(current_user, guard=guard):
+                await guard.check_async("yolo")
+                yolo_detections = await run_in_threadpool(detect_objects, image)
+        except AnalysisCancelled as e:
+            logger.warning("⚠️ [STREAM] %s - 중단 (user_id=%s)", e, user_id)
+            yield _ndjson("error", {"detail": str(e)})
+            return
+        yield _ndjson("detections", {
+            "detections": yolo_detections,
+            "total_detections": len(yolo_detections)
+        })
+        
+        # 2. ResNet 질병 분류
+        try:
+            async with inference_scheduler.slot(current_user, guard=guard):
+                await guard.check_async("resnet")
+                detections = await run_in_threadpool(classify_detections, image, yolo_detections)
+        except AnalysisCancelled as e:
+            logger.warning("⚠️ [STREAM] %s - 중단 (user_id=%s)", e, user_id)
+            yield _ndjson("error", {"detail": str(e)})
+            return
+        except Exception as e:
+            yield _ndjson("error", {"detail": f"질병 분류 실패: {str(e)}"})
+            return
+        yield _ndjson("classification", {
+            "detections": detections,
+            "total_detections": len(detections)
+        })
+        
+        try:
+            await guard.check_async("save")
+        except AnalysisCancelled as e:
+            logger.warning("⚠️ [STREAM] %s - 저장 전 중단 (user_id=%s)", e, user_id)
+            yield _ndjson("error", {"detail": str(e)})
+            return
+        
+        # 3. DB 저장 (스트림 안에서 세션을 직접 열고 닫음)
+        processing_time_ms = int((time.time() - start_time) * 1000)
+        try:
+            request_id = await _persist_stream_result(user_id, detections, processing_time_ms)
+        except Exception as e:
+            yield _ndjson("error", {"detail": f"분석 결과 저장 실패: {str(e)}"})
+            return
+        guard.finish()
+        yield _ndjson("saved", {"request_id": request_id})
+        
+        # 4. 요약
+        complete = {
+            "request_id": request_id,
+            "total_detections": len(detections),
+            "processing_time": processing_time_ms
+        }
+        if include_image:
+            complete["image_base64"] = await run_in_threadpool(image_to_base64, image)
+        yield _ndjson("complete", complete)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            **getattr(request.state, "rate_limit_headers", {})
+        }
+    )
+
+def _ndjson(event: str, data: dict) -> bytes:
+    """스트리밍 이벤트 한 줄 생성"""
+    return (json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n").encode("utf-8")
+
+async def _persist_stream_result(user_id: int, detections: list, processing_time_ms: int) -> int:
+    """스트리밍 분석 결과 저장 - 요청 ID 반환"""
+    async with AsyncSessionLocal() as db:
+        # 요청 + 결과를 최종 상태로 한 트랜잭션에 저장
+        return await AsyncAnalysisUnitOfWork.record(
+            db,
+            user_id=user_id,
+            image_url=f"user_{user_id}_image_{int(time.time())}.jpg",
+            analysis_type=AnalysisType.PIPELINE,
+            total_detections=len(detections),
+            result_image_url=f"user_{user_id}_result_{{request_id}}.jpg",
+            detection_data=detections,
+            processing_status="성공",
+            processing_time=processing_time_ms
+        )
+
+@router.post("/analyze/burst", response_model=BurstAnalyzeResponse)
+async def analyze_burst(
+    req: BurstAnalyzeRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthUser = Depends(rate_limited_user(RATE_LIMIT_BURST_COST))
+):
+    """
+    버스트/영상 분석 API - 카메라로 고랑을 훑으며 찍은 연속 프레임 분석
+    - 직전 키프레임과 비슷한 프레임은 건너뛰고 키프레임만 YOLO/ResNet 배치 추론
+    - 구간별 집계와 처리/건너뛴 프레임 수 반환
+    """
+    start_time = time.time()
+    guard = RequestGuard.from_request(request, "burst", BURST_STAGES)
+    
+    # 1. 프레임 디코딩
+    try:
+        if req.video_base64:
+            frames = await run_in_threadpool(
+                decode_base64_to_video_frames, req.video_base64, BURST_MAX_FRAMES, req.video_stride
+            )
+        elif req.frames_base64:
+            if len(req.frames_base64) > BURST_MAX_FRAMES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"프레임은 최대 {BURST_MAX_FRAMES}장까지 보낼 수 있습니다"
+                )
+            frames = [decode_base64_to_image(frame) for frame in req.frames_base64]
+        else:
+            raise HTTPException(status_code=400, detail="frames_base64 또는 video_base64가 필요합니다")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"프레임 디코딩 실패: {str(e)}")
+    
+    logger.debug("🔍 새로운 burst 요청 - user_id=%s, 프레임 %d장", current_user.id, len(frames))
+    
+    # 2. DB에 분석 요청 저장
+    try:
+        request_id = await AsyncAnalysisUnitOfWork.start(
+            db,
+            user_id=current_user.id,
+            image_url=f"user_{current_user.id}_burst_{int(time.time())}.mp4",
+            analysis_type=AnalysisType.PIPELINE
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 요청 저장 실패: {str(e)}")
+    
+    # 3. 버스트 파이프라인 실행 (추론 동안 DB 커넥션은 풀에 반납)
+    await release_connection(db)
+    try:
+        async with guard.watching():
+            async with inference_scheduler.slot(current_user, cost=RATE_LIMIT_BURST_COST, guard=guard):
+                result = await run_in_threadpool(
+                    process_frame_burst, frames, req.segment_size, None, guard.check
+                )
+            guard.check("save")
+    except AnalysisCancelled as e:
+        raise await _cancel_analysis(db, request_id, e, start_time)
+    processing_time_ms = int((time.time() - start_time) * 1000)
+    
+    if result["processing_status"] != "성공":
+        await AsyncAnalysisUnitOfWork.fail(db, request_id, processing_time_ms)
+        raise HTTPException(status_code=500, detail=result["processing_status"])
+    
+    # 4. 결과 저장
+    try:
+        await AsyncAnalysisUnitOfWork.complete(
+            db,
+            request_id=request_id,
+            total_detections=result["total_detections"],
+            result_image_url=f"user_{current_user.id}_burst_result_{request_id}.json",
+            detection_data=result["detections"],
+            processing_status=result["processing_status"],
+            processing_time=processing_time_ms
+        )
+    except Exception as e:
+        logger.error("❌ 버스트 결과 저장 실패: %s", e, extra={"request_id": request_id})
+        await AsyncAnalysisUnitOfWork.fail(db, request_id)
+    guard.finish()
+    
+    logger.info("✅ burst 완료 - request_id=%s, 처리 %d장, 건너뜀 %d장, %dms", request_id,
+                result["frames_processed"], result["frames_skipped"], processing_time_ms,
+                extra={"request_id": request_id, "user_id": current_user.id, "processing_time_ms": processing_time_ms})
+    return BurstAnalyzeResponse(**{k: v for k, v in result.items() if k != "processing_status"})
+
 @router.post("/analyze_single", response_model=SingleAnalyzeResponse)
 async def analyze_single_crop(
     req: AnalyzeRequest, 
+    request: Request,
     crop_type: str = "pepper", 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthUser = Depends(rate_limited_user())
 ):
     """
     단일 작물 분석 API (기존 방식) - JWT 인증 버전
     - YOLO 없이 ResNet으로 직접 분석 → DB 저장
     """
     start_time = time.time()
+    guard = RequestGuard.from_request(request, "single", SINGLE_STAGES)
     
     try:
-        print("=" * 50)
-        print(f"🔍 [DEBUG] 새로운 analyze_single 요청 - 사용자: {current_user.username}, crop_type: {crop_type}")
+        logger.debug("🔍 새로운 analyze_single 요청 - user_id=%s, crop_type=%s", current_user.id, crop_type)
         
         # 1. 이미지 디코딩
         try:
             image = decode_base64_to_image(req.image_base64)
-            print(f"✅ [DEBUG] 이미지 변환 성공: {image.size}")
+            logger.debug("✅ 이미지 변환 성공: %s", image.size)
         except Exception as e:
-            print(f"❌ [DEBUG] 이미지 디코딩 실패: {e}")
+            logger.info("❌ 이미지 디코딩 실패: %s", e)
             raise HTTPException(status_code=400, detail=f"이미지 디코딩 실패: {str(e)}")
 
         # 2. DB에 분석 요청 저장
         try:
             temp_image_url = f"user_{current_user.id}_single_{int(time.time())}.jpg"
-            db_request = AnalysisRequestCRUD.create(
-                db=db,
+            request_id = await AsyncAnalysisUnitOfWork.start(
+                db,
                 user_id=current_user.id,
                 image_url=temp_image_url,
                 analysis_type=AnalysisType.SINGLE
             )
-            print(f"✅ [DEBUG] DB 요청 저장 완료 - Request ID: {db_request.id}, User: {current_user.username}")
+            logger.debug("✅ DB 요청 저장 완료 - request_id=%s", request_id)
         except Exception as e:
-            print(f"❌ [DEBUG] DB 요청 저장 실패: {e}")
+            logger.error("❌ DB 요청 저장 실패: %s", e)
             raise HTTPException(status_code=500, detail=f"분석 요청 저장 실패: {str(e)}")
 
-        # 3. 상태를 PROCESSING으로 변경
-        AnalysisRequestCRUD.update_status(db, db_request.id, RequestStatus.PROCESSING)
-
-        # 4. 단일 작물 분석
+        # 3. 단일 작물 분석 (추론 동안 DB 커넥션은 풀에 반납)
+        await release_connection(db)
         try:
-            result = process_single_crop_analysis(image, crop_type)
-            print(f"✅ [DEBUG] 단일 분석 완료: {result.get('disease_status', 'unknown')}")
+            async with guard.watching():
+                async with inference_scheduler.slot(current_user, guard=guard):
+                    guard.check("resnet")
+                    result = await run_in_threadpool(process_single_crop_analysis, image, crop_type)
+                guard.check("save")
+            logger.debug("✅ 단일 분석 완료: %s", result.get("disease_status", "unknown"))
+        except AnalysisCancelled as e:
+            raise await _cancel_analysis(db, request_id, e, start_time)
         except Exception as e:
-            AnalysisRequestCRUD.update_status(db, db_request.id, RequestStatus.FAILED)
-            print(f"❌ [DEBUG] 단일 분석 실패: {e}")
+            await AsyncAnalysisUnitOfWork.fail(db, request_id)
+            logger.error("❌ 단일 분석 실패: %s", e, extra={"request_id": request_id})
             raise HTTPException(status_code=500, detail=f"분석 실패: {str(e)}")
 
-        # 5. 처리 시간 계산
+        # 4. 처리 시간 계산
         processing_time_ms = int((time.time() - start_time) * 1000)
 
-        # 6. 결과 처리
+        # 5. 결과 처리
         if not result["disease_status"].startswith(("분석 실패", "이미지 유효성")):
             try:
                 single_detection_data = [{
@@ -213,35 +445,31 @@ async def analyze_single_crop(
                     "user_id": current_user.id
                 }]
                 
-                db_result = AnalysisResultCRUD.create(
-                    db=db,
-                    request_id=db_request.id,
+                await AsyncAnalysisUnitOfWork.complete(
+                    db,
+                    request_id=request_id,
                     total_detections=1,
-                    result_image_url=f"user_{current_user.id}_single_result_{db_request.id}.jpg",
+                    result_image_url=f"user_{current_user.id}_single_result_{request_id}.jpg",
                     detection_data=single_detection_data,
-                    processing_status="성공"
+                    processing_status="성공",
+                    processing_time=processing_time_ms
                 )
                 
-                AnalysisRequestCRUD.update_status(
-                    db, db_request.id, RequestStatus.COMPLETED, processing_time_ms
-                )
-                
-                print(f"✅ [DEBUG] 단일 분석 결과 저장 완료 - 사용자: {current_user.username}")
+                logger.info("✅ analyze_single 완료 - request_id=%s, %s, %dms",
+                            request_id, result["disease_status"], processing_time_ms,
+                            extra={"request_id": request_id, "user_id": current_user.id,
+                                   "processing_time_ms": processing_time_ms})
                 
             except Exception as e:
-                print(f"❌ [DEBUG] 결과 저장 실패: {e}")
-                AnalysisRequestCRUD.update_status(db, db_request.id, RequestStatus.FAILED)
+                logger.error("❌ 결과 저장 실패: %s", e, extra={"request_id": request_id})
+                await AsyncAnalysisUnitOfWork.fail(db, request_id)
         else:
-            AnalysisRequestCRUD.update_status(
-                db, db_request.id, RequestStatus.FAILED, processing_time_ms
-            )
-            print(f"❌ [DEBUG] 분석 결과 오류: {result['disease_status']}")
+            await AsyncAnalysisUnitOfWork.fail(db, request_id, processing_time_ms)
+            logger.warning("❌ 분석 결과 오류: %s", result["disease_status"], extra={"request_id": request_id})
             raise HTTPException(status_code=500, detail=result["disease_status"])
+        guard.finish()
 
-        print(f"✅ [DEBUG] analyze_single 완료 - 사용자: {current_user.username}")
-        print("=" * 50)
-        
-        # 7. 응답 반환
+        # 6. 응답 반환
         return {
             "crop_type": result["crop_type"],
             "disease_status": result["disease_status"],
@@ -251,10 +479,10 @@ async def analyze_single_crop(
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"❌ [DEBUG] 예상치 못한 오류: {e}")
-        if 'db_request' in locals():
+        logger.exception("❌ 예상치 못한 오류: %s", e)
+        if 'request_id' in locals():
             try:
-                AnalysisRequestCRUD.update_status(db, db_request.id, RequestStatus.FAILED)
+                await AsyncAnalysisUnitOfWork.fail(db, request_id)
             except:
                 pass
         raise HTTPException(status_code=500, detail=f"서버 내부 오류: {str(e)}")
\ No newline at end of file
@@ -1,38 +1,47 @@
+import logging
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 import jwt
 from jwt import PyJWTError
 
-from ..database.database import get_db
-from ..database.models import UserCRUD, UserRole, User
+from ..database.database import get_async_db, release_connection
+from ..database.models import UserRole
+from ..database.async_crud import AsyncUserCRUD
+from ..auth.user_cache import AuthUser, user_cache, token_claims, cross_worker_window, AUTH_TOKEN_CLAIMS
 from ..schemas.auth import UserRegister, UserLogin, Token, RegisterUserRole, RegisterResponse
+from ..auth.password_hasher import password_hasher, PasswordHasherBusy
+from ..auth.rate_limit import inference_rate_limiter
 from ..auth.auth import (
     authenticate_user, 
     create_access_token, 
-    get_password_hash,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     SECRET_KEY,
     ALGORITHM
 )
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+logger = logging.getLogger(__name__)
 
-# JWT 토큰 스키마
-security = HTTPBearer()
+router = APIRouter(prefix="/auth", tags=["authentication"])
 
-# app/routers/auth.py의 get_current_user 함수를 다음과 같이 수정
+# JWT 토큰 스키마 (설명은 API 문서의 인증 항목에 표시)
+security = HTTPBearer(description=(
+    "로그인/토큰 갱신으로 받은 액세스 토큰. "
+    f"다른 워커 프로세스에서 비활성화되거나 역할이 바뀐 사용자는 최대 {cross_worker_window():g}초 동안 "
+    "이전 권한으로 인증될 수 있습니다 (인증 사용자 캐시 TTL / 토큰 클레임 유효 시간 중 큰 값)."
+))
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """JWT 토큰에서 현재 사용자 정보를 가져오는 함수 - 완전 디버깅 버전"""
-    
-    print("🚨 === GET_CURRENT_USER 디버깅 시작 ===")
-    
+    db: AsyncSession = Depends(get_async_db)
+) -> AuthUser:
+    """
+    JWT 토큰에서 현재 사용자 정보를 가져오는 함수
+    - 반환값은 id/username/role/is_active만 담은 AuthUser (AUTH_USER_CACHE_TTL 동안 캐시)
+    - 단계별 로그는 DEBUG (LOG_LEVELS=app.routers.auth=DEBUG), 토큰/페이로드는 남기지 않음
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="인증 정보를 확인할 수 없습니다",
@@ -40,75 +49,71 @@ async def get_current_user(
     )
     
     try:
-        print(f"🔍 step 1: credentials 확인")
-        print(f"   - credentials: {credentials}")
-        print(f"   - credentials.credentials: {credentials.credentials[:50] if credentials and credentials.credentials else 'NONE'}...")
-        
         if not credentials or not credentials.credentials:
-            print("❌ step 1: credentials가 없음")
+            logger.info("❌ 인증 실패: credentials가 없음")
             raise credentials_exception
         
-        print(f"🔍 step 2: JWT 디코딩 시도")
-        # SECRET_KEY와 ALGORITHM import
-        from ..auth.auth import SECRET_KEY, ALGORITHM
-        print(f"   - SECRET_KEY 길이: {len(SECRET_KEY)}")
-        print(f"   - ALGORITHM: {ALGORITHM}")
-        
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f"✅ step 2: JWT 디코딩 성공")
-        print(f"   - payload: {payload}")
         
         user_id: str = payload.get("sub")
         if user_id is None:
-            print("❌ step 2: user_id가 payload에 없음")
+            logger.info("❌ 인증 실패: user_id가 payload에 없음")
             raise credentials_exception
-            
-        print(f"🔍 step 3: 사용자 조회 시도")
-        print(f"   - user_id: {user_id}")
         
     except PyJWTError as e:
-        print(f"❌ step 2: JWT 디코딩 실패 - {type(e).__name__}: {e}")
+        logger.info("❌ 인증 실패: JWT 디코딩 실패 - %s", type(e).__name__)
         raise credentials_exception
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ step 2: 예상치 못한 디코딩 에러 - {type(e).__name__}: {e}")
+        logger.warning("❌ 인증 실패: 예상치 못한 디코딩 에러 - %s: %s", type(e).__name__, e)
         raise credentials_exception
     
     try:
         user_id_int = int(user_id)
-        print(f"   - user_id_int: {user_id_int}")
         
-        user = UserCRUD.get_by_id(db, user_id_int)
+        # 1) 서명된 토큰 클레임 (AUTH_TOKEN_CLAIMS=true로 발급된 토큰) → 2) 캐시 → 3) DB 순서로 확인
+        user, source = None, None
+        if AUTH_TOKEN_CLAIMS and user_cache.claims_trusted(user_id_int, payload.get("iat")):
+            user = AuthUser.from_claims(user_id_int, payload)
+            if user is not None:
+                user_cache.claim_hits += 1
+                source = "claims"
         if user is None:
-            print(f"❌ step 3: 사용자 없음 (ID: {user_id_int})")
-            raise credentials_exception
-            
-        print(f"✅ step 3: 사용자 발견")
-        print(f"   - username: {user.username}")
-        print(f"   - is_active: {user.is_active}")
+            user = user_cache.get(user_id_int)
+            source = "cache"
+        if user is None:
+            db_user = await AsyncUserCRUD.get_by_id(db, user_id_int)
+            user_cache.db_lookups += 1
+            if db_user is None:
+                logger.info("❌ 인증 실패: 사용자 없음 (ID: %s)", user_id_int)
+                raise credentials_exception
+            user = AuthUser.from_user(db_user)
+            user_cache.put(user)
+            # 조회가 끝났으면 커넥션 반납 (요청이 끝날 때까지 - 추론 중에도 - 잡고 있지 않도록)
+            await release_connection(db)
+            source = "db"
             
         if not user.is_active:
-            print(f"❌ step 4: 비활성 사용자")
+            logger.info("❌ 인증 실패: 비활성 사용자 (ID: %s)", user.id)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="비활성화된 계정입니다"
             )
             
-        print(f"✅ === GET_CURRENT_USER 완료: {user.username} ===")
+        logger.debug("✅ 인증 완료: user_id=%s, source=%s", user.id, source)
         return user
         
     except (ValueError, TypeError) as e:
-        print(f"❌ step 3: user_id 변환 실패 - {e}")
+        logger.info("❌ 인증 실패: user_id 변환 실패 - %s", e)
         raise credentials_exception
-    except HTTPException as he:
-        print(f"❌ step 4: HTTP 예외 - {he.detail}")
-        raise he
-    except Exception as e:
-        print(f"❌ step 3: DB 조회 실패 - {type(e).__name__}: {e}")
-        import traceback
-        print(f"   스택트레이스: {traceback.format_exc()}")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("❌ 인증 실패: 사용자 조회 중 오류")
         raise credentials_exception
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
     """활성 사용자만 가져오는 함수"""
     if not current_user.is_active:
         raise HTTPException(
@@ -117,7 +122,7 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         )
     return current_user
 
-async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_admin_user(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
     """관리자 권한 사용자만 가져오는 함수"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -126,13 +131,46 @@ async def get_admin_user(current_user: User = Depends(get_current_user)) -> User
         )
     return current_user
 
+def rate_limited_user(cost: float = 1.0):
+    """
+    추론 API용 의존성 - 인증 후 사용자별 토큰 버킷에서 cost만큼 차감 (한도는 역할별 RATE_LIMIT_*)
+    - 초과하면 429 + Retry-After, 통과하면 응답에 X-RateLimit-* 헤더 추가
+    - StreamingResponse처럼 Response를 직접 반환하는 라우터는 request.state.rate_limit_headers를 붙여야 함
+    """
+    async def dependency(request: Request, response: Response,
+                         current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
+        decision = inference_rate_limiter.acquire(current_user.id, current_user.role, cost)
+        if decision is None:
+            return current_user
+        headers = decision.headers()
+        if not decision.allowed:
+            logger.info("⚠️ 요청 한도 초과 - user_id=%s (%s), %s초 후 재시도",
+                        current_user.id, current_user.role.value, headers["Retry-After"])
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="요청이 너무 많습니다. 잠시 후 다시 시도해주세요",
+                headers=headers
+            )
+        response.headers.update(headers)
+        request.state.rate_limit_headers = headers
+        return current_user
+    return dependency
+
+def _hasher_busy_exception(e: PasswordHasherBusy) -> HTTPException:
+    """로그인 폭주로 해싱 대기열이 가득 찬 경우 - 클라이언트는 Retry-After 후 재시도"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="로그인 요청이 많습니다. 잠시 후 다시 시도해주세요",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
 @router.post("/register", response_model=RegisterResponse)
-async def register(request: Request, user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(request: Request, user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """회원가입 - 역할 선택 포함"""
     
     try:
         # 사용자명 중복 체크
-        existing_user = UserCRUD.get_by_username(db, user_data.username)
+        existing_user = await AsyncUserCRUD.get_by_username(db, user_data.username)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -140,7 +178,7 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
             )
         
         # 이메일 중복 체크
-        existing_email = UserCRUD.get_by_email(db, user_data.email)
+        existing_email = await AsyncUserCRUD.get_by_email(db, user_data.email)
         if existing_email:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -148,7 +186,7 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
             )
         
         # 비밀번호 해싱
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
         
         # 역할 변환 (RegisterUserRole -> UserRole)
         if user_data.role == RegisterUserRole.FARMER:
@@ -156,8 +194,8 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
         else:
             db_role = UserRole.USER
         
-        # 사용자 생성
-        new_user = UserCRUD.create(
+        # 사용자 생성 (create 내부에서 커밋)
+        new_user = await AsyncUserCRUD.create(
             db=db,
             username=user_data.username,
             email=user_data.email,
@@ -166,17 +204,6 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
             role=db_role
         )
         
-        # 데이터베이스 커밋
-        try:
-            db.commit()
-            db.refresh(new_user)
-        except Exception:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="회원가입 처리 중 데이터베이스 오류가 발생했습니다"
-            )
-        
         # 성공 응답
         return RegisterResponse(
             message="회원가입이 완료되었습니다",
@@ -184,26 +211,29 @@ async def register(request: Request, user_data: UserRegister, db: Session = Depe
         )
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
+    except PasswordHasherBusy as e:
+        await db.rollback()
+        raise _hasher_busy_exception(e)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="사용자명 또는 이메일이 이미 사용 중입니다"
         )
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="회원가입 처리 중 오류가 발생했습니다"
         )
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """로그인"""
     try:
-        user = authenticate_user(db, user_credentials.username, user_credentials.password)
+        user = await authenticate_user(db, user_credentials.username, user_credentials.password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -219,7 +249,7 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": str(user.id)}, 
+            data=token_claims(AuthUser.from_user(user)), 
             expires_delta=access_token_expires
         )
         
@@ -233,6 +263,8 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         
     except HTTPException:
         raise
+    except PasswordHasherBusy as e:
+        raise _hasher_busy_exception(e)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -240,30 +272,50 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         )
 
 @router.get("/me")
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
-    """현재 로그인한 사용자 정보 조회"""
+async def get_current_user_info(current_user: AuthUser = Depends(get_current_user),
+                                db: AsyncSession = Depends(get_async_db)):
+    """현재 로그인한 사용자 정보 조회 (이메일 등 캐시에 없는 필드는 DB에서 조회)"""
+    user = await AsyncUserCRUD.get_by_id(db, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="사용자를 찾을 수 없습니다")
     return {
-        "user_id": current_user.id,
-        "username": current_user.username,
-        "email": current_user.email,
-        "full_name": current_user.full_name,
-        "role": current_user.role.value,
-        "is_active": current_user.is_active,
-        "created_at": current_user.created_at.isoformat()
+        "user_id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "full_name": user.full_name,
+        "role": user.role.value,
+        "is_active": user.is_active,
+        "created_at": user.created_at.isoformat()
     }
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user)):
+async def logout(current_user: AuthUser = Depends(get_current_user)):
     """로그아웃"""
     return {"message": "로그아웃되었습니다"}
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(current_user: User = Depends(get_current_user)):
-    """토큰 갱신"""
+async def refresh_token(current_user: AuthUser = Depends(get_current_user),
+                        db: AsyncSession = Depends(get_async_db)):
+    """
+    토큰 갱신 (사용자 정보는 항상 DB에서 다시 확인)
+
+    클레임 토큰(AUTH_TOKEN_CLAIMS=true)은 발급 후 AUTH_CLAIMS_TTL이 지나면 인증할 때 캐시/DB로 다시 확인하므로,
+    주기적으로 갱신하면 DB 조회 없이 인증됩니다. 다른 워커에서 바뀐 역할/활성 상태는 인증 항목 설명의 시간 안에 반영됩니다.
+    """
+    db_user = await AsyncUserCRUD.get_by_id(db, current_user.id)
+    if db_user is None or not db_user.is_active:
+        user_cache.invalidate(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="비활성화된 계정입니다" if db_user is not None else "인증 정보를 확인할 수 없습니다",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    current_user = AuthUser.from_user(db_user)
+    user_cache.put(current_user)
     try:
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": str(current_user.id)}, 
+            data=token_claims(current_user), 
             expires_delta=access_token_expires
         )
         
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional
+import base64
+import json
+
+from ..schemas.request_response import HistoryResponse, HistoryItem, HistoryResultSummary
+from ..database.database import get_read_db
+from ..database.async_crud import AsyncAnalysisRequestCRUD
+from .auth import get_current_user
+from ..auth.user_cache import AuthUser
+
+router = APIRouter()
+
+@router.get("/history", response_model=HistoryResponse)
+async def get_analysis_history(
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (첫 페이지는 생략)"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: AuthUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    내 분석 이력 조회 (최신순, 키셋 페이지네이션)
+    - OFFSET 없이 (created_at, id) 기준으로 이어서 조회하므로 페이지가 깊어져도 일정한 비용
+    - 결과 요약은 요청과 같은 쿼리에서 함께 로드 (항목별 추가 조회 없음)
+    - 읽기 복제본이 설정되어 있으면 복제본에서 조회 (방금 끝난 분석은 복제 지연만큼 늦게 보일 수 있음)
+    """
+    dialect = db.bind.dialect.name
+    after = _decode_cursor(cursor, dialect) if cursor else None
+
+    # 다음 페이지 존재 여부 확인을 위해 1건 더 조회
+    rows = await AsyncAnalysisRequestCRUD.get_user_history_page(db, current_user.id, limit + 1, after)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = []
+    for request, _ in rows:
+        result = request.result
+        items.append(HistoryItem(
+            request_id=request.id,
+            analysis_type=request.analysis_type.value if request.analysis_type else None,
+            status=request.status.value if request.status else None,
+            created_at=request.created_at,
+            processing_time=request.processing_time,
+            result=HistoryResultSummary(
+                total_detections=result.total_detections or 0,
+                result_image_url=result.result_image_url,
+                processing_status=result.processing_status
+            ) if result is not None else None
+        ))
+
+    next_cursor = None
+    if has_more and rows:
+        last_request, last_sort_key = rows[-1]
+        next_cursor = _encode_cursor(last_sort_key, last_request.id)
+
+    return HistoryResponse(items=items, next_cursor=next_cursor, has_more=has_more)
+
+def _encode_cursor(sort_key, request_id: int) -> str:
+    """(정렬 키, 요청 ID) → URL-safe 불투명 커서"""
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    payload = json.dumps([sort_key, request_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, dialect: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_key, request_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        # SQLite는 저장된 문자열 그대로 비교 (history_sort_key 참고)
+        if dialect != "sqlite":
+            sort_key = datetime.fromisoformat(sort_key)
+        return sort_key, int(request_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="유효하지 않은 cursor입니다")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 
 class AnalyzeRequest(BaseModel):
     image_base64: str  # 안드로이드 앱에서 전송된 base64 인코딩 이미지
@@ -24,3 +25,56 @@ class SingleAnalyzeResponse(BaseModel):
     crop_type: str           # 작물 종류
     disease_status: str      # 질병 상태
     confidence: float        # 신뢰도
+
+
+class BurstAnalyzeRequest(BaseModel):
+    """버스트/영상 분석 요청 (frames_base64 또는 video_base64 중 하나)"""
+    frames_base64: Optional[List[str]] = None  # 촬영 순서대로 정렬된 프레임 이미지들
+    video_base64: Optional[str] = None         # 짧은 영상 (mp4 등)
+    video_stride: int = 1                      # 영상에서 몇 프레임마다 하나씩 사용할지
+    segment_size: int = 10                     # 한 구간으로 묶을 프레임 수
+
+class BurstDetectionResult(DetectionResult):
+    """프레임 단위 감지 결과"""
+    frame_index: int          # 감지된 프레임 번호 (0부터)
+
+class BurstSegmentResult(BaseModel):
+    """구간(밭고랑 구간)별 집계"""
+    frame_start: int
+    frame_end: int
+    keyframes: int                   # 구간 내 실제 분석한 프레임 수
+    total_detections: int
+    disease_counts: Dict[str, int]   # 질병 상태별 감지 수
+    dominant_disease: Optional[str]  # 가장 많이 감지된 질병 상태
+
+class BurstAnalyzeResponse(BaseModel):
+    """버스트/영상 분석 결과"""
+    frames_total: int
+    frames_processed: int            # 키프레임으로 분석한 프레임 수
+    frames_skipped: int              # 직전 키프레임과 비슷해 건너뛴 프레임 수
+    frames_invalid: int              # 유효성 검사에 실패한 프레임 수
+    segments: List[BurstSegmentResult]
+    detections: List[BurstDetectionResult]
+    total_detections: int
+
+
+class HistoryResultSummary(BaseModel):
+    """이력 항목의 분석 결과 요약"""
+    total_detections: int
+    result_image_url: Optional[str] = None
+    processing_status: Optional[str] = None
+
+class HistoryItem(BaseModel):
+    """분석 이력 항목"""
+    request_id: int
+    analysis_type: str                            # PIPELINE, SINGLE
+    status: str                                   # PENDING, PROCESSING, COMPLETED, FAILED
+    created_at: Optional[datetime] = None
+    processing_time: Optional[int] = None         # 밀리초
+    result: Optional[HistoryResultSummary] = None # 결과가 없으면 null
+
+class HistoryResponse(BaseModel):
+    """분석 이력 페이지 (무한 스크롤용)"""
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None  # 다음 페이지 요청 시 cursor로 전달, 마지막 페이지면 null
+    has_more: bool
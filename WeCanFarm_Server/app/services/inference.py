@@ -1,8 +1,12 @@
+import logging
 import numpy as np
 from PIL import Image
+from typing import List
 from tensorflow.keras.applications.resnet50 import preprocess_input
 from .model_manager import model_manager
 
+logger = logging.getLogger(__name__)
+
 def run_resnet_inference(image: Image.Image, crop_type: str = 'pepper') -> dict:
     """
     작물별 질병 분류
@@ -19,34 +23,111 @@ def run_resnet_inference(image: Image.Image, crop_type: str = 'pepper') -> dict:
     try:
         # 이미지 전처리
         processed_image = _preprocess_image(image)
+        return _classify(processed_image, crop_type)
         
-        # 모델 추론
-        model = model_manager.get_model(crop_type)
-        predictions = model.predict(processed_image, verbose=0)
-        predicted_idx = np.argmax(predictions[0])
-        
-        # 결과 해석
-        class_labels = model_manager.get_class_labels(crop_type)
-        korean_labels = model_manager.get_korean_labels(crop_type)
-        
-        class_name = class_labels.get(predicted_idx, "알 수 없음")
-        disease_status = korean_labels.get(class_name, "알 수 없음")
-        confidence = float(np.max(predictions[0]))
-        
+    except Exception as e:
+        logger.exception("❌ %s 추론 중 오류: %s", crop_type, e)
         return {
             "crop_type": crop_type,
-            "disease_status": disease_status,
-            "confidence": confidence,
-            "predicted_class": class_name
+            "disease_status": f"추론 실패: {str(e)}"
         }
+
+def run_resnet_inference_preprocessed(tensor: np.ndarray, crop_type: str = 'pepper') -> dict:
+    """
+    전처리가 끝난 (224, 224, 3) 텐서로 질병 분류 (공유 메모리 슬롯 등에서 바로 사용)
+    Args:
+        tensor: preprocess_for_resnet() 결과 또는 (1, 224, 224, 3) 배치
+        crop_type: 작물 타입
+    """
+    if not model_manager.is_crop_supported(crop_type):
+        return {
+            "crop_type": crop_type,
+            "disease_status": f"{crop_type} 모델이 지원되지 않습니다."
+        }
+    
+    try:
+        if tensor.ndim == 3:
+            tensor = np.expand_dims(tensor, axis=0)
+        return _classify(tensor, crop_type)
         
     except Exception as e:
-        print(f"❌ {crop_type} 추론 중 오류: {e}")
+        logger.exception("❌ %s 추론 중 오류: %s", crop_type, e)
         return {
             "crop_type": crop_type,
             "disease_status": f"추론 실패: {str(e)}"
         }
 
+def run_resnet_inference_batch(images: List[Image.Image], crop_type: str = 'pepper') -> List[dict]:
+    """
+    여러 이미지를 한 번의 model.predict로 분류 (버스트/영상 키프레임용)
+    Args:
+        images: 분류할 이미지 리스트
+        crop_type: 작물 타입
+    Returns:
+        이미지별 run_resnet_inference()와 같은 형태의 결과 (입력 순서 유지)
+    """
+    if not images:
+        return []
+    
+    if not model_manager.is_crop_supported(crop_type):
+        return [{
+            "crop_type": crop_type,
+            "disease_status": f"{crop_type} 모델이 지원되지 않습니다."
+        } for _ in images]
+    
+    try:
+        batch = np.concatenate([_preprocess_image(image) for image in images], axis=0)
+        
+        model = model_manager.get_model(crop_type)
+        predictions = model.predict(batch, verbose=0)
+        
+        class_labels = model_manager.get_class_labels(crop_type)
+        korean_labels = model_manager.get_korean_labels(crop_type)
+        
+        results = []
+        for prediction in predictions:
+            class_name = class_labels.get(int(np.argmax(prediction)), "알 수 없음")
+            results.append({
+                "crop_type": crop_type,
+                "disease_status": korean_labels.get(class_name, "알 수 없음"),
+                "confidence": float(np.max(prediction)),
+                "predicted_class": class_name
+            })
+        return results
+        
+    except Exception as e:
+        logger.exception("❌ %s 배치 추론 중 오류: %s", crop_type, e)
+        return [{
+            "crop_type": crop_type,
+            "disease_status": f"추론 실패: {str(e)}"
+        } for _ in images]
+
+def preprocess_for_resnet(image: Image.Image) -> np.ndarray:
+    """ResNet 입력용 (224, 224, 3) float32 텐서 생성 (배치 차원 없음)"""
+    return _preprocess_image(image)[0].astype(np.float32, copy=False)
+
+def _classify(processed_image: np.ndarray, crop_type: str) -> dict:
+    """전처리된 배치로 모델 추론 후 결과 해석"""
+    # 모델 추론
+    model = model_manager.get_model(crop_type)
+    predictions = model.predict(processed_image, verbose=0)
+    predicted_idx = np.argmax(predictions[0])
+    
+    # 결과 해석
+    class_labels = model_manager.get_class_labels(crop_type)
+    korean_labels = model_manager.get_korean_labels(crop_type)
+    
+    class_name = class_labels.get(predicted_idx, "알 수 없음")
+    disease_status = korean_labels.get(class_name, "알 수 없음")
+    confidence = float(np.max(predictions[0]))
+    
+    return {
+        "crop_type": crop_type,
+        "disease_status": disease_status,
+        "confidence": confidence,
+        "predicted_class": class_name
+    }
+
 def _preprocess_image(image: Image.Image) -> np.ndarray:
     """이미지 전처리"""
     image = image.convert("RGB").resize((224, 224))
@@ -0,0 +1,239 @@
+# app/services/inference_scheduler.py
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from ..database.models import UserRole
+
+# 동시에 실행할 추론 수 (나머지는 대기열에서 순서를 기다림)
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", "2"))
+# 역할별 가중치 - 대기 중인 역할끼리 추론 슬롯을 이 비율로 나눠 씀
+_DEFAULT_WEIGHTS = {UserRole.USER: "1", UserRole.FARMER: "4", UserRole.ADMIN: "4"}
+INFERENCE_WEIGHTS = {
+    role: max(0.01, float(os.getenv(f"INFERENCE_WEIGHT_{role.value}", weight)))
+    for role, weight in _DEFAULT_WEIGHTS.items()
+}
+# 이 시간(밀리초) 이상 기다린 요청은 가중치와 상관없이 먼저 실행 (기아 방지, 0이면 끔)
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10000"))
+# true면 같은 역할 안에서 사용자별로 번갈아 실행 (한 사용자의 대량 업로드가 같은 역할의 다른 사용자를 막지 않도록)
+INFERENCE_FAIR_PER_USER = os.getenv("INFERENCE_FAIR_PER_USER", "true").lower() in ("1", "true", "yes")
+
+
+class _Waiter:
+    __slots__ = ("future", "user_id", "cost", "enqueued_at", "queued")
+
+    def __init__(self, future: asyncio.Future, user_id: int, cost: float):
+        self.future = future
+        self.user_id = user_id
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.queued = True
+
+
+class _ClassQueue:
+    """역할 1개의 대기열 (사용자별 FIFO + 도착 순서)"""
+
+    def __init__(self, role: UserRole, weight: float):
+        self.role = role
+        self.weight = weight
+        self.pass_ = 0.0  # 가상 시간 - 실행될 때마다 cost / weight만큼 증가 (작을수록 먼저)
+        self.by_user: "OrderedDict[int, Deque[_Waiter]]" = OrderedDict()
+        self.arrivals: Deque[_Waiter] = deque()  # 기아 방지용 (빠진 항목은 queued=False로 남았다가 나중에 정리)
+        self.depth = 0
+
+        # 관측용
+        self.max_depth = 0
+        self.dispatched = 0
+        self.aged = 0
+        self.cancelled = 0
+        self.wait_ms_total = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=1000)
+
+    def push(self, waiter: _Waiter):
+        self.by_user.setdefault(waiter.user_id, deque()).append(waiter)
+        self.arrivals.append(waiter)
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+
+    def oldest(self) -> Optional[_Waiter]:
+        while self.arrivals and not self.arrivals[0].queued:
+            self.arrivals.popleft()
+        return self.arrivals[0] if self.arrivals else None
+
+    def pop_next(self) -> _Waiter:
+        """맨 앞 사용자의 가장 오래된 요청을 꺼내고 그 사용자를 맨 뒤로 (라운드 로빈)"""
+        user_id, waiters = next(iter(self.by_user.items()))
+        waiter = waiters.popleft()
+        if waiters:
+            self.by_user.move_to_end(user_id)
+        else:
+            del self.by_user[user_id]
+        return self._taken(waiter)
+
+    def take(self, waiter: _Waiter) -> _Waiter:
+        """특정 요청을 꺼냄 (기아 방지 - 사용자 FIFO의 맨 앞 항목)"""
+        waiters = self.by_user[waiter.user_id]
+        waiters.remove(waiter)
+        if not waiters:
+            del self.by_user[waiter.user_id]
+        return self._taken(waiter)
+
+    def _taken(self, waiter: _Waiter) -> _Waiter:
+        waiter.queued = False
+        self.depth -= 1
+        return waiter
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        oldest = self.oldest()
+        waits = sorted(self.recent_waits)
+        return {
+            "weight": self.weight,
+            "queued": self.depth,
+            "queued_users": len(self.by_user),
+            "max_queued": self.max_depth,
+            "dispatched": self.dispatched,
+            "aged": self.aged,
+            "cancelled": self.cancelled,
+            "oldest_wait_ms": round((now - oldest.enqueued_at) * 1000, 1) if oldest else 0.0,
+            "avg_wait_ms": round(self.wait_ms_total / self.dispatched, 1) if self.dispatched else 0.0,
+            "p95_wait_ms": round(waits[int(len(waits) * 0.95) - 1], 1) if len(waits) >= 20 else None,
+            "max_wait_ms": round(waits[-1], 1) if waits else 0.0
+        }
+
+
+class InferenceScheduler:
+    """
+    역할 기반 추론 스케줄러 (가중 공정 큐잉)
+    - 추론 슬롯(INFERENCE_CONCURRENCY)이 비어 있으면 바로 실행, 아니면 역할별 대기열에서 기다림
+    - 슬롯이 나면 가상 시간(pass)이 가장 작은 역할부터 실행 → 대기 중인 역할끼리 가중치 비율로 슬롯을 나눔
+    - 같은 역할 안에서는 사용자별 라운드 로빈 (INFERENCE_FAIR_PER_USER=false면 도착 순서)
+    - INFERENCE_MAX_WAIT_MS 이상 기다린 요청은 역할과 상관없이 먼저 실행
+    모든 상태는 이벤트 루프 스레드에서만 바뀜 (추론 자체는 슬롯을 잡은 쪽이 스레드 풀에서 실행)
+    """
+
+    def __init__(self, concurrency: int = INFERENCE_CONCURRENCY, weights: Dict[UserRole, float] = None,
+                 max_wait_ms: float = INFERENCE_MAX_WAIT_MS, fair_per_user: bool = INFERENCE_FAIR_PER_USER):
+        self.concurrency = max(1, concurrency)
+        self.max_wait = max_wait_ms / 1000
+        self.fair_per_user = fair_per_user
+        self.classes = {role: _ClassQueue(role, weight) for role, weight in (weights or INFERENCE_WEIGHTS).items()}
+        self._running = 0
+        self._vtime = 0.0  # 마지막으로 실행된 요청의 가상 시작 시간
+
+    @property
+    def queued(self) -> int:
+        return sum(queue.depth for queue in self.classes.values())
+
+    @asynccontextmanager
+    async def slot(self, user, cost: float = 1.0, guard=None):
+        """
+        추론 슬롯 확보 (user: role/id가 있는 AuthUser)
+            async with inference_scheduler.slot(current_user, guard=guard):
+                result = await run_in_threadpool(process_image_pipeline, image)
+        guard(RequestGuard)를 넘기면 대기 중 클라이언트가 떠나거나 제한 시간이 지났을 때
+        대기열에서 빠지고 AnalysisCancelled (stage="queue")
+        """
+        if guard is None:
+            await self.acquire(user.role, user.id, cost)
+        else:
+            await self._acquire_guarded(user, cost, guard)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, role: UserRole, user_id: int, cost: float = 1.0):
+        queue = self.classes.get(role) or self.classes[UserRole.USER]
+        if self._running < self.concurrency and not self.queued:
+            self._running += 1
+            self._charge(queue, cost, 0.0)
+            return
+
+        if not queue.depth:
+            # 쉬다가 돌아온 역할이 그동안 쌓인 몫을 한꺼번에 쓰지 않도록 현재 가상 시간부터 시작
+            queue.pass_ = max(queue.pass_, self._vtime)
+        waiter = _Waiter(asyncio.get_running_loop().create_future(),
+                         user_id if self.fair_per_user else 0, cost)
+        queue.push(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.queued:
+                queue.take(waiter)
+                queue.cancelled += 1
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self.release()  # 슬롯을 받은 직후 취소됨 - 다음 요청에 넘김
+            raise
+
+    async def _acquire_guarded(self, user, cost: float, guard):
+        task = asyncio.ensure_future(self.acquire(user.role, user.id, cost))
+        try:
+            await guard.wait_for(task, "queue")
+        except BaseException:
+            if task.cancel():
+                await asyncio.gather(task, return_exceptions=True)  # acquire의 정리 코드 실행
+            elif not task.cancelled() and task.exception() is None:
+                self.release()  # 취소 직전에 슬롯을 받음
+            raise
+
+    def release(self):
+        self._running -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._running < self.concurrency:
+            picked = self._pick()
+            if picked is None:
+                return
+            queue, waiter = picked
+            if waiter.future.cancelled():
+                queue.cancelled += 1  # 취소됐지만 아직 acquire의 정리 코드가 돌기 전
+                continue
+            self._running += 1
+            self._charge(queue, waiter.cost, (time.monotonic() - waiter.enqueued_at) * 1000)
+            waiter.future.set_result(None)
+
+    def _pick(self):
+        active = [queue for queue in self.classes.values() if queue.depth]
+        if not active:
+            return None
+
+        # 1) 기아 방지: 가장 오래 기다린 요청이 한도를 넘었으면 먼저
+        if self.max_wait > 0:
+            oldest_queue, oldest = None, None
+            for queue in active:
+                head = queue.oldest()
+                if head is not None and (oldest is None or head.enqueued_at < oldest.enqueued_at):
+                    oldest_queue, oldest = queue, head
+            if oldest is not None and time.monotonic() - oldest.enqueued_at >= self.max_wait:
+                oldest_queue.aged += 1
+                return oldest_queue, oldest_queue.take(oldest)
+
+        # 2) 가중 공정 큐잉: 가상 시간이 가장 작은 역할
+        queue = min(active, key=lambda q: q.pass_)
+        return queue, queue.pop_next()
+
+    def _charge(self, queue: _ClassQueue, cost: float, wait_ms: float):
+        self._vtime = max(self._vtime, queue.pass_)
+        queue.pass_ = max(queue.pass_, self._vtime) + cost / queue.weight
+        queue.dispatched += 1
+        queue.wait_ms_total += wait_ms
+        queue.recent_waits.append(wait_ms)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "running": self._running,
+            "queued": self.queued,
+            "max_wait_ms": self.max_wait * 1000,
+            "fair_per_user": self.fair_per_user,
+            "classes": {role.value: queue.stats() for role, queue in self.classes.items()}
+        }
+
+
+# 전역 스케줄러 (분석 API가 공유)
+inference_scheduler = InferenceScheduler()
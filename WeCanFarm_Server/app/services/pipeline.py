@@ -1,19 +1,28 @@
 # app/services/pipeline.py
+import logging
 from PIL import Image
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from ..utils.image_handler import (
     yolo_detection,
+    yolo_detection_batch,
     image_to_base64,
     validate_image,
     prepare_image_for_model
 )
-from .inference import run_resnet_inference
+from ..utils.tiling import should_use_tiling, tiled_yolo_detection
+from ..utils.frame_signature import select_keyframes
+from .inference import run_resnet_inference, run_resnet_inference_batch
+from .request_guard import AnalysisCancelled
+from ..utils.logging_config import debug_sampled
 
-def process_image_pipeline(image: Image.Image) -> dict:
+logger = logging.getLogger(__name__)
+
+def process_image_pipeline(image: Image.Image, checkpoint: Optional[Callable[[str], None]] = None) -> dict:
     """
     전체 이미지 처리 파이프라인 (바운딩박스 표시 없이)
     Args:
         image: 입력 이미지
+        checkpoint: 각 단계(yolo/resnet/encode) 시작 전에 호출 - AnalysisCancelled를 던지면 남은 단계를 건너뜀
     Returns:
         {
             "image_base64": "원본 이미지",
@@ -33,39 +42,22 @@ def process_image_pipeline(image: Image.Image) -> dict:
             }
         
         # 2. YOLO 객체 감지
-        yolo_detections = yolo_detection(image)
+        if checkpoint:
+            checkpoint("yolo")
+        yolo_detections = detect_objects(image)
         
         # 3. 각 감지된 객체별로 질병 분류 (전체 이미지 사용)
-        final_detections = []
-        
-        if len(yolo_detections) > 0:
-            # 전체 이미지로 한 번만 ResNet 추론 (효율성)
-            print("🔍 전체 이미지로 질병 분류 실행")
-            disease_result = run_resnet_inference(image, 'pepper')
-            
-            for detection in yolo_detections:
-                bbox = detection["bbox"]
-                crop_type = detection["crop_type"]
-                yolo_confidence = detection["confidence"]
-                
-                # 모든 감지된 객체에 동일한 질병 분류 결과 적용
-                final_detection = {
-                    "bbox": bbox,
-                    "crop_type": crop_type,
-                    "disease_status": disease_result.get("disease_status", "알 수 없음"),
-                    "disease_confidence": disease_result.get("confidence", 0.0),
-                    "yolo_confidence": yolo_confidence,
-                    "label": f"{crop_type}: {disease_result.get('disease_status', '알 수 없음')}"
-                }
-                
-                final_detections.append(final_detection)
-                print(f"🔍 감지 객체 #{len(final_detections)}: {detection['crop_type']} - {disease_result.get('disease_status', '알 수 없음')}")
+        if checkpoint:
+            checkpoint("resnet")
+        final_detections = classify_detections(image, yolo_detections)
         
         # 4. 원본 이미지를 그대로 사용 (바운딩박스 그리기 제거)
         result_image = image
-        print(f"✅ 원본 이미지 사용: {len(final_detections)}개 객체 감지됨")
+        logger.debug("✅ 원본 이미지 사용: %d개 객체 감지됨", len(final_detections))
         
         # 5. 결과 이미지를 base64로 인코딩
+        if checkpoint:
+            checkpoint("encode")
         result_base64 = image_to_base64(result_image)
         
         return {
@@ -75,8 +67,10 @@ def process_image_pipeline(image: Image.Image) -> dict:
             "processing_status": "성공"
         }
         
+    except AnalysisCancelled:
+        raise
     except Exception as e:
-        print(f"❌ 파이프라인 처리 중 오류: {e}")
+        logger.exception("❌ 파이프라인 처리 중 오류: %s", e)
         return {
             "image_base64": "",
             "detections": [],
@@ -84,6 +78,157 @@ def process_image_pipeline(image: Image.Image) -> dict:
             "processing_status": f"처리 실패: {str(e)}"
         }
 
+def detect_objects(image: Image.Image) -> List[dict]:
+    """파이프라인 1단계: YOLO 객체 감지 (고해상도 이미지는 타일 모드)"""
+    if should_use_tiling(image):
+        return tiled_yolo_detection(image)
+    return yolo_detection(image)
+
+def classify_detections(image: Image.Image, yolo_detections: List[dict]) -> List[dict]:
+    """
+    파이프라인 2단계: 감지된 객체별 질병 분류 결과 생성
+    Args:
+        image: 입력 이미지
+        yolo_detections: detect_objects() 결과
+    Returns:
+        DetectionResult 형태의 감지 결과 리스트
+    """
+    final_detections = []
+    
+    if len(yolo_detections) > 0:
+        # 전체 이미지로 한 번만 ResNet 추론 (효율성)
+        logger.debug("🔍 전체 이미지로 질병 분류 실행")
+        disease_result = run_resnet_inference(image, 'pepper')
+        
+        for detection in yolo_detections:
+            bbox = detection["bbox"]
+            crop_type = detection["crop_type"]
+            yolo_confidence = detection["confidence"]
+            
+            # 모든 감지된 객체에 동일한 질병 분류 결과 적용
+            final_detection = {
+                "bbox": bbox,
+                "crop_type": crop_type,
+                "disease_status": disease_result.get("disease_status", "알 수 없음"),
+                "disease_confidence": disease_result.get("confidence", 0.0),
+                "yolo_confidence": yolo_confidence,
+                "label": f"{crop_type}: {disease_result.get('disease_status', '알 수 없음')}"
+            }
+            
+            final_detections.append(final_detection)
+            debug_sampled(logger, "🔍 감지 객체 #%d: %s - %s", len(final_detections),
+                          detection["crop_type"], disease_result.get("disease_status", "알 수 없음"))
+    
+    return final_detections
+
+def process_frame_burst(frames: List[Image.Image], segment_size: int = 10,
+                        max_distance: int = None, checkpoint: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    버스트/영상 프레임 분석 파이프라인
+    - 유효성 검사 → 중복 프레임 제거 → 키프레임만 YOLO/ResNet 배치 추론 → 구간별 집계
+    Args:
+        frames: 촬영 순서대로 정렬된 프레임 리스트
+        segment_size: 한 구간(밭고랑 구간)으로 묶을 프레임 수
+        max_distance: 중복 판정 시그니처 거리 (None이면 기본값)
+        checkpoint: YOLO/ResNet 배치 추론 시작 전에 호출 (process_image_pipeline과 같음)
+    Returns:
+        {
+            "frames_total", "frames_processed", "frames_skipped", "frames_invalid",
+            "segments": [구간별 집계], "detections": [프레임 인덱스 포함 감지 결과],
+            "total_detections", "processing_status"
+        }
+    """
+    try:
+        valid_indices = [i for i, frame in enumerate(frames) if validate_image(frame)]
+        valid_frames = [frames[i] for i in valid_indices]
+        
+        # 1. 중복 프레임 제거 (직전 키프레임과 비슷하면 건너뜀)
+        keyframe_indices = [valid_indices[i] for i in select_keyframes(valid_frames, max_distance)]
+        keyframes = [frames[i] for i in keyframe_indices]
+        logger.debug("🔍 버스트 분석: 전체 %d장 중 키프레임 %d장", len(frames), len(keyframes))
+        
+        # 2. 키프레임 YOLO 배치 감지
+        if checkpoint:
+            checkpoint("yolo")
+        yolo_results = yolo_detection_batch(keyframes)
+        
+        # 3. 객체가 감지된 키프레임만 ResNet 배치 분류
+        detected = [i for i, dets in enumerate(yolo_results) if dets]
+        if checkpoint:
+            checkpoint("resnet")
+        disease_results = run_resnet_inference_batch([keyframes[i] for i in detected], 'pepper')
+        disease_by_keyframe = dict(zip(detected, disease_results))
+        
+        detections = []
+        for k, frame_index in enumerate(keyframe_indices):
+            disease_result = disease_by_keyframe.get(k)
+            if disease_result is None:
+                continue
+            disease_status = disease_result.get("disease_status", "알 수 없음")
+            for detection in yolo_results[k]:
+                detections.append({
+                    "frame_index": frame_index,
+                    "bbox": detection["bbox"],
+                    "crop_type": detection["crop_type"],
+                    "disease_status": disease_status,
+                    "disease_confidence": disease_result.get("confidence", 0.0),
+                    "yolo_confidence": detection["confidence"],
+                    "label": f"{detection['crop_type']}: {disease_status}"
+                })
+        
+        # 4. 구간별 집계
+        segments = _aggregate_segments(len(frames), segment_size, keyframe_indices, detections)
+        
+        return {
+            "frames_total": len(frames),
+            "frames_processed": len(keyframes),
+            "frames_skipped": len(valid_frames) - len(keyframes),
+            "frames_invalid": len(frames) - len(valid_frames),
+            "segments": segments,
+            "detections": detections,
+            "total_detections": len(detections),
+            "processing_status": "성공"
+        }
+        
+    except AnalysisCancelled:
+        raise
+    except Exception as e:
+        logger.exception("❌ 버스트 분석 중 오류: %s", e)
+        return {
+            "frames_total": len(frames),
+            "frames_processed": 0,
+            "frames_skipped": 0,
+            "frames_invalid": 0,
+            "segments": [],
+            "detections": [],
+            "total_detections": 0,
+            "processing_status": f"처리 실패: {str(e)}"
+        }
+
+def _aggregate_segments(frame_count: int, segment_size: int, keyframe_indices: List[int],
+                        detections: List[dict]) -> List[dict]:
+    """프레임 구간별 키프레임 수, 감지 수, 질병 분포 집계"""
+    segment_size = max(1, segment_size)
+    segments = []
+    for start in range(0, frame_count, segment_size):
+        end = min(start + segment_size, frame_count)
+        segment_detections = [d for d in detections if start <= d["frame_index"] < end]
+        
+        disease_counts: Dict[str, int] = {}
+        for detection in segment_detections:
+            status = detection["disease_status"]
+            disease_counts[status] = disease_counts.get(status, 0) + 1
+        
+        segments.append({
+            "frame_start": start,
+            "frame_end": end - 1,
+            "keyframes": sum(1 for i in keyframe_indices if start <= i < end),
+            "total_detections": len(segment_detections),
+            "disease_counts": disease_counts,
+            "dominant_disease": max(disease_counts, key=disease_counts.get) if disease_counts else None
+        })
+    return segments
+
 def process_single_crop_analysis(image: Image.Image, crop_type: str = 'pepper') -> dict:
     """
     단일 작물 분석 (기존 방식 호환용) - 전체 이미지로 분석
@@ -101,14 +246,14 @@ def process_single_crop_analysis(image: Image.Image, crop_type: str = 'pepper')
             }
         
         # ResNet으로 전체 이미지 직접 분석 (YOLO 없이)
-        print(f"🔍 단일 분석: 전체 이미지로 {crop_type} 질병 분류")
+        logger.debug("🔍 단일 분석: 전체 이미지로 %s 질병 분류", crop_type)
         result = run_resnet_inference(image, crop_type)
         
-        print(f"✅ 단일 분석 완료: {result.get('disease_status', '알 수 없음')}")
+        logger.debug("✅ 단일 분석 완료: %s", result.get("disease_status", "알 수 없음"))
         return result
         
     except Exception as e:
-        print(f"❌ 단일 작물 분석 중 오류: {e}")
+        logger.exception("❌ 단일 작물 분석 중 오류: %s", e)
         return {
             "crop_type": crop_type,
             "disease_status": f"분석 실패: {str(e)}"
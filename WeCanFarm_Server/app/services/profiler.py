@@ -0,0 +1,301 @@
+# app/services/profiler.py
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+# 스택 샘플링 주기 (밀리초) - 10ms면 초당 100회, 스레드 20개 기준 CPU 1% 미만
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+# 한 번에 프로파일링할 수 있는 최대 시간 (초)
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+# tracemalloc이 할당마다 저장할 호출 스택 깊이 (깊을수록 정확하지만 느림)
+PROFILER_TRACEMALLOC_FRAMES = int(os.getenv("PROFILER_TRACEMALLOC_FRAMES", "16"))
+# 메모리 스냅샷 주기 (초) - 요청이 끝나면 해제되는 이미지 버퍼도 잡기 위해 프로파일 중 여러 번 찍어 최댓값을 남김
+PROFILER_MEMORY_INTERVAL = float(os.getenv("PROFILER_MEMORY_INTERVAL", "1"))
+
+# 할당 위치를 모을 앱 코드 (이미지 파이프라인: 라우터 → 파이프라인 → 이미지 처리/추론)
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MEMORY_DIRS = tuple(os.path.join(_APP_DIR, name) + os.sep for name in ("routers", "services", "utils"))
+_THIS_FILE = os.path.abspath(__file__)
+
+# 맨 위 프레임이 이 함수면 대기 중인 스레드로 보고 제외 (include_idle=True면 포함)
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+Frame = Tuple[str, str, int]  # (함수 이름, 파일, 정의된 줄)
+
+
+class ProfilerBusy(Exception):
+    """이 워커에서 이미 프로파일링 중"""
+
+
+_path_prefixes: Optional[List[str]] = None
+
+
+def _short_path(path: str) -> str:
+    """site-packages/표준 라이브러리/프로젝트 경로 앞부분을 떼어 읽기 쉽게"""
+    global _path_prefixes
+    if _path_prefixes is None:
+        roots = {os.path.dirname(_APP_DIR)} | {p for p in sys.path if p and os.path.isdir(p)}
+        _path_prefixes = sorted((os.path.abspath(p) + os.sep for p in roots), key=len, reverse=True)
+    for prefix in _path_prefixes:
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return path
+
+
+class Profile:
+    """샘플링 결과 (스레드별 스택 → 샘플 수/시간) + 선택적으로 메모리 할당 위치"""
+
+    def __init__(self, frames: List[Frame], stacks: Dict[Tuple[str, Tuple[int, ...]], List[float]],
+                 duration: float, interval_ms: float, sample_count: int, sampling_seconds: float,
+                 memory: Optional[dict]):
+        self.frames = frames
+        self.stacks = stacks            # (스레드 이름, 프레임 번호 튜플 root→leaf) → [샘플 수, 시간 ms]
+        self.duration = duration
+        self.interval_ms = interval_ms
+        self.sample_count = sample_count
+        self.sampling_seconds = sampling_seconds
+        self.memory = memory
+        self.pid = os.getpid()
+
+    def _label(self, index: int) -> str:
+        name, path, line = self.frames[index]
+        return f"{name} ({path}:{line})".replace(";", ":")
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope가 읽는 collapsed stack 형식 ("스레드;바깥;...;안쪽 샘플수")"""
+        lines = []
+        for (thread, stack), (count, _) in sorted(self.stacks.items(), key=lambda item: -item[1][0]):
+            path = ";".join([thread.replace(";", ":")] + [self._label(index) for index in stack])
+            lines.append(f"{path} {int(count)}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict:
+        """https://www.speedscope.app 에서 바로 열 수 있는 파일 (스레드마다 프로파일 1개, 가중치는 ms)"""
+        by_thread: Dict[str, List[Tuple[Tuple[int, ...], float]]] = {}
+        for (thread, stack), (_, weight) in self.stacks.items():
+            by_thread.setdefault(thread, []).append((stack, weight))
+
+        profiles = []
+        for thread, samples in sorted(by_thread.items(), key=lambda item: -sum(w for _, w in item[1])):
+            total = sum(weight for _, weight in samples)
+            profiles.append({
+                "type": "sampled",
+                "name": f"{thread} (pid {self.pid})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(total, 3),
+                "samples": [list(stack) for stack, _ in samples],
+                "weights": [round(weight, 3) for _, weight in samples],
+            })
+
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name, "file": path, "line": line} for name, path, line in self.frames]},
+            "profiles": profiles,
+            "name": f"WeCanFarm worker {self.pid} ({self.duration:.1f}s)",
+            "activeProfileIndex": 0,
+            "exporter": "wecanfarm-profiler",
+        }
+        if self.memory is not None:
+            document["memory"] = self.memory  # speedscope는 모르는 키를 무시
+        return document
+
+    def summary(self, top: int = 20) -> dict:
+        """함수별 self(맨 위 프레임)/total(스택에 포함) 비율 상위 top개"""
+        self_ms, total_ms = Counter(), Counter()
+        threads = Counter()
+        for (thread, stack), (_, weight) in self.stacks.items():
+            threads[thread] += weight
+            if stack:
+                self_ms[stack[-1]] += weight
+            for index in set(stack):
+                total_ms[index] += weight
+        all_ms = sum(threads.values()) or 1.0
+
+        def ranked(counter: Counter) -> List[dict]:
+            return [
+                {"function": self._label(index), "ms": round(ms, 1), "percent": round(ms / all_ms * 100, 1)}
+                for index, ms in counter.most_common(top)
+            ]
+
+        return {
+            "pid": self.pid,
+            "duration_s": round(self.duration, 2),
+            "interval_ms": self.interval_ms,
+            "samples": self.sample_count,
+            "overhead_percent": round(self.sampling_seconds / self.duration * 100, 2) if self.duration else 0.0,
+            "threads": {thread: round(ms, 1) for thread, ms in threads.most_common()},
+            "self": ranked(self_ms),
+            "total": ranked(total_ms),
+            "memory": self.memory,
+        }
+
+
+class SamplingProfiler:
+    """
+    별도 스레드에서 interval마다 sys._current_frames()로 모든 스레드의 파이썬 스택을 읽어 집계
+    - 시그널 방식과 달리 메인 스레드가 아니어도 되고(uvicorn 워커), C 확장(TensorFlow/ultralytics)이
+      GIL을 놓고 계산하는 동안에도 그 호출 지점이 샘플에 잡힘
+    - memory=True면 tracemalloc으로 앱 코드(routers/services/utils) 기준 할당 위치 상위 목록을 함께 수집
+      (tracemalloc 켜진 동안은 모든 할당이 느려지므로 필요할 때만)
+    """
+
+    _lock = threading.Lock()
+    _active = False
+
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS, include_idle: bool = False,
+                 memory: bool = False, memory_top: int = 20):
+        self.interval = max(1.0, interval_ms) / 1000
+        self.include_idle = include_idle
+        self.memory = memory
+        self.memory_top = memory_top
+
+        self._frames: List[Frame] = []
+        self._frame_ids: Dict[object, int] = {}   # code 객체 → 프레임 번호
+        self._stacks: Dict[Tuple[str, Tuple[int, ...]], List[float]] = {}
+        self._sample_count = 0
+        self._sampling_seconds = 0.0
+        self._memory_sites: Dict[Tuple[str, str], List[float]] = {}  # (앱 위치, 실제 할당 위치) → [최대 바이트, 최대 블록 수]
+        self._memory_snapshots = 0
+        self._started_tracemalloc = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def start(self):
+        with SamplingProfiler._lock:
+            if SamplingProfiler._active:
+                raise ProfilerBusy()
+            SamplingProfiler._active = True
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILER_TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        if self.memory:
+            tracemalloc.reset_peak()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        duration = time.perf_counter() - self._started_at
+        try:
+            memory = self._memory_result() if self.memory else None
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            with SamplingProfiler._lock:
+                SamplingProfiler._active = False
+        return Profile(self._frames, self._stacks, duration, self.interval * 1000,
+                       self._sample_count, self._sampling_seconds, memory)
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        next_snapshot = last + PROFILER_MEMORY_INTERVAL
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight_ms = (now - last) * 1000  # 실제로 지난 시간 (GIL 대기로 늦게 깨어나도 시간 비율이 맞도록)
+            last = now
+            self._sample(own, weight_ms)
+            if self.memory and now >= next_snapshot:
+                self._snapshot_memory()
+                next_snapshot = now + PROFILER_MEMORY_INTERVAL
+            self._sampling_seconds += time.perf_counter() - now
+        if self.memory:
+            self._snapshot_memory()
+
+    def _frame_id(self, code) -> int:
+        index = self._frame_ids.get(code)
+        if index is None:
+            index = len(self._frames)
+            self._frames.append((code.co_name, _short_path(code.co_filename), code.co_firstlineno))
+            self._frame_ids[code] = index
+        return index
+
+    def _sample(self, own: int, weight_ms: float):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            leaf = frame.f_code
+            if not self.include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            key = (names.get(ident, str(ident)), tuple(stack))
+            entry = self._stacks.get(key)
+            if entry is None:
+                self._stacks[key] = [1, weight_ms]
+            else:
+                entry[0] += 1
+                entry[1] += weight_ms
+        self._sample_count += 1
+
+    def _snapshot_memory(self):
+        """지금 살아 있는 할당을 앱 코드의 가장 안쪽 호출 위치별로 묶어 위치마다 최댓값만 남김"""
+        if not tracemalloc.is_tracing():
+            return
+        sizes, counts = Counter(), Counter()
+        for trace in tracemalloc.take_snapshot().traces:
+            frames = trace.traceback
+            site = None
+            for frame in reversed(frames):  # 가장 최근 호출부터
+                if frame.filename.startswith(_MEMORY_DIRS):
+                    if frame.filename != _THIS_FILE:  # 프로파일러 자신의 집계용 할당은 제외
+                        site = f"{_short_path(frame.filename)}:{frame.lineno}"
+                    break
+            if site is None:
+                continue
+            innermost = frames[-1]
+            key = (site, f"{_short_path(innermost.filename)}:{innermost.lineno}")
+            sizes[key] += trace.size
+            counts[key] += 1
+        for key, size in sizes.items():
+            entry = self._memory_sites.setdefault(key, [0, 0])
+            if size > entry[0]:
+                entry[0], entry[1] = size, counts[key]
+        self._memory_snapshots += 1
+
+    def _memory_result(self) -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        ranked = sorted(self._memory_sites.items(), key=lambda item: -item[1][0])[:self.memory_top]
+        return {
+            "snapshots": self._memory_snapshots,
+            "traced_current_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "top_sites": [
+                {"site": site, "allocated_in": allocated_in, "max_kb": round(size / 1024, 1), "blocks": int(blocks)}
+                for (site, allocated_in), (size, blocks) in ranked
+            ],
+        }
+
+
+async def run_profile(seconds: float, **options) -> Profile:
+    """
+    이벤트 루프를 막지 않고 seconds 동안 현재 워커를 프로파일링
+    (요청이 취소돼도 finally에서 샘플러를 멈추고 tracemalloc을 끔)
+    """
+    profiler = SamplingProfiler(**options)
+    profiler.start()
+    try:
+        await asyncio.sleep(min(seconds, PROFILER_MAX_SECONDS))
+    finally:
+        profile = await run_in_threadpool(profiler.stop)
+    return profile
@@ -0,0 +1,194 @@
+# app/services/request_guard.py
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+
+# 클라이언트가 보내는 남은 시간 헤더 (밀리초, 서버가 요청을 받은 시점부터)
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+# 헤더가 없을 때 적용할 기본 제한 시간 (밀리초, 0이면 제한 없음)
+ANALYZE_DEFAULT_TIMEOUT_MS = int(os.getenv("ANALYZE_DEFAULT_TIMEOUT_MS", "0"))
+# 대기열/추론 중 클라이언트 연결 종료를 확인하는 주기 (밀리초)
+DISCONNECT_POLL_MS = int(os.getenv("DISCONNECT_POLL_MS", "250"))
+
+DISCONNECTED = "client_disconnected"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+
+_REASON_TEXT = {DISCONNECTED: "클라이언트 연결 종료", DEADLINE_EXCEEDED: "요청 제한 시간 초과"}
+
+
+class AnalysisCancelled(Exception):
+    """클라이언트가 떠났거나 제한 시간이 지나 남은 단계를 건너뜀"""
+
+    def __init__(self, reason: str, stage: str):
+        super().__init__(f"{_REASON_TEXT.get(reason, reason)} ({stage} 전)")
+        self.reason = reason
+        self.stage = stage
+
+    @property
+    def processing_status(self) -> str:
+        """analysis_results.processing_status에 남길 취소 사유"""
+        return f"취소: {self}"
+
+    @property
+    def status_code(self) -> int:
+        # 499: 클라이언트가 먼저 연결을 끊음 (nginx 관례, 실제로 받을 클라이언트는 없음)
+        return 504 if self.reason == DEADLINE_EXCEEDED else 499
+
+
+class CancellationStats:
+    """
+    단계별 소요 시간 평균과 취소 건수 → 취소로 아낀 연산 시간 추정
+    (취소된 단계부터 끝까지의 평균 소요 시간 합을 아낀 시간으로 계산)
+    """
+
+    def __init__(self):
+        self.stage_ms: Dict[Tuple[str, str], Tuple[int, float]] = {}  # (파이프라인, 단계) → (횟수, 합계 ms)
+        self.cancelled: Dict[Tuple[str, str, str], int] = {}         # (파이프라인, 단계, 사유) → 건수
+        self.saved_ms: Dict[str, float] = {}                          # 파이프라인 → 추정 절약 시간
+        # check()가 스레드 풀의 파이프라인 안에서도 불리므로 읽기-수정-쓰기는 잠금 안에서
+        self._lock = threading.Lock()
+
+    def record_stage(self, pipeline: str, stage: str, elapsed_ms: float):
+        with self._lock:
+            count, total = self.stage_ms.get((pipeline, stage), (0, 0.0))
+            self.stage_ms[(pipeline, stage)] = (count + 1, total + elapsed_ms)
+
+    def avg_stage_ms(self, pipeline: str, stage: str) -> float:
+        with self._lock:
+            return self._avg_stage_ms(pipeline, stage)
+
+    def _avg_stage_ms(self, pipeline: str, stage: str) -> float:
+        count, total = self.stage_ms.get((pipeline, stage), (0, 0.0))
+        return total / count if count else 0.0
+
+    def record_cancel(self, pipeline: str, stages: Tuple[str, ...], cancelled: AnalysisCancelled):
+        key = (pipeline, cancelled.stage, cancelled.reason)
+        remaining = stages[stages.index(cancelled.stage):] if cancelled.stage in stages else stages
+        with self._lock:
+            self.cancelled[key] = self.cancelled.get(key, 0) + 1
+            saved = sum(self._avg_stage_ms(pipeline, stage) for stage in remaining)
+            self.saved_ms[pipeline] = self.saved_ms.get(pipeline, 0.0) + saved
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stage_ms = dict(self.stage_ms)
+            cancelled = dict(self.cancelled)
+            saved_ms = dict(self.saved_ms)
+        pipelines = sorted({pipeline for pipeline, _ in stage_ms} | set(saved_ms))
+        return {
+            pipeline: {
+                "avg_stage_ms": {
+                    stage: round(total / count, 1)
+                    for (name, stage), (count, total) in stage_ms.items() if name == pipeline
+                },
+                "cancelled": {
+                    f"{stage}:{reason}": count
+                    for (name, stage, reason), count in cancelled.items() if name == pipeline
+                },
+                "estimated_saved_ms": round(saved_ms.get(pipeline, 0.0), 1)
+            }
+            for pipeline in pipelines
+        }
+
+
+cancellation_stats = CancellationStats()
+
+
+class RequestGuard:
+    """
+    분석 요청 1건의 취소 조건 (클라이언트 연결 종료 / 제한 시간)
+    - check(stage): 다음 단계를 시작하기 전에 호출 - 취소 조건이면 AnalysisCancelled
+      (스레드 풀의 파이프라인 안에서도 호출 가능: 연결 종료는 watching()의 백그라운드 확인 결과를 읽음)
+    - 단계 사이 시간을 재서 cancellation_stats에 단계별 평균 소요 시간으로 기록
+    """
+
+    def __init__(self, request: Optional[Request], pipeline: str, stages: Tuple[str, ...],
+                 timeout_ms: Optional[float] = None):
+        self.request = request
+        self.pipeline = pipeline
+        self.stages = stages
+        self.deadline = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        self.reason: Optional[str] = None
+        self._stage: Optional[str] = None
+        self._stage_started = time.monotonic()
+
+    @classmethod
+    def from_request(cls, request: Request, pipeline: str, stages: Tuple[str, ...]) -> "RequestGuard":
+        timeout_ms = ANALYZE_DEFAULT_TIMEOUT_MS
+        header = request.headers.get(DEADLINE_HEADER)
+        if header:
+            try:
+                timeout_ms = max(1.0, float(header))
+            except ValueError:
+                pass  # 형식이 잘못된 헤더는 무시 (기본값 사용)
+        return cls(request, pipeline, stages, timeout_ms)
+
+    def remaining(self) -> Optional[float]:
+        """제한 시간까지 남은 초 (제한 없으면 None)"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def check(self, stage: str):
+        """stage를 시작해도 되는지 확인 (직전 단계 소요 시간 기록)"""
+        now = time.monotonic()
+        if stage != self._stage:
+            if self._stage is not None:
+                cancellation_stats.record_stage(self.pipeline, self._stage, (now - self._stage_started) * 1000)
+            self._stage, self._stage_started = stage, now
+
+        if self.reason is None and self.deadline is not None and now >= self.deadline:
+            self.reason = DEADLINE_EXCEEDED
+        if self.reason is not None:
+            self._stage = None  # 취소된 단계는 소요 시간에 넣지 않음
+            cancelled = AnalysisCancelled(self.reason, stage)
+            cancellation_stats.record_cancel(self.pipeline, self.stages, cancelled)
+            raise cancelled
+
+    def finish(self):
+        """마지막 단계(save) 소요 시간 기록 - 정상 완료 시 호출"""
+        if self._stage is not None:
+            cancellation_stats.record_stage(self.pipeline, self._stage, (time.monotonic() - self._stage_started) * 1000)
+            self._stage = None
+
+    async def check_async(self, stage: str):
+        """이벤트 루프에서 - 연결 상태를 한 번 확인한 뒤 check()"""
+        if self.reason is None and self.request is not None and await self.request.is_disconnected():
+            self.reason = DISCONNECTED
+        self.check(stage)
+
+    @asynccontextmanager
+    async def watching(self):
+        """블록 안에서(대기열 대기, 스레드 풀 추론 중) 연결 종료를 주기적으로 확인해 reason에 기록"""
+        if self.request is None:
+            yield self
+            return
+
+        async def poll():
+            while self.reason is None:
+                await asyncio.sleep(DISCONNECT_POLL_MS / 1000)
+                if await self.request.is_disconnected():
+                    self.reason = DISCONNECTED
+
+        task = asyncio.ensure_future(poll())
+        try:
+            yield self
+        finally:
+            task.cancel()
+
+    async def wait_for(self, task: asyncio.Future, stage: str):
+        """
+        task(추론 슬롯 대기 등)가 끝날 때까지 기다리며 취소 조건을 확인 - 조건이 되면 AnalysisCancelled
+        task 자체를 취소/정리하는 것은 호출한 쪽 책임 (InferenceScheduler.slot 참고)
+        """
+        poll = DISCONNECT_POLL_MS / 1000
+        while True:
+            remaining = self.remaining()
+            timeout = poll if remaining is None else min(poll, max(0.0, remaining))
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            await self.check_async(stage)
@@ -0,0 +1,125 @@
+# app/services/stats_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# 관리자 통계 캐시 설정 (초)
+ADMIN_STATS_CACHE_TTL = float(os.getenv("ADMIN_STATS_CACHE_TTL", "30"))          # 이 시간 동안은 캐시 그대로 응답
+ADMIN_STATS_CACHE_MAX_STALE = float(os.getenv("ADMIN_STATS_CACHE_MAX_STALE", "300"))  # TTL 이후 이 시간까지는 이전 값 응답 + 백그라운드 갱신
+
+# ETag 계산에서 제외할 키 (매 갱신마다 바뀌지만 통계 내용과 무관)
+_VOLATILE_KEYS = ("last_updated",)
+
+
+@dataclass
+class CachedStats:
+    value: Dict[str, Any]
+    etag: str
+    loaded_at: float  # time.monotonic()
+
+    def age(self) -> int:
+        """캐시된 지 몇 초 지났는지 (Age 헤더용)"""
+        return int(time.monotonic() - self.loaded_at)
+
+
+def make_etag(value: Dict[str, Any]) -> str:
+    """통계 내용 기반 약한 ETag (last_updated만 다른 경우 같은 값)"""
+    content = {key: item for key, item in value.items() if key not in _VOLATILE_KEYS}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return f'W/"{hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더가 현재 ETag와 일치하는지 (약한 비교)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class StatsCache:
+    """
+    프로세스 단위 stale-while-revalidate 캐시
+    - TTL 이내: 캐시 값 바로 반환
+    - TTL 초과 ~ max_stale: 이전 값을 반환하고 백그라운드 갱신 1개만 실행
+    - 캐시 없음/너무 오래됨: 갱신을 기다림 (동시 요청은 같은 갱신 작업을 공유)
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Dict[str, Any]]],
+                 ttl: float = ADMIN_STATS_CACHE_TTL, max_stale: float = ADMIN_STATS_CACHE_MAX_STALE):
+        self.loader = loader
+        self.ttl = max(0.0, ttl)
+        self.max_stale = max(0.0, max_stale)
+        self._entry: Optional[CachedStats] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # 관측용 카운터
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    async def get(self) -> CachedStats:
+        entry = self._entry
+        if entry is not None:
+            age = time.monotonic() - entry.loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry
+            if age < self.ttl + self.max_stale:
+                self.stale_hits += 1
+                self._ensure_refresh()
+                return entry
+
+        self.misses += 1
+        # shield: 기다리던 요청이 끊겨도 공유 중인 갱신 작업은 취소되지 않음
+        return await asyncio.shield(self._ensure_refresh())
+
+    def invalidate(self):
+        """다음 요청에서 반드시 새로 조회"""
+        self._entry = None
+
+    def stats(self) -> dict:
+        return {
+            "ttl": self.ttl,
+            "max_stale": self.max_stale,
+            "age": self._entry.age() if self._entry else None,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes
+        }
+
+    def _ensure_refresh(self) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(self._refresh())
+            task.add_done_callback(self._on_refresh_done)
+            self._refresh_task = task
+        return task
+
+    async def _refresh(self) -> CachedStats:
+        value = await self.loader()
+        entry = CachedStats(value=value, etag=make_etag(value), loaded_at=time.monotonic())
+        self._entry = entry
+        self.refreshes += 1
+        return entry
+
+    @staticmethod
+    def _on_refresh_done(task: asyncio.Task):
+        # 백그라운드 갱신 실패는 이전 값을 계속 응답하고 로그만 남김
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ 관리자 통계 캐시 갱신 실패: {task.exception()}")
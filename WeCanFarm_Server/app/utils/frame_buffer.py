@@ -0,0 +1,222 @@
+# app/utils/frame_buffer.py
+import sys
+import threading
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# 슬롯 헤더: 슬롯별 세대(generation) 카운터 (int64)
+_HEADER_ALIGN = 64
+
+# 기본 슬롯 크기: 1920x1080 RGB 프레임 1장
+DEFAULT_SLOT_NBYTES = 1920 * 1080 * 3
+
+# 워커 프로세스에서 attach한 링 버퍼 캐시 (이름 → 링)
+_attached_rings: Dict[str, "SharedFrameRing"] = {}
+
+# Python 3.12 이하에서 resource_tracker.register를 잠시 바꾸는 동안 다른 스레드의 생성/attach가 끼어들지 않도록
+# (이 모듈의 SharedMemory 생성은 모두 이 잠금을 거침)
+_tracker_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class FrameDescriptor:
+    """워커에게 전달하는 슬롯 식별자 (피클 크기 수십 바이트)"""
+    shm_name: str
+    slot: int
+    generation: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class SlotUnavailableError(RuntimeError):
+    """빈 슬롯을 제한 시간 내에 확보하지 못함"""
+
+
+class StaleFrameError(RuntimeError):
+    """읽는 도중 슬롯이 재활용됨 (세대 불일치)"""
+
+
+class SharedFrameRing:
+    """multiprocessing.shared_memory 기반 고정 슬롯 링 버퍼
+
+    API 프로세스(소유자)가 디코딩된 RGB 프레임이나 전처리된 (224,224,3) 텐서를
+    슬롯에 쓰고, 워커에는 FrameDescriptor만 넘깁니다.
+    슬롯 재활용은 소유자만 수행하며, 워커 결과를 받은 뒤 release()로 반환합니다.
+    """
+
+    def __init__(self, slots: int = 8, slot_nbytes: int = DEFAULT_SLOT_NBYTES,
+                 name: Optional[str] = None, create: bool = True):
+        if slots <= 0 or slot_nbytes <= 0:
+            raise ValueError("slots와 slot_nbytes는 양수여야 합니다")
+
+        self.slots = slots
+        self.slot_nbytes = slot_nbytes
+        self._header_nbytes = _aligned(slots * 8)
+        self._owner = create
+
+        total = self._header_nbytes + slots * slot_nbytes
+        if create:
+            with _tracker_lock:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=total)
+        else:
+            self._shm = _attach_untracked(name)
+
+        self._generations = np.ndarray((slots,), dtype=np.int64, buffer=self._shm.buf)
+        if create:
+            self._generations[:] = 0
+
+        # 소유자 측 슬롯 관리 (빈 슬롯 목록 + 대기용 세마포어)
+        self._lock = threading.Lock()
+        self._free = list(range(slots)) if create else []
+        self._available = threading.Semaphore(slots if create else 0)
+        self._in_use = set()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @classmethod
+    def attach(cls, name: str, slots: int, slot_nbytes: int) -> "SharedFrameRing":
+        """워커 프로세스에서 기존 링 버퍼에 연결 (프로세스당 한 번만 attach)"""
+        ring = _attached_rings.get(name)
+        if ring is None:
+            ring = cls(slots=slots, slot_nbytes=slot_nbytes, name=name, create=False)
+            _attached_rings[name] = ring
+        return ring
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """빈 슬롯 확보 (없으면 timeout까지 대기)"""
+        self._require_owner()
+        if not self._available.acquire(timeout=timeout):
+            raise SlotUnavailableError(f"{timeout}s 내에 빈 슬롯을 확보하지 못했습니다")
+        with self._lock:
+            slot = self._free.pop()
+            self._in_use.add(slot)
+        return slot
+
+    def write(self, array: np.ndarray, timeout: Optional[float] = None) -> FrameDescriptor:
+        """배열을 빈 슬롯에 복사하고 디스크립터 반환"""
+        array = np.ascontiguousarray(array)
+        if array.nbytes > self.slot_nbytes:
+            raise ValueError(f"프레임 크기 {array.nbytes}B가 슬롯 크기 {self.slot_nbytes}B를 초과합니다")
+
+        slot = self.acquire(timeout)
+        try:
+            target = np.ndarray(array.shape, dtype=array.dtype,
+                                buffer=self._shm.buf, offset=self._slot_offset(slot))
+            target[...] = array
+            # 데이터를 다 쓴 뒤 세대를 올려야 워커가 이전 내용을 읽지 않음
+            self._generations[slot] += 1
+            generation = int(self._generations[slot])
+        except Exception:
+            self._return_slot(slot)
+            raise
+
+        return FrameDescriptor(
+            shm_name=self.name,
+            slot=slot,
+            generation=generation,
+            shape=tuple(array.shape),
+            dtype=array.dtype.str
+        )
+
+    def write_image(self, image: Image.Image, timeout: Optional[float] = None) -> FrameDescriptor:
+        """PIL 이미지를 RGB uint8 프레임으로 슬롯에 기록"""
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return self.write(np.asarray(image, dtype=np.uint8), timeout)
+
+    def read(self, desc: FrameDescriptor, copy: bool = False) -> np.ndarray:
+        """디스크립터가 가리키는 프레임 조회 (copy=False면 zero-copy 뷰)"""
+        self._check_generation(desc)
+        view = np.ndarray(desc.shape, dtype=np.dtype(desc.dtype),
+                          buffer=self._shm.buf, offset=self._slot_offset(desc.slot))
+        if copy:
+            view = view.copy()
+            # 복사 중 재활용되었으면 내용이 섞였을 수 있음
+            self._check_generation(desc)
+        return view
+
+    def release(self, desc: FrameDescriptor):
+        """워커 처리가 끝난 슬롯 반환 (소유자 전용)"""
+        self._require_owner()
+        if int(self._generations[desc.slot]) != desc.generation:
+            raise StaleFrameError(f"슬롯 {desc.slot}이 이미 재활용되었습니다")
+        self._return_slot(desc.slot)
+
+    def in_use(self) -> int:
+        """현재 사용 중인 슬롯 수"""
+        with self._lock:
+            return len(self._in_use)
+
+    def close(self):
+        """공유 메모리 해제 (소유자는 unlink까지 수행)"""
+        self._generations = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        else:
+            _attached_rings.pop(self._shm.name, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _slot_offset(self, slot: int) -> int:
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"잘못된 슬롯 번호: {slot}")
+        return self._header_nbytes + slot * self.slot_nbytes
+
+    def _check_generation(self, desc: FrameDescriptor):
+        current = int(self._generations[desc.slot])
+        if current != desc.generation:
+            raise StaleFrameError(
+                f"슬롯 {desc.slot} 세대 불일치 (기대 {desc.generation}, 현재 {current})"
+            )
+
+    def _return_slot(self, slot: int):
+        with self._lock:
+            if slot not in self._in_use:
+                raise ValueError(f"사용 중이 아닌 슬롯 반환 시도: {slot}")
+            self._in_use.remove(slot)
+            self._free.append(slot)
+        self._available.release()
+
+    def _require_owner(self):
+        if not self._owner:
+            raise RuntimeError("슬롯 할당/반환은 링 버퍼를 생성한 프로세스에서만 가능합니다")
+
+
+def read_frame(desc: FrameDescriptor, slots: int, slot_nbytes: int, copy: bool = False) -> np.ndarray:
+    """워커용: 디스크립터로 프레임 조회 (필요시 링 버퍼에 자동 attach)"""
+    ring = SharedFrameRing.attach(desc.shm_name, slots, slot_nbytes)
+    return ring.read(desc, copy=copy)
+
+
+def _aligned(nbytes: int) -> int:
+    return (nbytes + _HEADER_ALIGN - 1) // _HEADER_ALIGN * _HEADER_ALIGN
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    resource_tracker에 등록하지 않고 attach (워커 종료 시 세그먼트가 unlink되는 것 방지)
+    - 3.12 이하는 register를 잠금 안에서만 바꿈 (attach 후 unregister는 워커가 소유자와 같은
+      resource_tracker를 공유할 때 소유자의 등록까지 지우므로 쓰지 않음)
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    from multiprocessing import resource_tracker
+    with _tracker_lock:
+        original_register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = original_register
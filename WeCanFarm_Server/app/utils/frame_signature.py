@@ -0,0 +1,49 @@
+# app/utils/frame_signature.py
+import os
+from PIL import Image
+from typing import List
+
+# 직전 키프레임과의 해밍 거리가 이 값 이하면 중복 프레임으로 간주 (64비트 dHash 기준)
+FRAME_DEDUP_MAX_DISTANCE = int(os.getenv("FRAME_DEDUP_MAX_DISTANCE", "6"))
+
+_HASH_SIZE = 8
+
+def frame_signature(image: Image.Image) -> int:
+    """
+    프레임 시그니처 계산 (64비트 difference hash)
+    - 9x8 그레이스케일로 축소 후 가로 인접 픽셀 밝기 비교
+    """
+    small = image.convert("L").resize((_HASH_SIZE + 1, _HASH_SIZE), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    width = _HASH_SIZE + 1
+
+    signature = 0
+    for row in range(_HASH_SIZE):
+        offset = row * width
+        for col in range(_HASH_SIZE):
+            signature = (signature << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return signature
+
+def hamming_distance(a: int, b: int) -> int:
+    """두 시그니처의 다른 비트 수"""
+    return bin(a ^ b).count("1")
+
+def select_keyframes(frames: List[Image.Image], max_distance: int = None) -> List[int]:
+    """
+    직전 키프레임과 충분히 다른 프레임만 선택
+    Args:
+        frames: 순서대로 정렬된 프레임 리스트
+        max_distance: 이 거리 이하면 중복으로 보고 건너뜀
+    Returns:
+        키프레임 인덱스 리스트 (첫 프레임은 항상 포함)
+    """
+    max_distance = FRAME_DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+
+    keyframes = []
+    last_signature = None
+    for index, frame in enumerate(frames):
+        signature = frame_signature(frame)
+        if last_signature is None or hamming_distance(signature, last_signature) > max_distance:
+            keyframes.append(index)
+            last_signature = signature
+    return keyframes
@@ -1,14 +1,22 @@
 # app/utils/image_handler.py
 import base64
+import logging
 import os
 import numpy as np
 from io import BytesIO
 from PIL import Image, ImageDraw, ImageFont
 from typing import List, Tuple, Dict
 
+from .logging_config import debug_sampled
+
+logger = logging.getLogger(__name__)
+
 # YOLO 모델 전역 변수 (한 번만 로드)
 _yolo_model = None
 
+# 배치 추론 1회에 넣을 최대 이미지 수 (Ultralytics가 입력 전체를 전처리/스택하므로 큰 버스트는 나눠서 추론)
+YOLO_BATCH_CHUNK = max(1, int(os.getenv("YOLO_BATCH_CHUNK", "8")))
+
 def load_yolo_model():
     """YOLO Segmentation 모델 로드 (서버 시작시 한 번만)"""
     global _yolo_model
@@ -31,6 +39,45 @@ def decode_base64_to_image(base64_str: str) -> Image.Image:
     image_data = base64.b64decode(base64_str)
     return Image.open(BytesIO(image_data))
 
+def decode_base64_to_video_frames(base64_str: str, max_frames: int = 120, stride: int = 1) -> List[Image.Image]:
+    """base64 영상(mp4 등)을 PIL 프레임 리스트로 디코딩
+    Args:
+        base64_str: base64 인코딩된 영상
+        max_frames: 최대 추출 프레임 수
+        stride: 몇 프레임마다 하나씩 추출할지
+    Returns:
+        RGB 프레임 리스트
+    """
+    import tempfile
+    import cv2
+    
+    if "," in base64_str:
+        base64_str = base64_str.split(",")[1]
+    video_data = base64.b64decode(base64_str)
+    
+    # OpenCV는 메모리 버퍼에서 영상을 직접 열 수 없어 임시 파일 사용
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as tmp:
+        tmp.write(video_data)
+        tmp.flush()
+        
+        capture = cv2.VideoCapture(tmp.name)
+        frames = []
+        index = 0
+        try:
+            while len(frames) < max_frames:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                if index % max(1, stride) == 0:
+                    frames.append(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+                index += 1
+        finally:
+            capture.release()
+    
+    if not frames:
+        raise ValueError("영상에서 프레임을 읽을 수 없습니다")
+    return frames
+
 def image_to_base64(image: Image.Image, format: str = "JPEG") -> str:
     """PIL Image를 base64 문자열로 인코딩"""
     buffered = BytesIO()
@@ -153,7 +200,7 @@ def validate_image(image: Image.Image) -> bool:
         return True
         
     except Exception as e:
-        print(f"이미지 유효성 검사 실패: {e}")
+        logger.info("이미지 유효성 검사 실패: %s", e)
         return False
 
 def prepare_image_for_model(image: Image.Image, target_size: Tuple[int, int] = (224, 224)) -> Image.Image:
@@ -173,6 +220,89 @@ def prepare_image_for_model(image: Image.Image, target_size: Tuple[int, int] = (
     
     return image
 
+def collect_raw_detections(result, offset: Tuple[int, int] = (0, 0)) -> List[dict]:
+    """
+    YOLO 결과 1건에서 필터링 전 감지 목록 추출
+    Args:
+        result: ultralytics Results 객체 (이미지 1장 분량)
+        offset: 타일 추론 시 원본 이미지 기준 (x, y) 오프셋
+    Returns:
+        [{"bbox": [x1, y1, x2, y2], "crop_type": "pepper", "confidence": 0.9}, ...]
+    """
+    boxes = result.boxes    # 바운딩박스 (Detection 결과)
+    if boxes is None or len(boxes) == 0:
+        logger.debug("🔍 감지된 박스가 없음")
+        return []
+    
+    logger.debug("🔍 감지된 객체 수: %d", len(boxes))
+    ox, oy = offset
+    raw_detections = []
+    
+    for box in boxes:
+        # 바운딩박스 좌표
+        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+        
+        # 신뢰도
+        confidence = float(box.conf[0].cpu().numpy())
+        
+        raw_detections.append({
+            "bbox": [int(x1) + ox, int(y1) + oy, int(x2) + ox, int(y2) + oy],
+            "crop_type": "pepper",
+            "confidence": confidence
+        })
+    
+    return raw_detections
+
+def filter_detections(raw_detections: List[dict], image_width: int, image_height: int) -> List[dict]:
+    """
+    YOLO 원본 감지 결과 필터링 (신뢰도 → 크기 → 상위 5개)
+    Args:
+        raw_detections: collect_raw_detections() 결과
+        image_width, image_height: 크기 비율 계산 기준 이미지 크기
+    Returns:
+        필터링된 감지 리스트
+    """
+    # 간단한 3단계 필터링 (하드코딩)
+    if raw_detections:
+        # 1단계: 신뢰도 필터링 (50% 이상)
+        confidence_filtered = []
+        for detection in raw_detections:
+            if detection["confidence"] >= 0.5:
+                confidence_filtered.append(detection)
+                debug_sampled(logger, "🔍 1차 통과: 신뢰도 %.2f", detection["confidence"])
+            else:
+                debug_sampled(logger, "❌ 1차 탈락: 신뢰도 %.2f", detection["confidence"])
+        
+        # 2단계: 크기 필터링 (0.5% ~ 80% 범위)
+        size_filtered = []
+        total_area = image_width * image_height
+        
+        for detection in confidence_filtered:
+            bbox = detection["bbox"]
+            x1, y1, x2, y2 = bbox
+            bbox_area = (x2 - x1) * (y2 - y1)
+            area_ratio = bbox_area / total_area
+            
+            # 최소 크기 < 박스 크기 < 최대 크기
+            if 0.005 <= area_ratio <= 1.0:  # 0.5% ~ 80%
+                size_filtered.append(detection)
+                debug_sampled(logger, "🔍 2차 통과: 크기비율 %.3f", area_ratio)
+            elif area_ratio < 0.005:
+                debug_sampled(logger, "❌ 2차 탈락(너무 작음): 크기비율 %.3f", area_ratio)
+            else:
+                debug_sampled(logger, "❌ 2차 탈락(너무 큼): 크기비율 %.3f", area_ratio)
+        
+        # 3단계: 신뢰도 순 정렬 후 상위 5개
+        size_filtered.sort(key=lambda x: x["confidence"], reverse=True)
+        filtered_detections = size_filtered[:5]
+        
+        logger.debug("🔍 필터링 완료: 원본 %d개 → 신뢰도 %d개 → 크기 %d개 → 최종 %d개",
+                     len(raw_detections), len(confidence_filtered), len(size_filtered), len(filtered_detections))
+    else:
+        filtered_detections = []
+    
+    return filtered_detections
+
 def yolo_detection(image: Image.Image) -> List[dict]:
     """
     YOLO Segmentation 감지 메인 함수
@@ -185,14 +315,14 @@ def yolo_detection(image: Image.Image) -> List[dict]:
         # YOLO 모델 로드
         model = load_yolo_model()
         if model is None:
-            print("❌ YOLO 모델이 로드되지 않았습니다.")
+            logger.error("❌ YOLO 모델이 로드되지 않았습니다.")
             return []
         
         # 이미지를 RGB로 변환 (YOLO 입력용)
         if image.mode != 'RGB':
             image = image.convert('RGB')
         
-        print(f"🔍 YOLO Segmentation 추론 시작 - 이미지 크기: {image.size}")
+        logger.debug("🔍 YOLO Segmentation 추론 시작 - 이미지 크기: %s", image.size)
         
         # YOLO Segmentation 추론 실행
         results = model(image, verbose=False)
@@ -202,81 +332,52 @@ def yolo_detection(image: Image.Image) -> List[dict]:
         image_width, image_height = image.size
         
         for result in results:
-            boxes = result.boxes    # 바운딩박스 (Detection 결과)
-            masks = result.masks    # 마스크 (Segmentation 결과)
-            
-            if boxes is not None and len(boxes) > 0:
-                print(f"🔍 감지된 객체 수: {len(boxes)}")
-                
-                for i, box in enumerate(boxes):
-                    # 바운딩박스 좌표
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    
-                    # 신뢰도
-                    confidence = float(box.conf[0].cpu().numpy())
-                    
-                    # 클래스
-                    cls_id = int(box.cls[0].cpu().numpy())
-                    
-                    # 마스크 정보 (옵션)
-                    mask_data = None
-                    if masks is not None and i < len(masks):
-                        mask_data = masks[i].data.cpu().numpy()
-                    
-                    detection = {
-                        "bbox": [int(x1), int(y1), int(x2), int(y2)],
-                        "crop_type": "pepper",
-                        "confidence": confidence
-                    }
-                    raw_detections.append(detection)
-            else:
-                print("🔍 감지된 박스가 없음")
-        
-        # 간단한 3단계 필터링 (하드코딩)
-        if raw_detections:
-            # 1단계: 신뢰도 필터링 (50% 이상)
-            confidence_filtered = []
-            for detection in raw_detections:
-                if detection["confidence"] >= 0.5:
-                    confidence_filtered.append(detection)
-                    print(f"🔍 1차 통과: 신뢰도 {detection['confidence']:.2f}")
-                else:
-                    print(f"❌ 1차 탈락: 신뢰도 {detection['confidence']:.2f}")
-            
-            # 2단계: 크기 필터링 (0.5% ~ 80% 범위)
-            size_filtered = []
-            total_area = image_width * image_height
-            
-            for detection in confidence_filtered:
-                bbox = detection["bbox"]
-                x1, y1, x2, y2 = bbox
-                bbox_area = (x2 - x1) * (y2 - y1)
-                area_ratio = bbox_area / total_area
-                
-                # 최소 크기 < 박스 크기 < 최대 크기
-                if 0.005 <= area_ratio <= 1.0:  # 0.5% ~ 80%
-                    size_filtered.append(detection)
-                    print(f"🔍 2차 통과: 크기비율 {area_ratio:.3f}")
-                elif area_ratio < 0.005:
-                    print(f"❌ 2차 탈락(너무 작음): 크기비율 {area_ratio:.3f}")
-                else:
-                    print(f"❌ 2차 탈락(너무 큼): 크기비율 {area_ratio:.3f}")
-            
-            # 3단계: 신뢰도 순 정렬 후 상위 5개
-            size_filtered.sort(key=lambda x: x["confidence"], reverse=True)
-            filtered_detections = size_filtered[:5]
-            
-            print(f"🔍 3차 완료: 최종 {len(filtered_detections)}개 선택")
-        else:
-            filtered_detections = []
+            raw_detections.extend(collect_raw_detections(result))
+        
+        filtered_detections = filter_detections(raw_detections, image_width, image_height)
         
         if len(filtered_detections) == 0:
-            print("📝 탐지된 객체가 없습니다.")
+            logger.debug("📝 탐지된 객체가 없습니다.")
         else:
-            print(f"✅ YOLO Segmentation 감지 완료: {len(filtered_detections)}개 객체")
+            logger.debug("✅ YOLO Segmentation 감지 완료: %d개 객체", len(filtered_detections))
         
         return filtered_detections
         
     except Exception as e:
-        print(f"❌ YOLO Segmentation 추론 실패: {e}")
-        return []
\ No newline at end of file
+        logger.exception("❌ YOLO Segmentation 추론 실패: %s", e)
+        return []
+
+def yolo_detection_batch(images: List[Image.Image]) -> List[List[dict]]:
+    """
+    여러 이미지를 YOLO 배치 호출로 감지 (버스트/영상 프레임용, YOLO_BATCH_CHUNK장씩 나눠 추론)
+    Args:
+        images: 입력 이미지 리스트
+    Returns:
+        이미지별 감지 리스트 (입력 순서 유지)
+    """
+    if not images:
+        return []
+    
+    try:
+        model = load_yolo_model()
+        if model is None:
+            logger.error("❌ YOLO 모델이 로드되지 않았습니다.")
+            return [[] for _ in images]
+        
+        rgb_images = [image if image.mode == 'RGB' else image.convert('RGB') for image in images]
+        logger.debug("🔍 YOLO 배치 추론 시작 - 이미지 %d장", len(rgb_images))
+        
+        batch_detections = []
+        for start in range(0, len(rgb_images), YOLO_BATCH_CHUNK):
+            chunk = rgb_images[start:start + YOLO_BATCH_CHUNK]
+            results = model(chunk, verbose=False)
+            for image, result in zip(chunk, results):
+                raw_detections = collect_raw_detections(result)
+                batch_detections.append(filter_detections(raw_detections, *image.size))
+        
+        logger.debug("✅ YOLO 배치 감지 완료: %d개 객체", sum(len(d) for d in batch_detections))
+        return batch_detections
+        
+    except Exception as e:
+        logger.exception("❌ YOLO 배치 추론 실패: %s", e)
+        return [[] for _ in images]
@@ -0,0 +1,160 @@
+# app/utils/logging_config.py
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+# 기본 로그 레벨 (app.* 로거 전체)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# 모듈별 레벨 - 쉼표로 구분 (예: "app.routers.auth=DEBUG,app.utils.image_handler=WARNING")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# 출력 형식: text | json (json이면 extra로 넘긴 필드도 함께 출력)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# 객체 1개마다 남기는 DEBUG 로그(탐지 필터 통과/탈락 등)를 이 비율만 출력 (1이면 전부)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+# 출력 스레드가 밀렸을 때 쌓아둘 최대 로그 수 (넘치면 버리고 개수만 셈 - 요청 스레드는 기다리지 않음)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+APP_LOGGER = "app"
+
+# 로그에 남으면 안 되는 값: Bearer 토큰, JWT, 비밀번호/시크릿 필드
+_REDACTIONS = (
+    (re.compile(r"(Bearer\s+)[A-Za-z0-9._~+/=-]+", re.IGNORECASE), r"\1[REDACTED]"),
+    (re.compile(r"eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*"), "[REDACTED_JWT]"),
+    (re.compile(r"""((?:password|passwd|secret|secret_key|access_token|token)["']?\s*[:=]\s*["']?)[^\s"',}]+""",
+                re.IGNORECASE), r"\1[REDACTED]"),
+)
+
+# LogRecord 기본 속성 - 나머지는 extra로 넘긴 필드로 보고 JSON에 포함
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def redact(text: str) -> str:
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class RedactingFormatter(logging.Formatter):
+    """출력 스레드에서 포맷 후 자격 증명을 가림"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact(super().format(record))
+
+
+class JsonFormatter(RedactingFormatter):
+    """한 줄에 JSON 1개 (로그 수집기용)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": redact(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = redact(value) if isinstance(value, str) else value
+        if record.exc_info:
+            entry["exc"] = redact(self.formatException(record.exc_info))
+        # 값 단위로 가린 뒤 직렬화 (직렬화 후에는 따옴표가 이스케이프되어 패턴이 맞지 않음)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    요청 스레드에서는 메시지를 완성해 큐에 넣기만 함 (stdout 쓰기는 QueueListener 스레드)
+    큐가 가득 차면 기다리지 않고 버린 뒤 dropped만 증가
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _DrainingListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # 종료 시에는 큐가 가득 차 있어도 출력 스레드가 비울 때까지 기다림 (put_nowait면 queue.Full)
+        self.queue.put(self._sentinel)
+
+
+_queue_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[_DrainingListener] = None
+_atexit_registered = False
+
+
+def _parse_levels(spec: str) -> Dict[str, int]:
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if name and level:
+            levels[name] = logging.getLevelName(level) if not level.isdigit() else int(level)
+    return levels
+
+
+def setup_logging(level: str = LOG_LEVEL, levels: str = LOG_LEVELS, fmt: str = LOG_FORMAT,
+                  stream=None) -> logging.Logger:
+    """
+    app.* 로거에 비동기 출력 설정 (여러 번 호출해도 한 번만 적용)
+    - 레벨 미달 로그는 logger 단계에서 바로 버려짐 (메시지 포맷도 하지 않음)
+    - uvicorn 등 다른 로거는 건드리지 않음
+    """
+    global _queue_handler, _listener, _atexit_registered
+    app_logger = logging.getLogger(APP_LOGGER)
+    if _listener is not None:
+        return app_logger
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(RedactingFormatter("%(asctime)s %(levelname)-7s %(name)s - %(message)s"))
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _listener = _DrainingListener(_queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
+
+    app_logger.addHandler(_queue_handler)
+    app_logger.setLevel(level)
+    app_logger.propagate = False
+    for name, module_level in _parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+    return app_logger
+
+
+def shutdown_logging():
+    """큐에 남은 로그를 모두 출력하고 출력 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        if _queue_handler is not None:
+            logging.getLogger(APP_LOGGER).removeHandler(_queue_handler)
+            if _queue_handler.dropped:
+                print(f"⚠️ 로그 큐가 가득 차 {_queue_handler.dropped}건을 버렸습니다", file=sys.stderr)
+
+
+def debug_sampled(logger: logging.Logger, msg: str, *args, rate: float = None):
+    """객체/프레임 단위처럼 요청 1건에 여러 번 찍히는 DEBUG 로그 - rate 비율만 출력"""
+    if logger.isEnabledFor(logging.DEBUG):
+        rate = LOG_DEBUG_SAMPLE_RATE if rate is None else rate
+        if rate >= 1 or random.random() < rate:
+            logger.debug(msg, *args, extra={"sample_rate": rate})
@@ -0,0 +1,145 @@
+# app/utils/tiling.py
+import logging
+import os
+import numpy as np
+from PIL import Image
+from typing import List, Tuple
+
+from .image_handler import load_yolo_model, collect_raw_detections
+
+logger = logging.getLogger(__name__)
+
+# 타일 추론 설정 (환경 변수로 조정)
+TILE_SIZE = int(os.getenv("YOLO_TILE_SIZE", "1024"))                # 타일 한 변 길이 (px)
+TILE_OVERLAP = float(os.getenv("YOLO_TILE_OVERLAP", "0.2"))         # 인접 타일 겹침 비율
+TILE_THRESHOLD = int(os.getenv("YOLO_TILE_THRESHOLD", "2048"))      # 긴 변이 이 값을 넘으면 타일 모드
+TILE_BATCH_SIZE = int(os.getenv("YOLO_TILE_BATCH_SIZE", "8"))       # 한 번에 YOLO에 넣을 타일 수
+TILE_NMS_IOU = float(os.getenv("YOLO_TILE_NMS_IOU", "0.5"))         # 병합 시 IoU 임계값
+TILE_MAX_DETECTIONS = int(os.getenv("YOLO_TILE_MAX_DETECTIONS", "20"))
+
+# 타일 경계에서 잘린 박스가 온전한 박스에 포함되는 경우 병합 기준 (작은 박스 대비 교집합 비율)
+_CONTAINMENT_THRESHOLD = 0.8
+
+def should_use_tiling(image: Image.Image, threshold: int = None) -> bool:
+    """긴 변이 임계값을 넘는 고해상도 이미지인지 확인"""
+    threshold = TILE_THRESHOLD if threshold is None else threshold
+    return threshold > 0 and max(image.size) > threshold
+
+def compute_tiles(width: int, height: int, tile_size: int = None,
+                  overlap: float = None) -> List[Tuple[int, int, int, int]]:
+    """
+    겹치는 타일 좌표 계산
+    Returns:
+        [(x1, y1, x2, y2), ...] - 마지막 타일은 이미지 끝에 맞춤
+    """
+    tile_size = TILE_SIZE if tile_size is None else tile_size
+    overlap = TILE_OVERLAP if overlap is None else overlap
+    if tile_size <= 0 or not 0 <= overlap < 1:
+        raise ValueError("tile_size는 양수, overlap은 0 이상 1 미만이어야 합니다")
+
+    stride = max(1, int(tile_size * (1 - overlap)))
+    xs = _tile_starts(width, tile_size, stride)
+    ys = _tile_starts(height, tile_size, stride)
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in ys for x in xs
+    ]
+
+def tiled_yolo_detection(image: Image.Image, tile_size: int = None, overlap: float = None,
+                         batch_size: int = None) -> List[dict]:
+    """
+    타일 단위 YOLO 감지 (고해상도 이미지용)
+    - 겹치는 타일로 분할 → 배치 추론 → 원본 좌표로 변환 → NMS 병합
+    Args:
+        image: 입력 이미지
+        tile_size: 타일 한 변 길이
+        overlap: 타일 겹침 비율
+        batch_size: 한 번에 추론할 타일 수 (1 미만이면 1)
+    Returns:
+        yolo_detection()과 같은 형태의 감지 리스트
+    """
+    batch_size = max(1, TILE_BATCH_SIZE if batch_size is None else batch_size)
+
+    try:
+        model = load_yolo_model()
+        if model is None:
+            logger.error("❌ YOLO 모델이 로드되지 않았습니다.")
+            return []
+
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        width, height = image.size
+        tiles = compute_tiles(width, height, tile_size, overlap)
+        logger.debug("🔍 YOLO 타일 추론 시작 - 이미지 크기: %s, 타일 %d개", image.size, len(tiles))
+
+        raw_detections = []
+        for i in range(0, len(tiles), batch_size):
+            batch = tiles[i:i + batch_size]
+            crops = [image.crop(box) for box in batch]
+            results = model(crops, verbose=False)
+            for (x1, y1, _, _), result in zip(batch, results):
+                raw_detections.extend(collect_raw_detections(result, offset=(x1, y1)))
+
+        # 신뢰도 필터링 (whole-image 모드와 동일한 50% 기준)
+        candidates = [d for d in raw_detections if d["confidence"] >= 0.5]
+
+        # 타일 면적 기준 크기 필터링 (작은 병변을 살리기 위해 전체 이미지 대신 타일 기준)
+        tile_area = (tile_size or TILE_SIZE) ** 2
+        candidates = [d for d in candidates if _area(d["bbox"]) / tile_area >= 0.005]
+
+        merged = merge_detections(candidates, TILE_NMS_IOU)
+        final_detections = merged[:TILE_MAX_DETECTIONS]
+        logger.debug("✅ YOLO 타일 감지 완료: 원본 %d개 → 병합 후 %d개", len(raw_detections), len(final_detections))
+        return final_detections
+
+    except Exception as e:
+        logger.exception("❌ YOLO 타일 추론 실패: %s", e)
+        return []
+
+def merge_detections(detections: List[dict], iou_threshold: float = None) -> List[dict]:
+    """
+    원본 좌표계 기준 NMS 병합 (신뢰도 내림차순 반환)
+    - IoU가 임계값 이상이거나, 작은 박스가 큰 박스에 대부분 포함되면 중복으로 간주
+    """
+    iou_threshold = TILE_NMS_IOU if iou_threshold is None else iou_threshold
+    if not detections:
+        return []
+
+    boxes = np.array([d["bbox"] for d in detections], dtype=np.float64)
+    scores = np.array([d["confidence"] for d in detections], dtype=np.float64)
+    areas = (boxes[:, 2] - boxes[:, 0]).clip(0) * (boxes[:, 3] - boxes[:, 1]).clip(0)
+
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        ix1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        iy1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        ix2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        iy2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        inter = (ix2 - ix1).clip(0) * (iy2 - iy1).clip(0)
+
+        union = areas[best] + areas[rest] - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        smaller = np.minimum(areas[best], areas[rest])
+        ios = np.divide(inter, smaller, out=np.zeros_like(inter), where=smaller > 0)
+
+        order = rest[(iou < iou_threshold) & (ios < _CONTAINMENT_THRESHOLD)]
+
+    return [detections[i] for i in keep]
+
+def _tile_starts(length: int, tile_size: int, stride: int) -> List[int]:
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size + 1, stride))
+    if starts[-1] != length - tile_size:
+        starts.append(length - tile_size)
+    return starts
+
+def _area(bbox: List[int]) -> int:
+    x1, y1, x2, y2 = bbox
+    return max(0, x2 - x1) * max(0, y2 - y1)
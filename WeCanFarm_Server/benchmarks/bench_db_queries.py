@@ -0,0 +1,183 @@
+# benchmarks/bench_db_queries.py
+"""
+데이터 규모별 DB 조회 벤치마크: 관리자 통계 / 분석 이력 / Airflow 일일 통계 쿼리
+
+합성 데이터(app.database.synthetic_data)를 단계적으로 적재하면서 각 규모에서 쿼리 시간을 측정합니다.
+기본값은 임시 SQLite 파일이며, --database-url로 로컬 PostgreSQL을 지정할 수 있습니다.
+(지정한 DB의 테이블을 모두 지우고 다시 만드므로 운영 DB에는 절대 사용하지 마세요)
+
+실행 (WeCanFarm_Server 디렉토리에서):
+    python -m benchmarks.bench_db_queries --sizes 10000,100000,1000000
+    python -m benchmarks.bench_db_queries --database-url postgresql://user:pw@localhost/wecanfarm_bench --sizes 100000,1000000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="데이터 규모별 DB 조회 벤치마크")
+    parser.add_argument("--database-url", default=None, help="기본: 임시 디렉토리의 SQLite 파일")
+    parser.add_argument("--sizes", default="10000,100000", help="분석 요청 수 (쉼표 구분, 오름차순)")
+    parser.add_argument("--requests-per-user", type=int, default=50, help="사용자 1명당 평균 요청 수")
+    parser.add_argument("--repeat", type=int, default=5, help="쿼리별 반복 횟수")
+    parser.add_argument("--history-depth", type=int, default=50, help="이력 조회 시 따라갈 페이지 수")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+# database.py가 import 시점에 DATABASE_URL을 읽으므로 app import 전에 설정
+os.environ["DATABASE_URL"] = ARGS.database_url or (
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'wecanfarm_bench_db_queries.db')}"
+)
+
+from sqlalchemy import select, func, text
+
+from app.database.database import engine, async_engine, AsyncSessionLocal, SessionLocal, create_tables, drop_tables
+from app.database.init_db import insert_initial_data
+from app.database.models import AnalysisRequest, AnalysisRequestCRUD
+from app.database.async_crud import AsyncAnalysisRequestCRUD
+from app.database.synthetic_data import generate
+from app.routers.admin import get_dashboard_stats
+
+# Airflow wecanfarm_daily_stats DAG와 같은 조건 (PostgreSQL 전용 ::date 캐스트 대신 바인드 파라미터 범위)
+DAILY_STATS_QUERIES = {
+    "daily_new_users": "SELECT COUNT(*) FROM users WHERE created_at >= :start AND created_at < :end",
+    "daily_requests": "SELECT COUNT(*) FROM analysis_requests WHERE created_at >= :start AND created_at < :end",
+    "daily_completed": (
+        "SELECT COUNT(*) FROM analysis_requests "
+        "WHERE created_at >= :start AND created_at < :end AND status = 'COMPLETED'"
+    ),
+    "total_users": "SELECT COUNT(*) FROM users",
+}
+
+
+def _timed(fn, repeat: int):
+    """fn()을 repeat번 실행해 (중앙값 ms, 최대 ms) 반환 (첫 실행은 캐시 워밍업으로 제외)"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+async def _timed_async(fn, repeat: int):
+    await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def _heaviest_user() -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            select(AnalysisRequest.user_id)
+            .group_by(AnalysisRequest.user_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).scalar()
+
+
+def _daily_stats_range():
+    """일일 통계 DAG가 집계하는 '어제' - 가장 최근 요청 전날의 [start, end)"""
+    with engine.connect() as conn:
+        latest = conn.execute(select(func.max(AnalysisRequest.created_at))).scalar()
+    if isinstance(latest, str):  # SQLite
+        latest = datetime.fromisoformat(latest)
+    start = latest.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    return start, start + timedelta(days=1)
+
+
+async def _bench_size(size: int, repeat: int, history_depth: int) -> dict:
+    timings = {}
+    user_id = _heaviest_user()
+
+    async def dashboard():
+        async with AsyncSessionLocal() as db:
+            await get_dashboard_stats(db)
+    timings["admin_dashboard_stats"] = await _timed_async(dashboard, repeat)
+
+    async def history_first_page():
+        async with AsyncSessionLocal() as db:
+            await AsyncAnalysisRequestCRUD.get_user_history_page(db, user_id, 20)
+    timings["history_first_page"] = await _timed_async(history_first_page, repeat)
+
+    # 깊은 페이지: 커서를 따라가 history_depth번째 페이지 조회 시간만 측정
+    async with AsyncSessionLocal() as db:
+        after = None
+        for _ in range(history_depth - 1):
+            rows = await AsyncAnalysisRequestCRUD.get_user_history_page(db, user_id, 20, after)
+            if not rows:
+                break
+            after = (rows[-1][1], rows[-1][0].id)
+
+    async def history_deep_page():
+        async with AsyncSessionLocal() as db:
+            await AsyncAnalysisRequestCRUD.get_user_history_page(db, user_id, 20, after)
+    timings[f"history_page_{history_depth}"] = await _timed_async(history_deep_page, repeat)
+
+    def legacy_history():
+        db = SessionLocal()
+        try:
+            AnalysisRequestCRUD.get_user_history(db, user_id)
+        finally:
+            db.close()
+    timings["legacy_user_history"] = _timed(legacy_history, repeat)
+
+    start, end = _daily_stats_range()
+    if engine.dialect.name == "sqlite":
+        start, end = start.isoformat(sep=" "), end.isoformat(sep=" ")
+    for label, sql in DAILY_STATS_QUERIES.items():
+        def daily_query(sql=sql):
+            with engine.connect() as conn:
+                conn.execute(text(sql), {"start": start, "end": end}).scalar()
+        timings[label] = _timed(daily_query, repeat)
+    return timings
+
+
+async def main():
+    sizes = sorted(int(size) for size in ARGS.sizes.split(","))
+    print(f"📊 DB 조회 벤치마크 ({engine.dialect.name}, 반복 {ARGS.repeat}회)")
+
+    drop_tables()
+    create_tables()
+    insert_initial_data()
+
+    loaded = 0
+    results = {}
+    for size in sizes:
+        new_requests = size - loaded
+        generate(users=max(1, new_requests // ARGS.requests_per_user), requests=new_requests,
+                 batch_size=ARGS.batch_size)
+        loaded = size
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text("ANALYZE"))
+        results[size] = await _bench_size(size, ARGS.repeat, ARGS.history_depth)
+    await async_engine.dispose()  # aiosqlite 연결 스레드가 남아 종료되지 않는 것 방지
+
+    labels = list(next(iter(results.values())))
+    print()
+    print(f"{'query (median / max)':<24}" + "".join(f"{f'{size:,} req':>24}" for size in sizes))
+    for label in labels:
+        cells = "".join(
+            f"{results[size][label][0]:.2f} / {results[size][label][1]:.2f}ms".rjust(24) for size in sizes
+        )
+        print(f"{label:<24}{cells}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
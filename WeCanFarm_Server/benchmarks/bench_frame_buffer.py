@@ -0,0 +1,108 @@
+# benchmarks/bench_frame_buffer.py
+"""
+프로세스 간 이미지 전달 벤치마크: 피클링(Queue) vs 공유 메모리 링 버퍼
+
+실행 (WeCanFarm_Server 디렉토리에서):
+    python -m benchmarks.bench_frame_buffer --frames 200
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.frame_buffer import SharedFrameRing, read_frame
+
+FRAME_SHAPES = {
+    "rgb_1080p": ((1080, 1920, 3), np.uint8),
+    "resnet_tensor": ((224, 224, 3), np.float32),
+}
+
+
+def _pickle_worker(in_q, out_q):
+    """배열 자체를 받아 간단한 연산 후 결과 반환"""
+    while True:
+        item = in_q.get()
+        if item is None:
+            break
+        out_q.put(float(item[::64, ::64].mean()))
+
+
+def _shm_worker(in_q, out_q, slots, slot_nbytes):
+    """디스크립터만 받아 공유 메모리에서 직접 읽음"""
+    while True:
+        desc = in_q.get()
+        if desc is None:
+            break
+        frame = read_frame(desc, slots, slot_nbytes)
+        out_q.put((desc, float(frame[::64, ::64].mean())))
+
+
+def bench_pickle(frame: np.ndarray, n_frames: int) -> float:
+    in_q, out_q = mp.Queue(maxsize=8), mp.Queue()
+    worker = mp.Process(target=_pickle_worker, args=(in_q, out_q))
+    worker.start()
+    start = time.perf_counter()
+    in_flight = 0
+    for _ in range(n_frames):
+        in_q.put(frame)
+        in_flight += 1
+        if in_flight >= 8:
+            out_q.get()
+            in_flight -= 1
+    for _ in range(in_flight):
+        out_q.get()
+    elapsed = time.perf_counter() - start
+    in_q.put(None)
+    worker.join()
+    return elapsed
+
+
+def bench_shared_memory(frame: np.ndarray, n_frames: int, slots: int = 8) -> float:
+    with SharedFrameRing(slots=slots, slot_nbytes=frame.nbytes) as ring:
+        in_q, out_q = mp.Queue(), mp.Queue()
+        worker = mp.Process(target=_shm_worker, args=(in_q, out_q, slots, frame.nbytes))
+        worker.start()
+        start = time.perf_counter()
+        in_flight = 0
+        for _ in range(n_frames):
+            if in_flight >= slots:
+                desc, _ = out_q.get()
+                ring.release(desc)
+                in_flight -= 1
+            in_q.put(ring.write(frame))
+            in_flight += 1
+        for _ in range(in_flight):
+            desc, _ = out_q.get()
+            ring.release(desc)
+        elapsed = time.perf_counter() - start
+        in_q.put(None)
+        worker.join()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="피클링 vs 공유 메모리 프레임 전달 벤치마크")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"📊 프레임 전달 벤치마크 ({args.frames} frames, start method: {mp.get_start_method()})")
+    print(f"{'shape':<16}{'size':>10}{'pickle':>14}{'shm':>14}{'speedup':>10}")
+    for label, (shape, dtype) in FRAME_SHAPES.items():
+        frame = np.random.default_rng(0).integers(0, 255, size=shape).astype(dtype)
+        t_pickle = bench_pickle(frame, args.frames)
+        t_shm = bench_shared_memory(frame, args.frames)
+        print(
+            f"{label:<16}{frame.nbytes / 1e6:>8.2f}MB"
+            f"{t_pickle / args.frames * 1000:>11.3f}ms"
+            f"{t_shm / args.frames * 1000:>11.3f}ms"
+            f"{t_pickle / t_shm:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
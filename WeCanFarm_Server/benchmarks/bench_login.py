@@ -0,0 +1,148 @@
+# benchmarks/bench_login.py
+"""
+동시 로그인 처리량 / 이벤트 루프 지연 벤치마크
+
+같은 수의 동시 로그인을
+  1) inline   : 기존 방식처럼 이벤트 루프에서 bcrypt 검증 (pwd_context.verify 직접 호출)
+  2) executor : /api/auth/login 엔드포인트 (password_hasher 전용 스레드 풀)
+로 처리하면서, 그동안 10ms 주기 프로브가 얼마나 늦게 깨어나는지(= 다른 요청이 멈춘 시간)를 측정합니다.
+DB는 임시 SQLite 파일을 사용합니다.
+
+실행 (WeCanFarm_Server 디렉토리에서):
+    python -m benchmarks.bench_login --logins 200 --concurrency 50
+    python -m benchmarks.bench_login --rounds 10 --workers 2 --max-pending 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="동시 로그인 벤치마크")
+    parser.add_argument("--logins", type=int, default=200, help="방식별 로그인 시도 수")
+    parser.add_argument("--concurrency", type=int, default=50, help="동시 로그인 수")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt 비용 (BCRYPT_ROUNDS)")
+    parser.add_argument("--workers", type=int, default=None, help="PASSWORD_HASH_WORKERS (기본: 서버 기본값)")
+    parser.add_argument("--max-pending", type=int, default=None, help="PASSWORD_HASH_MAX_PENDING (기본: 서버 기본값)")
+    return parser.parse_args()
+
+
+ARGS = _parse_args()
+# 설정은 import 시점에 읽히므로 app import 전에 지정
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'wecanfarm_bench_login.db')}"
+os.environ["BCRYPT_ROUNDS"] = str(ARGS.rounds)
+if ARGS.workers is not None:
+    os.environ["PASSWORD_HASH_WORKERS"] = str(ARGS.workers)
+if ARGS.max_pending is not None:
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = str(ARGS.max_pending)
+
+import httpx
+from fastapi import FastAPI
+
+from app.auth.password_hasher import pwd_context, password_hasher
+from app.database.database import SessionLocal, async_engine, create_tables, drop_tables
+from app.database.models import UserCRUD
+from app.routers import auth
+
+USERNAME, PASSWORD = "bench_login_user", "bench-password-123"
+
+
+class LoopLagProbe:
+    """interval마다 깨어나도록 예약하고, 실제로 늦게 깨어난 시간(ms)을 기록"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+async def _storm(login, logins: int, concurrency: int) -> dict:
+    """login()을 concurrency개씩 동시에 logins번 호출 → 결과 코드별 개수/성공 지연/루프 지연"""
+    gate = asyncio.Semaphore(concurrency)
+    latencies, codes = [], {}
+
+    async def one():
+        async with gate:
+            started = time.perf_counter()
+            code = await login()
+            if code == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            codes[code] = codes.get(code, 0) + 1
+
+    with LoopLagProbe() as probe:
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "codes": codes,
+        "throughput": codes.get(200, 0) / elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0.0,
+        "loop_lag_p95_ms": sorted(probe.lags)[max(0, int(len(probe.lags) * 0.95) - 1)] if probe.lags else 0.0,
+        "loop_lag_max_ms": max(probe.lags, default=0.0),
+    }
+
+
+async def main():
+    drop_tables()
+    create_tables()
+    db = SessionLocal()
+    try:
+        UserCRUD.create(db, USERNAME, "bench_login@wecanfarm.com", pwd_context.hash(PASSWORD), "벤치마크")
+        stored_hash = UserCRUD.get_by_username(db, USERNAME).password
+    finally:
+        db.close()
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api")
+
+    print(f"🔐 동시 로그인 벤치마크 (bcrypt rounds {ARGS.rounds}, {ARGS.logins}회, 동시 {ARGS.concurrency})")
+    print(f"   password_hasher: workers {password_hasher.workers}, max_pending {password_hasher.max_pending}")
+
+    async def inline_login():
+        await asyncio.sleep(0)  # 요청 수신 지점
+        return 200 if pwd_context.verify(PASSWORD, stored_hash) else 401
+
+    results = {"inline": await _storm(inline_login, ARGS.logins, ARGS.concurrency)}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def endpoint_login():
+            response = await client.post("/api/auth/login", json={"username": USERNAME, "password": PASSWORD})
+            return response.status_code
+
+        results["executor"] = await _storm(endpoint_login, ARGS.logins, ARGS.concurrency)
+
+    password_hasher.shutdown()
+    await async_engine.dispose()  # aiosqlite 연결 스레드가 남아 종료되지 않는 것 방지
+
+    print()
+    print(f"{'mode':<10}{'ok/s':>8}{'ok p50 ms':>11}{'ok p95 ms':>11}{'loop lag p95':>14}{'loop lag max':>14}  codes")
+    for mode, result in results.items():
+        print(f"{mode:<10}{result['throughput']:>8.1f}{result['p50_ms']:>11.0f}{result['p95_ms']:>11.0f}"
+              f"{result['loop_lag_p95_ms']:>14.1f}{result['loop_lag_max_ms']:>14.1f}  {result['codes']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
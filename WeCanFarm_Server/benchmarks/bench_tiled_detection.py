@@ -0,0 +1,82 @@
+# benchmarks/bench_tiled_detection.py
+"""
+YOLO 감지 지연 시간 비교: 전체 이미지 vs 타일 모드
+
+실행 (WeCanFarm_Server 디렉토리에서, app/models/yolo_v1.pt 필요):
+    python -m benchmarks.bench_tiled_detection --image field.jpg --repeat 5
+    python -m benchmarks.bench_tiled_detection --size 4096 3072 --tile-size 1024 --overlap 0.2
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.image_handler import load_yolo_model, yolo_detection
+from app.utils.tiling import compute_tiles, tiled_yolo_detection
+
+
+def _time_call(fn, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def _summary(timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"mean {statistics.mean(timings):8.1f}ms  p95 {p95:8.1f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전체 이미지 vs 타일 YOLO 감지 벤치마크")
+    parser.add_argument("--image", help="테스트 이미지 경로 (없으면 무작위 이미지 생성)")
+    parser.add_argument("--size", nargs=2, type=int, default=[4096, 3072], metavar=("W", "H"))
+    parser.add_argument("--tile-size", type=int, default=1024)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if load_yolo_model() is None:
+        print("❌ YOLO 모델을 로드할 수 없어 벤치마크를 중단합니다 (app/models/yolo_v1.pt 확인)")
+        return
+
+    if args.image:
+        image = Image.open(args.image).convert("RGB")
+    else:
+        width, height = args.size
+        pixels = np.random.default_rng(0).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+        image = Image.fromarray(pixels)
+
+    tiles = compute_tiles(*image.size, args.tile_size, args.overlap)
+    print(f"📊 이미지 {image.size}, 타일 {len(tiles)}개 ({args.tile_size}px, overlap {args.overlap})")
+
+    # 워밍업 (모델 초기화 비용 제외)
+    yolo_detection(image)
+    tiled_yolo_detection(image, args.tile_size, args.overlap, args.batch_size)
+
+    whole_timings, whole_result = _time_call(lambda: yolo_detection(image), args.repeat)
+    tiled_timings, tiled_result = _time_call(
+        lambda: tiled_yolo_detection(image, args.tile_size, args.overlap, args.batch_size),
+        args.repeat
+    )
+
+    print("=" * 60)
+    print(f"전체 이미지: {_summary(whole_timings)}  감지 {len(whole_result)}개")
+    print(f"타일 모드  : {_summary(tiled_timings)}  감지 {len(tiled_result)}개")
+    print(f"지연 비율  : {statistics.mean(tiled_timings) / statistics.mean(whole_timings):.2f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()